@@ -1,10 +1,92 @@
+import json
 import os
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
 from PIL import Image, ImageTk
 import webbrowser
 
+import synteny
+from synteny import export, report
+
+try:
+    from synteny import dotplot
+except ImportError:  # dot plots need NumPy
+    dotplot = None
+
+class DotPlotWindow:
+    """Zoomable dot plot of one pair: click to zoom in, right-click to zoom out"""
+    SIZE = 600
+    ZOOM = 2
+    
+    def __init__(self, root, seq1, seq2, id1, id2):
+        self.seq1 = seq1
+        self.seq2 = seq2
+        self.region = (0, len(seq1), 0, len(seq2))
+        self.image = None
+        
+        self.window = tk.Toplevel(root)
+        self.window.title(f"Dot Plot: {id1} vs {id2}")
+        toolbar = ttk.Frame(self.window, padding=5)
+        toolbar.pack(fill=tk.X)
+        ttk.Button(toolbar, text="Zoom In",
+                   command=lambda: self.zoom(0.5, 0.5, self.ZOOM)).pack(side=tk.LEFT)
+        ttk.Button(toolbar, text="Zoom Out",
+                   command=lambda: self.zoom(0.5, 0.5, 1 / self.ZOOM)).pack(side=tk.LEFT, padx=5)
+        ttk.Button(toolbar, text="Reset", command=self.reset).pack(side=tk.LEFT)
+        self.region_var = tk.StringVar()
+        ttk.Label(toolbar, textvariable=self.region_var,
+                  font=('Segoe UI', 9)).pack(side=tk.LEFT, padx=10)
+        
+        self.canvas = tk.Canvas(self.window, width=self.SIZE, height=self.SIZE,
+                                bg='white', highlightthickness=0)
+        self.canvas.pack(padx=5)
+        self.canvas.bind('<Button-1>',
+                         lambda e: self.zoom(e.x / self.SIZE, e.y / self.SIZE, self.ZOOM))
+        self.canvas.bind('<Button-3>',
+                         lambda e: self.zoom(e.x / self.SIZE, e.y / self.SIZE, 1 / self.ZOOM))
+        ttk.Label(self.window,
+                  text=f"x: {id1}   y: {id2}   blue: forward   red: reverse complement",
+                  font=('Segoe UI', 9)).pack(pady=5)
+        self.draw()
+    
+    def draw(self):
+        """Recompute the visible region at canvas resolution and show it"""
+        self.window.config(cursor='watch')
+        self.window.update_idletasks()
+        plot = dotplot.dot_density(self.seq1, self.seq2, self.SIZE, self.SIZE, self.region)
+        image = Image.fromarray(dotplot.shade(plot)).resize((self.SIZE, self.SIZE), Image.NEAREST)
+        self.image = ImageTk.PhotoImage(image)  # Tk keeps no reference of its own
+        self.canvas.delete('all')
+        self.canvas.create_image(0, 0, anchor=tk.NW, image=self.image)
+        start1, end1, start2, end2 = self.region
+        self.region_var.set(f"{start1:,}–{end1:,} × {start2:,}–{end2:,} bp (k={plot.k})")
+        self.window.config(cursor='')
+    
+    def zoom(self, x, y, factor):
+        """Zoom around the fractions (x, y) of the view; only the new view is recomputed"""
+        region = dotplot.zoom_region(self.region, (len(self.seq1), len(self.seq2)), x, y, factor)
+        if region != self.region:
+            self.region = region
+            self.draw()
+    
+    def reset(self):
+        self.region = (0, len(self.seq1), 0, len(self.seq2))
+        self.draw()
+
 class GenomeComparatorApp:
+    # How often the UI drains worker results, and how many it renders per tick
+    POLL_MS = 50
+    RENDER_BATCH = 50
+    # Comparisons shown per results page; only the current page is in the Text widget
+    PAGE_SIZE = 100
+    # Structured record formats (see synteny.export); add .gz to compress
+    RECORD_FILETYPES = [("TSV files", "*.tsv"),
+                        ("CSV files", "*.csv"),
+                        ("JSON Lines files", "*.jsonl"),
+                        ("HTML files", "*.html"),
+                        ("Gzipped files", "*.gz"),
+                        ("All files", "*.*")]
+    
     def __init__(self, root):
         self.root = root
         self.root.title("Genome Sequence Comparator Pro")
@@ -21,6 +103,29 @@ class GenomeComparatorApp:
         self.chromo_file = tk.StringVar()
         self.results_text = ""
         self.dark_mode = False
+        self.alignment_method = "auto"
+        self.workers = 1
+        self.best_only = tk.BooleanVar(value=False)
+        self.both_strands = tk.BooleanVar(value=False)
+        self.alignment_model = tk.StringVar(value="ungapped")
+        self.synteny_blocks = tk.BooleanVar(value=False)
+        self.extra_assemblies = []  # (genome file, chromosome file) compared against the main one
+        self.stream_path = None  # file every pair record is written to as runs produce them
+        self.capture_profile = tk.BooleanVar(value=False)
+        self.cache_path = synteny.default_cache_path()
+        self.run = None
+        self.best = None
+        self.report_header = []
+        self.report_records = []
+        self.report_footer = []
+        self.report_composition = None
+        self.report_blocks = None
+        self.report_matrices = None
+        self.report_run = None
+        self.expanded = {}
+        self.page = 0
+        self.last_metrics = None
+        self.last_profile = None
         
         self.create_widgets()
         self.create_menu()
@@ -53,6 +158,8 @@ class GenomeComparatorApp:
         file_menu.add_command(label="Open Chromosome File", command=lambda: self.browse_file(self.chromo_file))
         file_menu.add_separator()
         file_menu.add_command(label="Export Results", command=self.export_results)
+        file_menu.add_command(label="Stream Results To...", command=self.choose_stream)
+        file_menu.add_command(label="Stop Streaming Results", command=self.stop_stream)
         file_menu.add_separator()
         file_menu.add_command(label="Exit", command=self.root.quit)
         menubar.add_cascade(label="File", menu=file_menu)
@@ -60,11 +167,24 @@ class GenomeComparatorApp:
         # View menu
         view_menu = tk.Menu(menubar, tearoff=0)
         view_menu.add_command(label="Toggle Dark Mode", command=self.toggle_dark_mode)
+        view_menu.add_command(label="Dot Plot of Best Match", command=self.show_best_dot_plot)
         menubar.add_cascade(label="View", menu=view_menu)
         
         # Analysis menu
         analysis_menu = tk.Menu(menubar, tearoff=0)
         analysis_menu.add_command(label="Run Comparison", command=self.run_comparison)
+        analysis_menu.add_command(label="Cancel Comparison", command=self.cancel_comparison)
+        analysis_menu.add_checkbutton(label="Best Match Only", variable=self.best_only)
+        analysis_menu.add_checkbutton(label="Both Strands", variable=self.both_strands)
+        model_menu = tk.Menu(analysis_menu, tearoff=0)
+        for label, value in (("Ungapped", "ungapped"), ("Gapped Local", "local"),
+                             ("Gapped Global", "global")):
+            model_menu.add_radiobutton(label=label, value=value, variable=self.alignment_model)
+        analysis_menu.add_cascade(label="Alignment Model", menu=model_menu)
+        analysis_menu.add_checkbutton(label="Synteny Blocks", variable=self.synteny_blocks)
+        analysis_menu.add_command(label="Compare Against Assembly...", command=self.add_assembly)
+        analysis_menu.add_command(label="Clear Extra Assemblies", command=self.clear_assemblies)
+        analysis_menu.add_checkbutton(label="Capture Profile", variable=self.capture_profile)
         analysis_menu.add_command(label="Clear Results", command=self.clear_results)
         menubar.add_cascade(label="Analysis", menu=analysis_menu)
         
@@ -131,15 +251,32 @@ class GenomeComparatorApp:
         button_frame = ttk.Frame(main_frame)
         button_frame.pack(fill=tk.X, pady=(10, 15))
         
-        ttk.Button(button_frame, 
-                  text="Run Comparison", 
-                  style='Accent.TButton',
-                  command=self.run_comparison).pack(side=tk.LEFT, padx=(0, 10))
+        self.run_button = ttk.Button(button_frame, 
+                                    text="Run Comparison", 
+                                    style='Accent.TButton',
+                                    command=self.run_comparison)
+        self.run_button.pack(side=tk.LEFT, padx=(0, 10))
+        
+        self.cancel_button = ttk.Button(button_frame, 
+                                       text="Cancel", 
+                                       state=tk.DISABLED,
+                                       command=self.cancel_comparison)
+        self.cancel_button.pack(side=tk.LEFT, padx=(0, 10))
         
         ttk.Button(button_frame, 
                   text="Clear Results", 
                   command=self.clear_results).pack(side=tk.LEFT, padx=(0, 10))
         
+        # Progress of the running comparison
+        self.progress_var = tk.StringVar()
+        ttk.Label(button_frame, 
+                 textvariable=self.progress_var, 
+                 font=('Segoe UI', 9)).pack(side=tk.RIGHT)
+        self.progress_bar = ttk.Progressbar(button_frame, 
+                                            mode='determinate', 
+                                            length=220)
+        self.progress_bar.pack(side=tk.RIGHT, padx=(0, 10))
+        
         # Results section
         results_frame = ttk.LabelFrame(main_frame, 
                                      text=" Analysis Results ",
@@ -160,6 +297,25 @@ class GenomeComparatorApp:
         )
         self.results_text.pack(fill=tk.BOTH, expand=True)
         
+        # Page navigation for long reports
+        page_frame = ttk.Frame(results_frame)
+        page_frame.pack(fill=tk.X, pady=(8, 0))
+        self.prev_button = ttk.Button(page_frame, 
+                                     text="◀ Previous", 
+                                     state=tk.DISABLED,
+                                     command=lambda: self.show_page(self.page - 1))
+        self.prev_button.pack(side=tk.LEFT)
+        self.next_button = ttk.Button(page_frame, 
+                                     text="Next ▶", 
+                                     state=tk.DISABLED,
+                                     command=lambda: self.show_page(self.page + 1))
+        self.next_button.pack(side=tk.RIGHT)
+        self.page_var = tk.StringVar()
+        ttk.Label(page_frame, 
+                 textvariable=self.page_var, 
+                 anchor=tk.CENTER,
+                 font=('Segoe UI', 9)).pack(fill=tk.X, expand=True)
+        
         # Configure text tags for coloring
         self.results_text.tag_config('header', font=('Segoe UI', 12, 'bold'), spacing3=5)
         self.results_text.tag_config('subheader', font=('Segoe UI', 10, 'bold'), foreground='#2c3e50')
@@ -173,6 +329,10 @@ class GenomeComparatorApp:
         self.results_text.tag_config('match', background='#E8F5E9')
         self.results_text.tag_config('mismatch', background='#FFEBEE')
         self.results_text.tag_config('gap', background='#E0E0E0')
+        self.results_text.tag_config('link', foreground='#1565C0', underline=True)
+        self.results_text.tag_bind('link', '<Button-1>', self.follow_link)
+        self.results_text.tag_bind('link', '<Enter>', lambda e: self.results_text.config(cursor='hand2'))
+        self.results_text.tag_bind('link', '<Leave>', lambda e: self.results_text.config(cursor=''))
         
         # Status bar
         self.status_var = tk.StringVar()
@@ -199,59 +359,92 @@ class GenomeComparatorApp:
             target_var.set(filename)
             self.status_var.set(f"Selected file: {os.path.basename(filename)}")
     
-    def colorize_sequence(self, sequence):
-        """Insert sequence with color-coded nucleotides"""
-        for char in sequence:
-            upper_char = char.upper()
-            if upper_char == 'A':
-                self.results_text.insert(tk.END, char, 'A')
-            elif upper_char in ('T', 'U'):
-                self.results_text.insert(tk.END, char, 'T')
-            elif upper_char == 'C':
-                self.results_text.insert(tk.END, char, 'C')
-            elif upper_char == 'G':
-                self.results_text.insert(tk.END, char, 'G')
-            else:
-                self.results_text.insert(tk.END, char, 'N')
-    
-    def visualize_alignment(self, seq1, seq2, alignment_line):
-        """Visualize alignment with color-coded matches/mismatches"""
-        self.results_text.insert(tk.END, "\nAlignment Visualization:\n", 'subheader')
-        
-        # Top sequence (seq1)
-        self.results_text.insert(tk.END, "Reference: ")
-        self.colorize_sequence(seq1)
-        self.results_text.insert(tk.END, "\n")
-        
-        # Alignment indicators
-        self.results_text.insert(tk.END, "           ")
-        for i, char in enumerate(alignment_line):
-            if char == 'R':
-                self.results_text.insert(tk.END, "|", 'match')
-            elif char == 'W':
-                self.results_text.insert(tk.END, "·", 'mismatch')  # Middle dot character
-            else:
-                self.results_text.insert(tk.END, " ", 'gap')
-        self.results_text.insert(tk.END, "\n")
-        
-        # Bottom sequence (seq2)
-        self.results_text.insert(tk.END, "Comparison: ")
-        self.colorize_sequence(seq2)
-        self.results_text.insert(tk.END, "\n")
-    
-    def calculate_statistics(self, seq1, seq2):
-        """Calculate additional statistics about the alignment"""
-        len1, len2 = len(seq1), len(seq2)
-        max_len = max(len1, len2)
-        min_len = min(len1, len2)
-        
-        return {
-            "length_ratio": f"{min_len/max_len:.1%}",
-            "gc_content1": f"{((seq1.count('G') + seq1.count('C'))/len1):.1%}" if len1 > 0 else "N/A",
-            "gc_content2": f"{((seq2.count('G') + seq2.count('C'))/len2):.1%}" if len2 > 0 else "N/A"
-        }
+    def add_assembly(self):
+        """Ask for another genome and chromosome file to compare against"""
+        genome_file = filedialog.askopenfilename(title="Select assembly genome file")
+        if not genome_file:
+            return
+        chromo_file = filedialog.askopenfilename(title="Select assembly chromosome file")
+        if not chromo_file:
+            return
+        self.extra_assemblies.append((genome_file, chromo_file))
+        self.status_var.set(f"Comparing against {len(self.extra_assemblies)} further "
+                            f"assembl{'y' if len(self.extra_assemblies) == 1 else 'ies'}")
+    
+    def choose_stream(self):
+        """Ask for a file that the next runs write every record to while they go"""
+        filename = filedialog.asksaveasfilename(
+            defaultextension=".tsv",
+            filetypes=self.RECORD_FILETYPES,
+            title="Stream comparison records to"
+        )
+        if filename:
+            self.stream_path = filename
+            self.status_var.set(f"Results will be streamed to {os.path.basename(filename)}")
+    
+    def stop_stream(self):
+        self.stream_path = None
+        self.status_var.set("Results are no longer streamed to a file")
+    
+    def clear_assemblies(self):
+        self.extra_assemblies = []
+        self.status_var.set("Extra assemblies cleared")
+    
+    def insert_segments(self, segments):
+        """Insert (text, tag) segments with a single Text.insert call"""
+        if not segments:
+            return
+        args = []
+        for text, tag in segments:
+            args += [text, tag or ()]
+        self.results_text.insert(tk.END, *args)
+    
+    def page_count(self):
+        return max(1, -(-len(self.report_records) // self.PAGE_SIZE))
+    
+    def show_page(self, page):
+        """Render the report header, one page of comparisons and, on the last page, the footer"""
+        self.page = max(0, min(page, self.page_count() - 1))
+        first = self.page * self.PAGE_SIZE
+        self.results_text.delete(1.0, tk.END)
+        self.insert_segments(self.report_header)
+        for record in self.report_records[first:first + self.PAGE_SIZE]:
+            self.insert_segments(report.comparison_segments(record, self.expanded.get(record["index"])))
+        if self.page == self.page_count() - 1:
+            self.insert_segments(self.report_footer)
+        self.update_page_controls()
+    
+    def update_page_controls(self):
+        count = self.page_count()
+        if len(self.report_records) > self.PAGE_SIZE:
+            first = self.page * self.PAGE_SIZE
+            last = min(first + self.PAGE_SIZE, len(self.report_records))
+            self.page_var.set(f"Page {self.page + 1} of {count} • comparisons {first + 1:,}–{last:,} "
+                              f"of {len(self.report_records):,}")
+        else:
+            self.page_var.set("")
+        self.prev_button.config(state=tk.NORMAL if self.page > 0 else tk.DISABLED)
+        self.next_button.config(state=tk.NORMAL if self.page < count - 1 else tk.DISABLED)
+    
+    def reset_report(self):
+        self.report_header = []
+        self.report_records = []
+        self.report_footer = []
+        self.report_composition = None
+        self.report_blocks = None
+        self.report_matrices = None
+        self.report_run = None
+        self.expanded = {}
+        self.page = 0
+        self.last_metrics = None
+        self.last_profile = None
+        self.results_text.delete(1.0, tk.END)
+        self.update_page_controls()
     
     def run_comparison(self):
+        if self.run is not None:
+            return
+        
         genome_file = self.genome_file.get()
         chromo_file = self.chromo_file.get()
         
@@ -263,186 +456,261 @@ class GenomeComparatorApp:
             messagebox.showerror("File Error", "One or both files do not exist")
             return
         
-        try:
-            self.status_var.set("Processing... Please wait")
-            self.root.update()
-            
-            # Read files
-            genome_seq = self.read_genome_file(genome_file)
-            chromo_list = self.read_chromosome_file(chromo_file, genome_seq)
-            
-            # Prepare results display
-            self.results_text.delete(1.0, tk.END)
-            self.results_text.insert(tk.END, "GENOME COMPARISON REPORT\n", 'header')
-            self.results_text.insert(tk.END, "="*60 + "\n\n")
-            
-            # Genome information
-            self.results_text.insert(tk.END, "Genome Information:\n", 'subheader')
-            self.results_text.insert(tk.END, f"• File: {os.path.basename(genome_file)}\n")
-            self.results_text.insert(tk.END, f"• Length: {len(genome_seq):,} bp\n")
-            self.results_text.insert(tk.END, f"• GC Content: {((genome_seq.count('G') + genome_seq.count('C'))/len(genome_seq)):.1%}\n\n")
-            
-            # Chromosome information
-            self.results_text.insert(tk.END, "Chromosome Information:\n", 'subheader')
-            self.results_text.insert(tk.END, f"• File: {os.path.basename(chromo_file)}\n")
-            self.results_text.insert(tk.END, f"• Chromosomes to compare: {len(chromo_list)}\n\n")
-            
-            # Comparison section
-            self.results_text.insert(tk.END, "Pairwise Comparisons:\n", 'subheader')
-            self.results_text.insert(tk.END, "="*60 + "\n\n")
-            
-            best_pair = None
-            best_similarity = 0
-            best_alignment_result = []
-            comparison_count = 0
-            
-            # Compare all chromosome pairs
-            for i in range(len(chromo_list)):
-                for j in range(i+1, len(chromo_list)):
-                    id1, seq1 = chromo_list[i]
-                    id2, seq2 = chromo_list[j]
-                    
-                    # Calculate alignment and similarity
-                    similarity, alignment_visual = self.calculate_alignment(seq1, seq2)
-                    stats = self.calculate_statistics(seq1, seq2)
-                    
-                    # Display comparison header
-                    self.results_text.insert(tk.END, f"Comparison {comparison_count + 1}: {id1} vs {id2}\n", 'highlight')
-                    self.results_text.insert(tk.END, f"• Similarity: {similarity:.2f}%\n")
-                    self.results_text.insert(tk.END, f"• Length ratio: {stats['length_ratio']}\n")
-                    self.results_text.insert(tk.END, f"• GC Content: {id1}={stats['gc_content1']}, {id2}={stats['gc_content2']}\n\n")
-                    
-                    # Visualize the alignment if sequences are not too long
-                    if len(alignment_visual) >= 3 and len(seq1) < 100 and len(seq2) < 100:
-                        self.visualize_alignment(alignment_visual[0], alignment_visual[2], alignment_visual[1])
-                    elif len(alignment_visual) >= 3:
-                        self.results_text.insert(tk.END, "[Alignment visualization available for sequences < 100bp]\n")
-                    
-                    self.results_text.insert(tk.END, "-"*60 + "\n\n")
-                    comparison_count += 1
-                    
-                    # Track best match
-                    if similarity > best_similarity:
-                        best_similarity = similarity
-                        best_pair = (id1, id2)
-                        best_alignment_result = alignment_visual
-            
-            # Display best match
-            if best_pair:
-                self.results_text.insert(tk.END, "\n" + "="*60 + "\n")
-                self.results_text.insert(tk.END, "★ BEST MATCH RESULT ★\n", 'best')
-                self.results_text.insert(tk.END, f"• Chromosome Pair: {best_pair[0]} and {best_pair[1]}\n")
-                self.results_text.insert(tk.END, f"• Similarity Score: {best_similarity:.2f}%\n\n")
-                
-                if len(best_alignment_result) >= 3:
-                    if len(best_alignment_result[0]) < 100 and len(best_alignment_result[2]) < 100:
-                        self.visualize_alignment(best_alignment_result[0], best_alignment_result[2], best_alignment_result[1])
-                    else:
-                        self.results_text.insert(tk.END, "[Full alignment not shown for long sequences]\n")
-            
-            self.status_var.set(f"Analysis complete. {comparison_count} comparisons performed.")
-            
-        except Exception as e:
-            messagebox.showerror("Processing Error", f"An error occurred during analysis:\n{str(e)}")
+        gapped = None
+        if self.alignment_model.get() != "ungapped":
+            try:
+                from synteny.gapped import GappedModel
+            except ImportError:
+                messagebox.showerror("Alignment Model", "Gapped alignment requires NumPy")
+                return
+            gapped = GappedModel(self.alignment_model.get())
+        
+        self.reset_report()
+        self.best = synteny.BestPair()
+        self.progress_bar.config(value=0, maximum=1)
+        self.progress_var.set("")
+        self.run_button.config(state=tk.DISABLED)
+        self.cancel_button.config(state=tk.NORMAL)
+        self.status_var.set("Reading input files...")
+        
+        # Parsing and alignment happen on a worker thread; poll_run renders results
+        self.run = synteny.BackgroundRun(genome_file, chromo_file, self.alignment_method, self.workers,
+                                         cache_path=self.cache_path, best_only=self.best_only.get(),
+                                         profile=self.capture_profile.get(),
+                                         both_strands=self.both_strands.get(), gapped=gapped,
+                                         blocks=self.synteny_blocks.get(),
+                                         assemblies=self.extra_assemblies,
+                                         stream_path=self.stream_path)
+        self.report_run = self.run
+        self.run.start()
+        self.root.after(self.POLL_MS, self.poll_run)
+    
+    def cancel_comparison(self):
+        if self.run is not None:
+            self.run.cancel()
+            self.cancel_button.config(state=tk.DISABLED)
+            self.status_var.set("Cancelling...")
+    
+    def poll_run(self):
+        """Render queued results, then reschedule until the run ends"""
+        run = self.run
+        if run is None:
+            return
+        
+        for kind, payload in run.drain(self.RENDER_BATCH):
+            if kind == "start":
+                with run.metrics.stage("render"):
+                    self.show_report_header(payload)
+                self.progress_bar.config(maximum=max(1, payload["total"]))
+            elif kind == "pair":
+                with run.metrics.stage("render"):
+                    self.add_comparison(payload)
+                self.best.update(payload)
+            elif kind == "blocks":
+                self.report_blocks = payload
+            elif kind == "matrices":
+                self.report_matrices = payload
+                for matrix in payload:
+                    if matrix.best is not None:
+                        self.best.update(matrix.best)
+            else:
+                self.finish_run(kind, payload)
+                return
+        
+        self.update_page_controls()
+        self.update_progress()
+        self.root.after(self.POLL_MS, self.poll_run)
+    
+    def update_progress(self):
+        run = self.run
+        self.progress_bar.config(value=run.done)
+        self.progress_var.set(f"{run.done:,}/{run.total:,} pairs • "
+                              f"{run.pairs_per_second():.1f} pairs/s • "
+                              f"ETA {synteny.format_duration(run.eta_seconds())}")
+        if run.total and not run.cancelled:
+            self.status_var.set(f"Comparing chromosome pairs... {run.done / run.total:.0%}")
+    
+    def finish_run(self, kind, payload):
+        """Close the report once the worker thread has posted its last message"""
+        run = self.run
+        comparison_count = run.done
+        cache_note = ""
+        if run.cache_path and not run.best_only and not run.assemblies:
+            cache_note = f" (cache: {run.cache_hits} hits, {run.cache_misses} misses)"
+        self.update_progress()
+        self.run = None
+        self.run_button.config(state=tk.NORMAL)
+        self.cancel_button.config(state=tk.DISABLED)
+        
+        if kind == "error":
+            messagebox.showerror("Processing Error", f"An error occurred during analysis:\n{str(payload)}")
             self.status_var.set("Error occurred during processing")
+            return
+        
+        footer = []
+        if self.report_composition:
+            footer += report.composition_segments(self.report_composition)
+        if self.report_blocks is not None:
+            footer += report.block_segments(self.report_blocks)
+        for matrix in self.report_matrices or ():
+            footer += report.matrix_segments(matrix)
+        if kind == "cancelled":
+            footer += report.cancelled_segments(comparison_count)
+        if self.best.record is not None:
+            best = self.best.record
+            visual = run.visual(best) if report.can_visualize(best) else None
+            footer += report.best_match_segments(best, visual)
+        self.report_footer = footer
+        with run.metrics.stage("render"):
+            if self.page == self.page_count() - 1:
+                self.insert_segments(footer)
+        self.update_page_controls()
+        
+        # Kept for export alongside the report
+        run.metrics.finish()
+        self.last_metrics = run.metrics.summary()
+        self.last_profile = run.profile
+        metrics_note = " " + synteny.format_summary(self.last_metrics, limit=3)
+        
+        search_stats = run.search_stats
+        if kind == "cancelled":
+            self.status_var.set(f"Analysis cancelled. {comparison_count} comparisons performed{cache_note}."
+                                + metrics_note)
+        elif search_stats is not None:
+            self.status_var.set(f"Best match search complete. {search_stats['aligned']} of "
+                                f"{search_stats['pairs']} pairs aligned, {search_stats['pruned']} pruned."
+                                + metrics_note)
+        else:
+            self.status_var.set(f"Analysis complete. {comparison_count} comparisons performed{cache_note}."
+                                + metrics_note)
     
-    def read_genome_file(self, genome_filename):
-        with open(genome_filename, 'r') as f:
-            lines = f.readlines()
-            seq = ''.join([line.strip() for line in lines if not line.startswith('>')])
-        return seq
-    
-    def read_chromosome_file(self, chromo_filename, genome_seq):
-        chromo_list = []
-        genome_length = len(genome_seq)
-        with open(chromo_filename, 'r') as f:
-            lines = f.readlines()
-            for line in lines[1:]:  # skip header
-                parts = line.strip().split(',')
-                if len(parts) < 3:
-                    continue
-                
-                chromo_id = parts[0]
-                try:
-                    start = int(parts[1])
-                    end = int(parts[2])
-                except ValueError:
-                    continue
-                
-                if start >= genome_length:
-                    chromo_seq = ""
-                    self.results_text.insert(tk.END, f"⚠ Warning: Chromosome {chromo_id} start position {start} is out of genome range.\n")
-                else:
-                    end = min(end, genome_length)
-                    chromo_seq = genome_seq[start:end]
-                    if chromo_seq == "":
-                        self.results_text.insert(tk.END, f"⚠ Warning: Chromosome {chromo_id} sequence is empty.\n")
-
-                chromo_list.append((chromo_id, chromo_seq))
-        return chromo_list
+    def show_report_header(self, info):
+        """Render the genome and chromosome summary at the top of the report"""
+        if "assemblies" in info:
+            self.report_header = report.assemblies_header_segments(info)
+        else:
+            self.report_header = report.header_segments(
+                info, self.genome_file.get(), self.chromo_file.get())
+        self.report_composition = info.get("composition")
+        self.insert_segments(self.report_header)
     
-    def calculate_alignment(self, seq1, seq2):
-        if len(seq1) == 0 or len(seq2) == 0:
-            return 0.0, []
-
-        max_match = 0
-        best_alignment = []
-
-        for offset in range(-len(seq2)+1, len(seq1)):
-            match_count = 0
-            alignment_line = ""
-
-            for i in range(len(seq2)):
-                pos_in_seq1 = i + offset
-                if 0 <= pos_in_seq1 < len(seq1):
-                    if seq1[pos_in_seq1] == seq2[i]:
-                        alignment_line += "R"
-                        match_count += 1
-                    else:
-                        alignment_line += "W"
-                else:
-                    alignment_line += "X"
-
-            similarity = (match_count / len(seq2)) * 100
-
-            visual_top = seq1
-            visual_mid = (" " * max(0, offset)) + alignment_line
-            visual_bottom = (" " * max(0, offset)) + seq2
-
-            if match_count > max_match:
-                max_match = match_count
-                best_alignment = [visual_top, visual_mid, visual_bottom, f"Similarity: {similarity:.2f}%"]
-
-        final_similarity = (max_match / len(seq2)) * 100
-        return final_similarity, best_alignment
+    def add_comparison(self, record):
+        """Keep one pair result, drawing it if it lands on the page being viewed"""
+        self.report_records.append(record)
+        if (len(self.report_records) - 1) // self.PAGE_SIZE == self.page:
+            self.insert_segments(report.comparison_segments(record))
+    
+    def follow_link(self, event):
+        """Toggle the alignment or open the dot plot of the pair whose link was clicked"""
+        tags = self.results_text.tag_names(f"@{event.x},{event.y}")
+        tag = next((tag for tag in tags if tag.startswith(("pair-", "dots-"))), None)
+        if tag is None:
+            return
+        index = int(tag[5:])
+        first = self.page * self.PAGE_SIZE
+        record = next((r for r in self.report_records[first:first + self.PAGE_SIZE]
+                       if r["index"] == index), None)
+        if record is None:
+            return
+        if tag.startswith("dots-"):
+            self.show_dot_plot(record)
+        else:
+            self.toggle_alignment(record)
+    
+    def show_dot_plot(self, record):
+        if dotplot is None:
+            messagebox.showerror("Dot Plot", "Dot plots require NumPy")
+            return
+        seq1, seq2 = self.report_run.sequences(record)
+        DotPlotWindow(self.root, seq1, seq2, record["id1"], record["id2"])
+        self.status_var.set(f"Dot plot of {record['id1']} vs {record['id2']}")
+    
+    def show_best_dot_plot(self):
+        if self.report_run is None or self.best is None or self.best.record is None:
+            messagebox.showinfo("Dot Plot", "Run a comparison first")
+            return
+        self.show_dot_plot(self.best.record)
+    
+    def toggle_alignment(self, record):
+        """Show or hide the alignment of a pair on the current page"""
+        index = record["index"]
+        # Pictures are rebuilt from the genome only when a pair is expanded
+        if self.expanded.pop(index, None) is None:
+            self.expanded[index] = self.report_run.visual(record)
+        view = self.results_text.yview()[0]
+        self.show_page(self.page)
+        self.results_text.yview_moveto(view)
     
     def clear_results(self):
-        self.results_text.delete(1.0, tk.END)
+        self.reset_report()
         self.status_var.set("Results cleared")
     
     def export_results(self):
-        content = self.results_text.get(1.0, tk.END)
-        if not content.strip():
+        if not self.report_header and not self.report_records:
             messagebox.showwarning("Export Warning", "No results to export")
             return
         
         filename = filedialog.asksaveasfilename(
             defaultextension=".txt",
-            filetypes=[("Text files", "*.txt"), 
-                      ("HTML files", "*.html"),
-                      ("All files", "*.*")],
+            filetypes=[("Text report", "*.txt")] + self.RECORD_FILETYPES,
             title="Save analysis report as"
         )
         
         if filename:
             try:
-                with open(filename, 'w') as f:
-                    f.write(content)
+                fmt = export.format_for_path(filename, default=None)
+                if fmt is None:
+                    self.write_text_report(filename)
+                else:
+                    self.write_records(filename, fmt)
+                # Machine-readable run summary (and profile, if captured) beside the report
+                base = os.path.splitext(filename[:-3] if filename.lower().endswith(".gz")
+                                        else filename)[0]
+                if self.last_metrics is not None:
+                    with open(base + ".metrics.json", 'w') as f:
+                        json.dump(self.last_metrics, f, indent=2)
+                if self.last_profile is not None:
+                    self.last_profile.dump(base)
+                if self.report_blocks:
+                    from synteny.blocks import write_blocks
+                    with open(base + ".blocks.tsv", 'w') as f:
+                        write_blocks(f, self.report_blocks)
+                if self.report_matrices:
+                    from synteny.crossgenome import write_matrix
+                    with open(base + ".matrix.tsv", 'w') as f:
+                        for matrix in self.report_matrices:
+                            write_matrix(f, matrix)
                 self.status_var.set(f"Report saved to {os.path.basename(filename)}")
                 messagebox.showinfo("Export Success", "Report exported successfully!")
             except Exception as e:
                 messagebox.showerror("Export Error", f"Failed to export report:\n{str(e)}")
     
+    def write_text_report(self, filename):
+        """The report as plain text, with the alignments that were expanded"""
+        # The widget only holds one page; write every page, one record at a time
+        with open(filename, 'w') as f:
+            f.write(report.plain_text(self.report_header))
+            for record in self.report_records:
+                f.write(report.plain_text(report.comparison_segments(
+                    record, self.expanded.get(record["index"]), links=False)))
+            f.write(report.plain_text(self.report_footer))
+    
+    def write_records(self, filename, fmt):
+        """The pair records as TSV, CSV, JSON Lines or HTML (gzipped for .gz)"""
+        run = self.report_run
+        columns = export.pair_columns(run.both_strands, run.gapped is not None)
+        best = self.best.record if self.best is not None else None
+        with export.open_output(filename) as f:
+            writer = export.record_writer(fmt, f, columns)
+            for record in self.report_records:
+                writer.write(record)
+            writer.finish({
+                "genome_file": os.path.basename(self.genome_file.get()),
+                "chromosome_file": os.path.basename(self.chromo_file.get()),
+                "comparisons": len(self.report_records),
+                "best": export.best_summary(best) if best is not None else None,
+            })
+    
     def toggle_dark_mode(self):
         self.dark_mode = not self.dark_mode
         if self.dark_mode:
@@ -477,14 +745,50 @@ class GenomeComparatorApp:
    - Click "Run Comparison" to analyze all chromosome pairs
    - Results show pairwise alignments and similarity scores
    - Best match is highlighted at the end
+   - Analysis > Capture Profile records cProfile and memory data for
+     the next run; the status bar shows where the time went
+   - Long reports are split into pages of 100 comparisons; use
+     Previous/Next below the results (Export always saves every page)
+   - Progress, pairs per second and ETA are shown while the analysis runs
+   - Click "Cancel" to stop early; partial results stay in the window
+     and can still be exported
+   - Analysis > Best Match Only skips pairs that cannot beat the best
+     one and reports just that pair, much faster on large files
+   - Analysis > Both Strands also compares each pair against the reverse
+     complement, finding inverted segments; the report shows the strand
+   - Analysis > Alignment Model > Gapped Local/Global allows insertions
+     and deletions (affine gap penalties); the report adds the alignment
+     score and gaps show as blanks in the alignment track
+   - Analysis > Synteny Blocks also chains shared k-mer seeds into
+     collinear blocks (with orientation), listed at the end of the report
+   - Analysis > Compare Against Assembly... adds another genome and
+     chromosome file; every chromosome of one assembly is then compared
+     with every chromosome of the other and the report shows similarity
+     matrices instead of pairs (Clear Extra Assemblies goes back)
 
 3. RESULTS INTERPRETATION:
    - Nucleotides are color-coded (A=green, T=orange, C=blue, G=yellow)
+   - Click "Show alignment" under a comparison to draw its alignment
+     (pairs under 1,000 bp); the best match is always drawn
    - Alignment shows matching positions with vertical bars (|)
    - Mismatches are shown with middle dots (·)
+   - Click "Dot plot" under a comparison (or View > Dot Plot of Best
+     Match) for a dot plot of any pair, however long: blue dots are
+     shared k-mers, red ones inverted matches. Click to zoom in around a
+     point, right-click to zoom out; only the visible region is
+     recomputed, at screen resolution
+   - Chromosome Composition (last page) lists each chromosome's GC,
+     N fraction and a GC profile along its length
 
 4. EXPORTING:
-   - Save complete results to text file
+   - Save complete results to a text report, or choose .tsv, .csv,
+     .jsonl or .html for the pair records in that format (add .gz to
+     compress); HTML is a self-contained page
+   - File > Stream Results To... writes every record of the next runs to
+     a file of one of those formats while they run, whatever is shown
+   - A .metrics.json run summary (and any captured profile) is saved
+     next to the report, a .blocks.tsv with every synteny block and a
+     .matrix.tsv with every similarity matrix
    - Copy sections directly from the results window
 
 Keyboard Shortcuts:
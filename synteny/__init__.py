@@ -0,0 +1,78 @@
+"""Compute core for the Genome Sequence Comparator.
+
+Nothing in this package imports tkinter or PIL, so it can be used from
+scripts and on machines without a display.
+"""
+
+from .alignment import (
+    ENGINE_VERSION,
+    align_offsets,
+    align_offsets_both,
+    best_offset,
+    best_strand_offset,
+    calculate_alignment,
+    render_alignment,
+    reverse_complement,
+    tile_offsets,
+)
+from .cache import ResultCache, default_cache_path
+from .crossgenome import Assembly, SimilarityMatrix, compare_assemblies, open_assembly
+from .engine import (
+    BestPair,
+    calculate_statistics,
+    compare_all,
+    compare_pair,
+    gc_content,
+    read_chromosome_file,
+    read_chromosome_intervals,
+    read_genome_file,
+    record_visual,
+    score_pair,
+)
+from .export import open_output, record_writer
+from .fasta import IndexedFasta, open_genome
+from .metrics import ProfileCapture, RunMetrics, format_summary
+from .parallel import compare_all_parallel, compare_intervals
+from .runner import BackgroundRun, format_duration
+from .search import best_pair_intervals, find_best_pair
+
+__all__ = [
+    "Assembly",
+    "BackgroundRun",
+    "BestPair",
+    "ENGINE_VERSION",
+    "IndexedFasta",
+    "ProfileCapture",
+    "ResultCache",
+    "RunMetrics",
+    "SimilarityMatrix",
+    "align_offsets",
+    "align_offsets_both",
+    "best_offset",
+    "best_pair_intervals",
+    "best_strand_offset",
+    "calculate_alignment",
+    "calculate_statistics",
+    "compare_all",
+    "compare_all_parallel",
+    "compare_assemblies",
+    "compare_intervals",
+    "compare_pair",
+    "default_cache_path",
+    "find_best_pair",
+    "format_duration",
+    "format_summary",
+    "gc_content",
+    "open_assembly",
+    "open_genome",
+    "open_output",
+    "read_chromosome_file",
+    "read_chromosome_intervals",
+    "read_genome_file",
+    "record_visual",
+    "record_writer",
+    "render_alignment",
+    "reverse_complement",
+    "score_pair",
+    "tile_offsets",
+]
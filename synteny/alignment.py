@@ -0,0 +1,398 @@
+"""Ungapped sliding alignment of two sequences.
+
+Every offset of ``seq2`` against ``seq1`` is scored by the number of
+positions holding the same character.  Offsets run from ``-len(seq2)+1``
+to ``len(seq1)-1``; the first offset reaching the highest count wins.
+
+Two engines produce identical results:
+
+* ``"reference"`` - the original pure-Python loop, kept for differential
+  checks against the fast path.
+* ``"fft"`` - one-hot encodes each character and counts matches at every
+  offset with a single FFT cross-correlation (needs NumPy).
+
+``"auto"`` picks ``"fft"`` when NumPy is installed.
+
+``tile_offsets`` scores every pair of a block of rows and columns,
+reusing each sequence's transforms across the block.
+
+``best_strand_offset`` also scores the reverse complement of ``seq2``
+(strand ``"-"``) in the same pass: each sequence is encoded and
+transformed once, and the reverse strand only adds one inverse FFT.
+Forward wins ties.
+"""
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy is optional
+    np = None
+
+ENGINE_VERSION = "1"
+
+METHODS = ("auto", "fft", "reference")
+
+STRANDS = ("+", "-")
+
+# IUPAC complements in both cases; any other character is its own complement
+_COMPLEMENT_FROM = "ACGTUNRYKMSWBDHVacgtunrykmswbdhv"
+_COMPLEMENT_TO = "TGCAANYRMKSWVHDBtgcaanyrmkswvhdb"
+_COMPLEMENT = str.maketrans(_COMPLEMENT_FROM, _COMPLEMENT_TO)
+if np is not None:
+    _COMPLEMENT_CODES = np.arange(256, dtype=np.uint8)
+    _COMPLEMENT_CODES[list(_COMPLEMENT_FROM.encode('ascii'))] = list(_COMPLEMENT_TO.encode('ascii'))
+
+# Below this many cells (len1 * len2) a direct integer correlation beats the FFT.
+DIRECT_CELLS = 1 << 16
+
+
+def _resolve_method(method):
+    if method not in METHODS:
+        raise ValueError(f"Unknown alignment method: {method!r}")
+    if method == "auto":
+        return "fft" if np is not None else "reference"
+    if method == "fft" and np is None:
+        raise RuntimeError("The 'fft' alignment method requires NumPy")
+    return method
+
+
+def _codes(seq):
+    """Return the characters of seq as an integer array"""
+    if not isinstance(seq, str):
+        return seq.codes()  # packed.PackedView decodes straight from its store
+    try:
+        return np.frombuffer(seq.encode('ascii'), dtype=np.uint8)
+    except UnicodeEncodeError:
+        return np.frombuffer(seq.encode('utf-32-le'), dtype=np.uint32)
+
+
+def reverse_complement(seq):
+    """Reverse complement of a str or packed view, as a str"""
+    return str(seq).translate(_COMPLEMENT)[::-1]
+
+
+def _complement_codes(codes):
+    """Complement every character code (see reverse_complement)"""
+    if codes.dtype == np.uint8:
+        return _COMPLEMENT_CODES[codes]
+    narrow = np.minimum(codes, 255).astype(np.uint8)
+    return np.where(codes < 256, _COMPLEMENT_CODES[narrow], codes).astype(codes.dtype)
+
+
+def _fft_size(n):
+    """Smallest 5-smooth number >= n (fast sizes for pocketfft)"""
+    best = 1 << max(0, (n - 1).bit_length())
+    p5 = 1
+    while p5 < best:
+        p35 = p5
+        while p35 < best:
+            size = p35
+            while size < n:
+                size *= 2
+            best = min(best, size)
+            p35 *= 3
+        p5 *= 5
+    return best
+
+
+def align_offsets(seq1, seq2):
+    """Match count for every offset of seq2 against seq1.
+
+    Index ``k`` of the returned int64 array holds the count for offset
+    ``k - (len(seq2) - 1)``.  Requires NumPy.
+    """
+    if np is None:
+        raise RuntimeError("align_offsets requires NumPy")
+    len1, len2 = len(seq1), len(seq2)
+    if len1 == 0 or len2 == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    a = _codes(seq1)
+    b = _codes(seq2)
+    # Only characters present in both sequences can ever match
+    alphabet = np.intersect1d(np.unique(a), np.unique(b))
+    n_out = len1 + len2 - 1
+    if len(alphabet) == 0:
+        return np.zeros(n_out, dtype=np.int64)
+
+    b_rev = b[::-1]
+    if len1 * len2 <= DIRECT_CELLS:
+        counts = np.zeros(n_out, dtype=np.int64)
+        for code in alphabet:
+            counts += np.convolve((a == code).astype(np.int64),
+                                  (b_rev == code).astype(np.int64))
+        return counts
+
+    # Sum the per-character spectra so only one inverse transform is needed
+    size = _fft_size(n_out)
+    spectrum = None
+    for code in alphabet:
+        term = (np.fft.rfft((a == code).astype(np.float64), size)
+                * np.fft.rfft((b_rev == code).astype(np.float64), size))
+        spectrum = term if spectrum is None else spectrum + term
+    counts = np.fft.irfft(spectrum, size)[:n_out]
+    return np.rint(counts).astype(np.int64)
+
+
+def align_offsets_both(seq1, seq2):
+    """(forward, reverse) match counts for every offset, in one pass.
+
+    forward is align_offsets(seq1, seq2); reverse holds the same for the
+    reverse complement of seq2.  Requires NumPy.
+    """
+    if np is None:
+        raise RuntimeError("align_offsets_both requires NumPy")
+    len1, len2 = len(seq1), len(seq2)
+    if len1 == 0 or len2 == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    a = _codes(seq1)
+    b = _codes(seq2)
+    b_comp = _complement_codes(b)
+    n_out = len1 + len2 - 1
+    alphabet = np.unique(a)
+    forward_codes = np.intersect1d(alphabet, np.unique(b))
+    reverse_codes = np.intersect1d(alphabet, np.unique(b_comp))
+
+    if len1 * len2 <= DIRECT_CELLS:
+        # The reverse complement reversed again is the complement.  Both
+        # strands share one convolution: forward counts (at most len2) in
+        # the low digit, reverse counts in the high one.
+        b_rev = b[::-1]
+        base = len2 + 1
+        counts = np.zeros(n_out, dtype=np.int64)
+        for code in np.union1d(forward_codes, reverse_codes):
+            kernel = (b_rev == code).astype(np.int64) + (b_comp == code).astype(np.int64) * base
+            counts += np.convolve((a == code).astype(np.int64), kernel)
+        reverse, forward = np.divmod(counts, base)
+        return forward, reverse
+
+    # One transform per character of each sequence.  The forward strand is
+    # the circular cross-correlation (conjugate spectrum of seq2, negative
+    # offsets wrapped to the end); the reverse strand convolves seq1 with
+    # the complement of seq2, a sum of its per-character spectra.
+    size = _fft_size(n_out)
+    spectra_a = {code: np.fft.rfft((a == code).astype(np.float64), size)
+                 for code in np.union1d(forward_codes, reverse_codes).tolist()}
+    codes_b = np.unique(b)
+    complements = dict(zip(codes_b.tolist(), _complement_codes(codes_b).tolist()))
+    spectra_b = {code: np.fft.rfft((b == code).astype(np.float64), size)
+                 for code, complement in complements.items()
+                 if code in spectra_a or complement in spectra_a}
+
+    forward = np.zeros(size // 2 + 1, dtype=np.complex128)
+    for code in forward_codes.tolist():
+        forward += spectra_a[code] * np.conj(spectra_b[code])
+    reverse = np.zeros(size // 2 + 1, dtype=np.complex128)
+    for code, spectrum in spectra_b.items():
+        if complements[code] in spectra_a:
+            reverse += spectra_a[complements[code]] * spectrum
+    forward = np.fft.irfft(forward, size)
+    forward = np.concatenate((forward[size - len2 + 1:], forward[:len1]))
+    reverse = np.fft.irfft(reverse, size)[:n_out]
+    return np.rint(forward).astype(np.int64), np.rint(reverse).astype(np.int64)
+
+
+def tile_offsets(rows, cols, both_strands=False):
+    """Yield (r, c, (max_match, offset, strand)) for every rows[r] x cols[c] pair.
+
+    Results are those of best_offset (strand "+") or, with both_strands,
+    best_strand_offset.  All transforms of the tile share one size that
+    fits its longest row and column, so each sequence is encoded and
+    transformed once per tile instead of once per pair.  Requires NumPy.
+    """
+    if np is None:
+        raise RuntimeError("tile_offsets requires NumPy")
+    row_codes = [_codes(seq) for seq in rows]
+    col_codes = [_codes(seq) for seq in cols]
+    longest = max(map(len, row_codes), default=0) + max(map(len, col_codes), default=0) - 1
+    size = _fft_size(max(1, longest))
+
+    def spectra(codes):
+        return {code: np.fft.rfft((codes == code).astype(np.float64), size)
+                for code in np.unique(codes).tolist()}
+
+    row_spectra = [spectra(a) for a in row_codes]
+    col_spectra = [spectra(b) for b in col_codes]
+    complements = {}
+    if both_strands:
+        for spectra_b in col_spectra:
+            codes = np.array(list(spectra_b), dtype=np.uint32)
+            complements.update(zip(codes.tolist(), _complement_codes(codes).tolist()))
+
+    for r, spectra_a in enumerate(row_spectra):
+        len1 = len(row_codes[r])
+        for c, spectra_b in enumerate(col_spectra):
+            len2 = len(col_codes[c])
+            if len1 == 0 or len2 == 0:
+                yield r, c, (0, None, "+")
+                continue
+            # Circular cross-correlation, as the forward strand of align_offsets_both
+            forward = np.zeros(size // 2 + 1, dtype=np.complex128)
+            for code, spectrum in spectra_b.items():
+                if code in spectra_a:
+                    forward += spectra_a[code] * np.conj(spectrum)
+            counts = np.fft.irfft(forward, size)
+            counts = np.rint(np.concatenate((counts[size - len2 + 1:], counts[:len1])))
+            best = _best_of(counts.astype(np.int64), len2) + ("+",)
+            if both_strands:
+                reverse = np.zeros(size // 2 + 1, dtype=np.complex128)
+                for code, spectrum in spectra_b.items():
+                    if complements[code] in spectra_a:
+                        reverse += spectra_a[complements[code]] * spectrum
+                counts = np.rint(np.fft.irfft(reverse, size)[:len1 + len2 - 1])
+                reverse = _best_of(counts.astype(np.int64), len2)
+                if reverse[0] > best[0]:
+                    best = reverse + ("-",)
+            yield r, c, best
+
+
+def _best_offset_reference(seq1, seq2):
+    max_match = 0
+    best = None
+    for offset in range(-len(seq2)+1, len(seq1)):
+        match_count = 0
+        for i in range(len(seq2)):
+            pos_in_seq1 = i + offset
+            if 0 <= pos_in_seq1 < len(seq1) and seq1[pos_in_seq1] == seq2[i]:
+                match_count += 1
+        if match_count > max_match:
+            max_match = match_count
+            best = offset
+    return max_match, best
+
+
+def _best_of(counts, len2):
+    k = int(np.argmax(counts))  # first maximum, same tie-break as the loop
+    max_match = int(counts[k])
+    if max_match == 0:
+        return 0, None
+    return max_match, k - (len2 - 1)
+
+
+def best_offset(seq1, seq2, method="auto"):
+    """Return (max_match, offset) of the best ungapped placement.
+
+    offset is None when no offset produces a single match.
+    """
+    method = _resolve_method(method)
+    if len(seq1) == 0 or len(seq2) == 0:
+        return 0, None
+    if method == "reference":
+        return _best_offset_reference(str(seq1), str(seq2))
+
+    return _best_of(align_offsets(seq1, seq2), len(seq2))
+
+
+def best_strand_offset(seq1, seq2, method="auto"):
+    """Return (max_match, offset, strand) over both strands of seq2.
+
+    For strand "-" offset places the reverse complement of seq2.  The
+    forward strand wins ties; offset is None (strand "+") without a match.
+    """
+    method = _resolve_method(method)
+    if len(seq1) == 0 or len(seq2) == 0:
+        return 0, None, "+"
+    if method == "reference":
+        forward = _best_offset_reference(str(seq1), str(seq2))
+        reverse = _best_offset_reference(str(seq1), reverse_complement(seq2))
+    else:
+        counts = align_offsets_both(seq1, seq2)
+        forward, reverse = (_best_of(c, len(seq2)) for c in counts)
+    if reverse[0] > forward[0]:
+        return reverse + ("-",)
+    return forward + ("+",)
+
+
+def _alignment_line(seq1, seq2, offset):
+    """R/W/X track of seq2 placed at offset, and its match count"""
+    len1, len2 = len(seq1), len(seq2)
+    lo, hi = max(0, -offset), min(len2, len1 - offset)
+    if np is None:
+        seq1, seq2 = str(seq1), str(seq2)
+        line = ["X"] * len2
+        match_count = 0
+        for i in range(lo, hi):
+            if seq1[i + offset] == seq2[i]:
+                line[i] = "R"
+                match_count += 1
+            else:
+                line[i] = "W"
+        return "".join(line), match_count
+
+    line = np.full(len2, ord("X"), dtype=np.uint8)
+    match_count = 0
+    if hi > lo:
+        same = _codes(seq1)[lo + offset:hi + offset] == _codes(seq2)[lo:hi]
+        line[lo:hi] = np.where(same, ord("R"), ord("W"))
+        match_count = int(np.count_nonzero(same))
+    return line.tobytes().decode("ascii"), match_count
+
+
+def render_alignment(seq1, seq2, offset, strand="+"):
+    """Build the [top, mid, bottom, label] visual for one offset.
+
+    With strand "-" the bottom row is the reverse complement of seq2.
+    """
+    if strand == "-":
+        seq2 = reverse_complement(seq2)
+    alignment_line, match_count = _alignment_line(seq1, seq2, offset)
+    similarity = (match_count / len(seq2)) * 100
+    padding = " " * max(0, offset)
+    return [str(seq1), padding + alignment_line, padding + str(seq2),
+            f"Similarity: {similarity:.2f}%"]
+
+
+def _calculate_alignment_reference(seq1, seq2):
+    max_match = 0
+    best_alignment = []
+
+    for offset in range(-len(seq2)+1, len(seq1)):
+        match_count = 0
+        alignment_line = ""
+
+        for i in range(len(seq2)):
+            pos_in_seq1 = i + offset
+            if 0 <= pos_in_seq1 < len(seq1):
+                if seq1[pos_in_seq1] == seq2[i]:
+                    alignment_line += "R"
+                    match_count += 1
+                else:
+                    alignment_line += "W"
+            else:
+                alignment_line += "X"
+
+        similarity = (match_count / len(seq2)) * 100
+
+        visual_top = seq1
+        visual_mid = (" " * max(0, offset)) + alignment_line
+        visual_bottom = (" " * max(0, offset)) + seq2
+
+        if match_count > max_match:
+            max_match = match_count
+            best_alignment = [visual_top, visual_mid, visual_bottom, f"Similarity: {similarity:.2f}%"]
+
+    final_similarity = (max_match / len(seq2)) * 100
+    return final_similarity, best_alignment
+
+
+def calculate_alignment(seq1, seq2, method="auto", both_strands=False):
+    """Return (similarity %, alignment visual) for the best offset.
+
+    The visual is ``[]`` when no offset has any match.  With both_strands
+    the reverse complement of seq2 is scored too (see best_strand_offset).
+    """
+    method = _resolve_method(method)
+    if len(seq1) == 0 or len(seq2) == 0:
+        return 0.0, []
+    if both_strands:
+        max_match, offset, strand = best_strand_offset(seq1, seq2, method)
+        if offset is None:
+            return 0.0, []
+        return (max_match / len(seq2)) * 100, render_alignment(seq1, seq2, offset, strand)
+    if method == "reference":
+        return _calculate_alignment_reference(str(seq1), str(seq2))
+
+    max_match, offset = best_offset(seq1, seq2, method)
+    if offset is None:
+        return 0.0, []
+    return (max_match / len(seq2)) * 100, render_alignment(seq1, seq2, offset)
@@ -0,0 +1,485 @@
+"""Benchmarks for the compute core.
+
+    python -m synteny.bench scaling GENOME CHROMOSOMES [--max-workers N]
+    python -m synteny.bench packed [--length BP]
+    python -m synteny.bench dotplot [--length BP] [--size PIXELS] [--zooms N]
+    python -m synteny.bench sketch GENOME CHROMOSOMES [--k K ...] [--size S ...]
+                                  [--top N] [--threshold FRACTION]
+    python -m synteny.bench generate PREFIX [--length 10M] [--intervals 100] [--seed 0] ...
+    python -m synteny.bench suite [--case NAME ...] [-o RESULTS.json]
+                                  [--baseline BASELINE.json] [--tolerance 0.25]
+
+``suite`` generates seeded inputs (see ``synteny.synthetic``), times each
+pipeline stage and records its peak traced memory.  Save one run as the
+baseline on a reference machine; later runs given ``--baseline`` flag
+every stage that got slower or bigger than the tolerance allows and exit
+with status 1.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from . import engine
+from .alignment import METHODS, calculate_alignment
+from .fasta import fai_path, open_genome, record_spans
+from .parallel import compare_intervals
+
+# Suite inputs: genome length, interval count and longest interval per case
+SUITE_CASES = {
+    "small": {"length": 100_000, "intervals": 20, "max_length": 2_000},
+    "medium": {"length": 5_000_000, "intervals": 100, "max_length": 5_000},
+    "large": {"length": 100_000_000, "intervals": 200, "max_length": 10_000},
+}
+DEFAULT_CASES = ("small", "medium")
+
+# Pairs fed to the calculate_alignment and calculate_statistics stages
+STAGE_SAMPLE_PAIRS = 200
+
+# Stages faster than this are too noisy to flag on time
+MIN_FLAG_SECONDS = 0.01
+
+
+def measure_scaling(genome_seq, intervals, worker_counts, method="auto"):
+    """Time a full run for each worker count; returns one dict per count"""
+    results = []
+    baseline = None
+    for workers in worker_counts:
+        started = time.perf_counter()
+        pairs = sum(1 for _ in compare_intervals(genome_seq, intervals, method, workers))
+        elapsed = time.perf_counter() - started
+        if baseline is None:
+            baseline = elapsed
+        results.append({
+            "workers": workers,
+            "pairs": pairs,
+            "seconds": elapsed,
+            "pairs_per_second": pairs / elapsed if elapsed else float("inf"),
+            "speedup": baseline / elapsed if elapsed else float("inf"),
+        })
+    return results
+
+
+def measure_packed(length, n_fraction=0.01, seed=0):
+    """Compare resident size and decode time of str vs PackedSequence"""
+    from .packed import PackedSequence
+
+    rng = random.Random(seed)
+    bases = "".join(rng.choice("ACGT") for _ in range(min(length, 1 << 20)))
+    seq = (bases * (length // len(bases) + 1))[:length]
+    # Sprinkle N runs so the run tables are exercised
+    pieces, pos = [], 0
+    for start in sorted(rng.randrange(length) for _ in range(int(length * n_fraction / 100) + 1)):
+        if start < pos:
+            continue
+        pieces.append(seq[pos:start])
+        run = min(100, length - start)
+        pieces.append("N" * run)
+        pos = start + run
+    pieces.append(seq[pos:])
+    seq = "".join(pieces)
+
+    started = time.perf_counter()
+    store = PackedSequence.from_string(seq)
+    pack_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    if store[0:length] != seq:
+        raise AssertionError("packed round trip differs from the input")
+    decode_seconds = time.perf_counter() - started
+    return {
+        "length": length,
+        "str_bytes": sys.getsizeof(seq),
+        "packed_bytes": store.nbytes,
+        "ratio": sys.getsizeof(seq) / store.nbytes,
+        "pack_seconds": pack_seconds,
+        "decode_seconds": decode_seconds,
+    }
+
+
+def measure_dotplot(length, size=600, zooms=4, seed=0):
+    """Time the dot plot views of a length x length pair at size x size pixels.
+
+    seq2 is seq1 with its middle third inverted, so every view holds a
+    full diagonal and an anti-diagonal.  Returns one dict per view: the
+    whole pair, then each 2x zoom into the centre as the GUI does it.
+    """
+    import numpy as np
+
+    from .dotplot import dot_density, shade, zoom_region
+
+    codes = np.random.default_rng(seed).integers(0, 4, length)
+    seq1 = np.frombuffer(b"ACGT", dtype=np.uint8)[codes].tobytes().decode("ascii")
+    third = length // 3
+    inverted = seq1[third:2 * third][::-1].translate(str.maketrans("ACGT", "TGCA"))
+    seq2 = seq1[:third] + inverted + seq1[2 * third:]
+
+    views = []
+    region = (0, length, 0, length)
+    for _ in range(zooms + 1):
+        started = time.perf_counter()
+        plot = dot_density(seq1, seq2, size, size, region)
+        shade(plot)
+        views.append({
+            "region": region,
+            "seconds": time.perf_counter() - started,
+            "hits": int(plot.forward.sum() + plot.reverse.sum()),
+        })
+        region = zoom_region(region, (length, length), 0.5, 0.5, 2)
+    return views
+
+
+def measure_sketch(genome_seq, intervals, ks, sizes, top=None, threshold=None, method="auto"):
+    """Recall and cost of the MinHash prefilter for each (k, size), against
+    one exhaustive run.  Returns (exhaustive_seconds, rows)."""
+    from .sketch import Prefilter, recall_report
+
+    started = time.perf_counter()
+    exhaustive = list(compare_intervals(genome_seq, intervals, method))
+    exhaustive_seconds = time.perf_counter() - started
+
+    rows = []
+    for k in ks:
+        for size in sizes:
+            prefilter = Prefilter(k, size, top=top, threshold=threshold)
+            started = time.perf_counter()
+            records = compare_intervals(genome_seq, intervals, method, prefilter=prefilter)
+            sketch_seconds = time.perf_counter() - started
+            selected = [record["index"] for record in records]
+            total_seconds = time.perf_counter() - started
+            row = recall_report(exhaustive, selected)
+            row.update(k=k, size=size, sketch_seconds=sketch_seconds, seconds=total_seconds)
+            rows.append(row)
+    return exhaustive_seconds, rows
+
+
+def _suite_inputs(workdir, name, case, seed):
+    """Generate (once) and return the FASTA and CSV paths for a suite case"""
+    from .synthetic import generate
+
+    stem = os.path.join(workdir, f"{name}-{case['length']}-{case['intervals']}-{seed}")
+    fasta, csv = stem + ".fasta", stem + ".csv"
+    if not (os.path.exists(fasta) and os.path.exists(csv)):
+        generate(fasta, csv, case["length"], case["intervals"], seed,
+                 max_length=case["max_length"])
+    return fasta, csv
+
+
+def _measure(stage, repeat):
+    """Best wall time over repeat runs, and peak traced memory of one more"""
+    seconds = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        items = stage()
+        elapsed = time.perf_counter() - started
+        seconds = elapsed if seconds is None else min(seconds, elapsed)
+    tracemalloc.start()
+    try:
+        stage()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": seconds, "peak_bytes": peak, "items": items}
+
+
+def measure_stages(genome_file, chromo_file, repeat=3, method="auto"):
+    """Time and peak memory of each pipeline stage on one input pair.
+
+    items counts what a stage processed: bases read or seeded, intervals
+    parsed or pairs compared.
+    """
+    genome_seq = engine.read_genome_file(genome_file)
+    chromo_list = engine.read_chromosome_file(chromo_file, genome_seq)
+    sample = [(chromo_list[i][1], chromo_list[j][1])
+              for _, i, j in engine.numbered_pairs(len(chromo_list))][:STAGE_SAMPLE_PAIRS]
+
+    def read_genome():
+        return len(engine.read_genome_file(genome_file))
+
+    scratch = tempfile.mkdtemp(prefix="synteny-bench-")
+    genome_copy = os.path.join(scratch, os.path.basename(genome_file))
+    shutil.copyfile(genome_file, genome_copy)
+
+    def open_indexed():
+        try:
+            os.remove(fai_path(genome_copy))  # include building the index
+        except FileNotFoundError:
+            pass
+        genome = open_genome(genome_copy)
+        bases = len(genome[0:len(genome)])
+        genome.close()
+        return bases
+
+    def read_chromosomes():
+        return len(engine.read_chromosome_file(chromo_file, genome_seq))
+
+    def align():
+        for seq1, seq2 in sample:
+            calculate_alignment(seq1, seq2, method)
+        return len(sample)
+
+    def statistics():
+        for seq1, seq2 in sample:
+            engine.calculate_statistics(seq1, seq2)
+        return len(sample)
+
+    def composition_index():
+        from .composition import CompositionIndex
+        return CompositionIndex.from_genome(genome_seq).length
+
+    def synteny_blocks():
+        from .blocks import find_blocks
+        intervals = engine.read_chromosome_intervals(chromo_file, len(genome_seq))
+        for _ in find_blocks(genome_seq, intervals):
+            pass
+        return sum(end - start for _, start, end in intervals)
+
+    def all_pairs():
+        intervals = engine.read_chromosome_intervals(chromo_file, len(genome_seq))
+        return sum(1 for _ in compare_intervals(genome_seq, intervals, method))
+
+    stages = {
+        "read_genome_file": read_genome,
+        "open_genome": open_indexed,
+        "read_chromosome_file": read_chromosomes,
+        "calculate_alignment": align,
+        "calculate_statistics": statistics,
+        "composition_index": composition_index,
+        "synteny_blocks": synteny_blocks,
+        "all_pairs": all_pairs,
+    }
+    try:
+        return {name: _measure(stage, repeat) for name, stage in stages.items()}
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def run_suite(cases, workdir, repeat=3, seed=0, method="auto"):
+    """Measure every stage for each named SUITE_CASES entry"""
+    try:
+        import numpy
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = None
+    results = {
+        "schema": 1,
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": numpy_version,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "method": method,
+        "repeat": repeat,
+        "cases": {},
+    }
+    for name in cases:
+        case = SUITE_CASES[name]
+        fasta, csv = _suite_inputs(workdir, name, case, seed)
+        results["cases"][name] = {
+            "params": dict(case, seed=seed),
+            "stages": measure_stages(fasta, csv, repeat, method),
+        }
+    return results
+
+
+def compare_to_baseline(current, baseline, tolerance=0.25, memory_tolerance=0.25):
+    """One row per (case, stage, metric) present in both results.
+
+    A row is a regression when the metric grew by more than its tolerance
+    (a fraction of the baseline); times under MIN_FLAG_SECONDS are not
+    flagged.
+    """
+    rows = []
+    for case, result in current["cases"].items():
+        base_stages = baseline.get("cases", {}).get(case, {}).get("stages", {})
+        for stage, measured in result["stages"].items():
+            if stage not in base_stages:
+                continue
+            for metric, limit in (("seconds", tolerance), ("peak_bytes", memory_tolerance)):
+                before, after = base_stages[stage][metric], measured[metric]
+                ratio = after / before if before else float("inf") if after else 1.0
+                regression = ratio > 1 + limit
+                if metric == "seconds" and max(before, after) < MIN_FLAG_SECONDS:
+                    regression = False
+                rows.append({"case": case, "stage": stage, "metric": metric,
+                             "baseline": before, "current": after, "ratio": ratio,
+                             "regression": regression})
+    return rows
+
+
+def _scaling(args):
+    genome_seq = open_genome(args.genome)
+    intervals = engine.read_chromosome_intervals(
+        args.chromosomes, len(genome_seq), records=record_spans(genome_seq))
+    print("workers\tpairs\tseconds\tpairs/s\tspeedup")
+    for row in measure_scaling(genome_seq, intervals,
+                               range(1, args.max_workers + 1), args.method):
+        print(f"{row['workers']}\t{row['pairs']}\t{row['seconds']:.3f}\t"
+              f"{row['pairs_per_second']:.1f}\t{row['speedup']:.2f}x")
+
+
+def _packed(args):
+    result = measure_packed(args.length)
+    print(f"length        {result['length']:,} bp")
+    print(f"str           {result['str_bytes']:,} bytes")
+    print(f"packed        {result['packed_bytes']:,} bytes ({result['ratio']:.2f}x smaller)")
+    print(f"pack time     {result['pack_seconds']:.3f} s")
+    print(f"decode time   {result['decode_seconds']:.3f} s")
+
+
+def _dotplot(args):
+    print("region\tseconds\thits")
+    for view in measure_dotplot(args.length, args.size, args.zooms):
+        start1, end1, start2, end2 = view["region"]
+        print(f"{start1:,}-{end1:,} x {start2:,}-{end2:,}\t{view['seconds']:.3f}\t"
+              f"{view['hits']:,}")
+
+
+def _sketch(args):
+    genome_seq = open_genome(args.genome)
+    intervals = engine.read_chromosome_intervals(
+        args.chromosomes, len(genome_seq), records=record_spans(genome_seq))
+    exhaustive_seconds, rows = measure_sketch(genome_seq, intervals, args.k, args.size,
+                                              args.top, args.threshold, args.method)
+    print(f"exhaustive: {exhaustive_seconds:.3f} s")
+    print("k\tsize\taligned\tseconds\tspeedup\tbest\trecall@1\trecall@10\trecall@100")
+    for row in rows:
+        recall = row["recall"]
+        print(f"{row['k']}\t{row['size']}\t{row['candidates']}/{row['pairs']}\t"
+              f"{row['seconds']:.3f}\t{exhaustive_seconds / row['seconds']:.2f}x\t"
+              f"{'yes' if row['best_retained'] else 'no'}\t"
+              + "\t".join(f"{recall[k]:.2f}" if k in recall else "-" for k in (1, 10, 100)))
+
+
+def _generate(args):
+    from .synthetic import generate, parse_size
+
+    summary = generate(args.prefix + ".fasta", args.prefix + ".csv", parse_size(args.length),
+                       args.intervals, args.seed, records=args.records, gc=args.gc,
+                       repeat_fraction=args.repeat_fraction, families=args.families,
+                       family_length=args.family_length, divergence=args.divergence,
+                       n_fraction=args.n_fraction, lower_fraction=args.lower_fraction,
+                       homologous_fraction=args.homologous_fraction,
+                       min_length=args.min_length, max_length=args.max_length)
+    print(f"wrote {args.prefix}.fasta ({summary['length']:,} bp, "
+          f"{summary['repeat_copies']:,} repeat copies) and "
+          f"{args.prefix}.csv ({summary['intervals']:,} intervals)")
+
+
+def _format_metric(metric, value):
+    if metric == "seconds":
+        return f"{value:.3f} s"
+    return f"{value / (1024 * 1024):.1f} MiB"
+
+
+def _suite(args):
+    workdir = args.workdir or os.path.join(tempfile.gettempdir(), "synteny-bench")
+    os.makedirs(workdir, exist_ok=True)
+    results = run_suite(args.case, workdir, args.repeat, args.seed, args.method)
+
+    print("case\tstage\tseconds\tpeak\titems")
+    for case, result in results["cases"].items():
+        for stage, measured in result["stages"].items():
+            print(f"{case}\t{stage}\t{measured['seconds']:.3f}\t"
+                  f"{_format_metric('peak_bytes', measured['peak_bytes'])}\t{measured['items']:,}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    rows = compare_to_baseline(results, baseline, args.tolerance, args.memory_tolerance)
+    regressions = [row for row in rows if row["regression"]]
+    for row in rows:
+        flag = "REGRESSION" if row["regression"] else "ok"
+        print(f"{flag}\t{row['case']}\t{row['stage']}\t{row['metric']}\t"
+              f"{_format_metric(row['metric'], row['baseline'])} -> "
+              f"{_format_metric(row['metric'], row['current'])} ({row['ratio']:.2f}x)")
+    print(f"{len(regressions)} regression(s) against {args.baseline}")
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="synteny.bench", description="Compute core benchmarks.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    scaling = commands.add_parser("scaling", help="all-pairs throughput for 1..N worker processes")
+    scaling.add_argument("genome")
+    scaling.add_argument("chromosomes")
+    scaling.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    scaling.add_argument("--method", choices=METHODS, default="auto")
+    scaling.set_defaults(run=_scaling)
+
+    packed = commands.add_parser("packed", help="2-bit store size vs plain strings")
+    packed.add_argument("--length", type=int, default=10_000_000)
+    packed.set_defaults(run=_packed)
+
+    dotplot = commands.add_parser("dotplot", help="dot plot view times for a generated pair")
+    dotplot.add_argument("--length", type=int, default=10_000_000)
+    dotplot.add_argument("--size", type=int, default=600, help="view edge in pixels")
+    dotplot.add_argument("--zooms", type=int, default=4, help="2x zoom steps after the full view")
+    dotplot.set_defaults(run=_dotplot)
+
+    sketch = commands.add_parser("sketch", help="MinHash prefilter recall against an exhaustive run")
+    sketch.add_argument("genome")
+    sketch.add_argument("chromosomes")
+    sketch.add_argument("--k", type=int, nargs="+", default=[12, 16, 21])
+    sketch.add_argument("--size", type=int, nargs="+", default=[64, 256, 1024])
+    sketch.add_argument("--top", type=int, default=None)
+    sketch.add_argument("--threshold", type=float, default=None)
+    sketch.add_argument("--method", choices=METHODS, default="auto")
+    sketch.set_defaults(run=_sketch)
+
+    generate = commands.add_parser("generate", help="write a seeded synthetic PREFIX.fasta and PREFIX.csv")
+    generate.add_argument("prefix")
+    generate.add_argument("--length", default="1M", help="genome length; k/M/G suffixes allowed")
+    generate.add_argument("--intervals", type=int, default=100)
+    generate.add_argument("--seed", type=int, default=0)
+    generate.add_argument("--records", type=int, default=1, help="FASTA records to split the genome into")
+    generate.add_argument("--gc", type=float, default=0.5)
+    generate.add_argument("--repeat-fraction", type=float, default=0.1,
+                          help="share of the genome made of repeat copies")
+    generate.add_argument("--families", type=int, default=8)
+    generate.add_argument("--family-length", type=int, default=2000)
+    generate.add_argument("--divergence", type=float, default=0.05,
+                          help="substitution rate of each repeat copy")
+    generate.add_argument("--n-fraction", type=float, default=0.0)
+    generate.add_argument("--lower-fraction", type=float, default=0.0)
+    generate.add_argument("--homologous-fraction", type=float, default=0.5,
+                          help="share of intervals placed on repeat copies")
+    generate.add_argument("--min-length", type=int, default=500)
+    generate.add_argument("--max-length", type=int, default=5000)
+    generate.set_defaults(run=_generate)
+
+    suite = commands.add_parser("suite", help="per-stage time and memory on generated inputs")
+    suite.add_argument("--case", nargs="+", choices=sorted(SUITE_CASES), default=list(DEFAULT_CASES))
+    suite.add_argument("--workdir", help="where generated inputs are kept (default: a temp dir)")
+    suite.add_argument("--repeat", type=int, default=3)
+    suite.add_argument("--seed", type=int, default=0)
+    suite.add_argument("--method", choices=METHODS, default="auto")
+    suite.add_argument("-o", "--output", help="write the results as JSON")
+    suite.add_argument("--baseline", help="results JSON to check for regressions")
+    suite.add_argument("--tolerance", type=float, default=0.25,
+                       help="allowed slowdown as a fraction of the baseline (default: 0.25)")
+    suite.add_argument("--memory-tolerance", type=float, default=0.25,
+                       help="allowed peak memory growth as a fraction (default: 0.25)")
+    suite.set_defaults(run=_suite)
+
+    args = parser.parse_args(argv)
+    if args.command == "sketch" and args.top is None and args.threshold is None:
+        parser.error("sketch needs --top and/or --threshold")
+    return args.run(args) or 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
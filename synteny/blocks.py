@@ -0,0 +1,278 @@
+"""Synteny blocks from shared k-mer seeds.
+
+``calculate_alignment`` gives one similarity figure per pair and needs
+O(len1 + len2) memory and an FFT per pair, which rules out whole
+chromosomes.  Block detection works from seeds instead:
+
+1. ``SeedIndex`` reduces every interval once to its (w, k) minimizers -
+   the smallest canonical k-mer hash in each window of w consecutive
+   k-mers, about 2 / (w + 1) of all positions - and sorts them by hash.
+   Seeds occurring more than ``max_occurrences`` times (repeats) are
+   dropped, as in most seed-and-chain aligners.
+2. Every seed shared by two intervals is an anchor (pos1, pos2, strand);
+   the strand is "-" when the k-mer is read on opposite strands.
+3. ``chain_anchors`` links collinear anchors of a pair and strand with the
+   sparse dynamic programming of Abouelhoda and Ohlebusch: each anchor
+   scores k, each link costs ``gap_cost`` per base of distance on both
+   sequences.  With a linear gap cost the best predecessor is a 2-D
+   range maximum, answered by a Fenwick tree over pos2 ranks while
+   sweeping pos1, so chaining n anchors is O(n log n).  Chains are cut
+   wherever neighbouring anchors are more than ``max_gap`` apart, and
+   kept with at least ``min_anchors`` anchors and ``min_score``.
+
+Each block is a plain dict: pair ``index`` (as in pair records), ``id1``,
+``id2``, ``strand``, ``start1``/``end1`` and ``start2``/``end2`` in genome
+coordinates (forward strand for both), the number of ``anchors`` and the
+chain ``score``.  Time and memory grow with the genome, not with pairs of
+sequences, so whole-genome inputs are practical.  Requires NumPy.
+"""
+
+import numpy as np
+
+from .metrics import stage
+from .packed import PackedSequence
+from .parallel import rank_pair
+from .sketch import _encode, _mix64, _packed_kmers
+
+DEFAULT_K = 15  # odd, so no k-mer is its own reverse complement
+DEFAULT_WINDOW = 10
+MAX_OCCURRENCES = 64
+GAP_COST = 0.25
+MAX_GAP = 10_000
+MIN_ANCHORS = 3
+MIN_SCORE = 100  # about 100 bp of seed matches; drops lone short repeats
+
+BLOCK_COLUMNS = ["index", "id1", "id2", "strand", "start1", "end1", "start2", "end2",
+                 "anchors", "score"]
+
+# k-mers per step of minimizers(); bounds the temporaries for long chromosomes
+_CHUNK = 1 << 20
+_NONE = np.iinfo(np.uint64).max  # hash of k-mers that are not all A/C/G/T
+
+
+def minimizers(seq, k=DEFAULT_K, w=DEFAULT_WINDOW):
+    """(hashes, positions, reverse) of the (w, k) minimizers of seq.
+
+    reverse is True where the canonical k-mer is the reverse complement of
+    the sequence at that position.  Works on str and packed views.
+    """
+    parts = []
+    last = -1
+    length = len(seq)
+    span = _CHUNK + w - 1 + k - 1  # bases behind _CHUNK windows
+    for first in range(0, max(0, length - k - w + 2), _CHUNK):
+        if hasattr(seq, "window"):
+            window = seq.window(first, first + span)  # packed.PackedView, zero-copy
+        else:
+            window = seq[first:first + span]
+        forward, reverse, valid = _packed_kmers(_encode(window), k, canonical=True)
+        flipped = reverse < forward
+        hashes = np.where(valid, _mix64(np.minimum(forward, reverse)), _NONE)
+        if len(hashes) < w:
+            break
+        picks = np.lib.stride_tricks.sliding_window_view(hashes, w).argmin(axis=1)
+        picks += np.arange(len(picks))
+        # Window minima only move forward, so repeats are adjacent
+        picks = picks[np.concatenate(([True], picks[1:] != picks[:-1]))]
+        picks = picks[(hashes[picks] != _NONE) & (picks + first > last)]
+        if len(picks):
+            parts.append((hashes[picks], picks + first, flipped[picks]))
+            last = int(picks[-1]) + first
+    if not parts:
+        return np.zeros(0, np.uint64), np.zeros(0, np.int64), np.zeros(0, bool)
+    return tuple(np.concatenate(column) for column in zip(*parts))
+
+
+class SeedIndex:
+    """Minimizers of a set of sequences, sorted by hash"""
+
+    def __init__(self, k=DEFAULT_K, w=DEFAULT_WINDOW, max_occurrences=MAX_OCCURRENCES):
+        self.k = k
+        self.w = w
+        self.max_occurrences = max_occurrences
+        self.count = 0
+        self.seeds = 0
+        self.repeats = 0  # seeds dropped for occurring too often
+        self._parts = []
+
+    def add(self, seq):
+        """Index one sequence; returns its number"""
+        hashes, positions, reverse = minimizers(seq, self.k, self.w)
+        self._parts.append((hashes, np.full(len(hashes), self.count, dtype=np.int64),
+                            positions, reverse))
+        self.count += 1
+        return self.count - 1
+
+    def anchors(self):
+        """(seq1, seq2, pos1, pos2, reverse) arrays for every seed shared by seq1 < seq2"""
+        if not self._parts:
+            return _no_anchors()
+        hashes, seqs, positions, reverse = (np.concatenate(column) for column in zip(*self._parts))
+        self.seeds = len(hashes)
+        # Stable, so a hash's occurrences stay in (sequence, position) order
+        order = np.argsort(hashes, kind="stable")
+        hashes, seqs, positions, reverse = hashes[order], seqs[order], positions[order], reverse[order]
+
+        starts = np.flatnonzero(np.concatenate(([True], hashes[1:] != hashes[:-1])))
+        sizes = np.diff(np.append(starts, len(hashes)))
+        keep = np.repeat(sizes <= self.max_occurrences, sizes)
+        self.repeats = int(np.count_nonzero(~keep))
+        hashes, seqs, positions, reverse = hashes[keep], seqs[keep], positions[keep], reverse[keep]
+        largest = int(sizes[sizes <= self.max_occurrences].max(initial=0))
+
+        columns = ([], [], [], [], [])
+        for d in range(1, largest):
+            a = np.flatnonzero((hashes[:-d] == hashes[d:]) & (seqs[:-d] != seqs[d:]))
+            b = a + d
+            for column, values in zip(columns, (seqs[a], seqs[b], positions[a], positions[b],
+                                                reverse[a] != reverse[b])):
+                column.append(values)
+        if not columns[0]:
+            return _no_anchors()
+        return tuple(np.concatenate(column) for column in columns)
+
+
+def _no_anchors():
+    empty = np.zeros(0, np.int64)
+    return empty, empty, empty, empty, np.zeros(0, bool)
+
+
+def chain_anchors(pos1, pos2, k=DEFAULT_K, gap_cost=GAP_COST, max_gap=MAX_GAP,
+                  min_anchors=MIN_ANCHORS, min_score=MIN_SCORE):
+    """Collinear chains of anchors; [(anchor indices in order, score), ...].
+
+    Anchors chain when both positions increase.  For the reverse strand
+    pass -pos2, so that pos2 decreases along the chain.  Chains are
+    returned best first; each anchor is in at most one chain.
+    """
+    n = len(pos1)
+    if n == 0:
+        return []
+    pos1 = np.asarray(pos1, dtype=np.int64)
+    pos2 = np.asarray(pos2, dtype=np.int64)
+    order = np.lexsort((pos2, pos1))
+    ranks = np.searchsorted(np.unique(pos2), pos2) + 1  # 1-based for the Fenwick tree
+    size = int(ranks.max())
+    tree_value = [-np.inf] * (size + 1)
+    tree_anchor = [-1] * (size + 1)
+    score = [0.0] * n
+    previous = [-1] * n
+    # score[j] = k + max(0, score[i] - gap_cost * (pos1[j] - pos1[i] + pos2[j] - pos2[i]))
+    # and score[i] + gap_cost * (pos1[i] + pos2[i]) is what the tree maximises
+    keys = (gap_cost * (pos1 + pos2)).tolist()
+    p1, rank_list, order = pos1.tolist(), ranks.tolist(), order.tolist()
+
+    start = 0
+    while start < n:
+        end = start
+        while end < n and p1[order[end]] == p1[order[start]]:
+            end += 1
+        group = order[start:end]
+        # Query the whole group first: anchors must be strictly after in pos1 too
+        for j in group:
+            best, best_anchor = -np.inf, -1
+            r = rank_list[j] - 1
+            while r > 0:
+                if tree_value[r] > best:
+                    best, best_anchor = tree_value[r], tree_anchor[r]
+                r -= r & -r
+            linked = best - keys[j]
+            if best_anchor >= 0 and linked > 0:
+                score[j], previous[j] = k + linked, best_anchor
+            else:
+                score[j] = k
+        for j in group:
+            value = score[j] + keys[j]
+            r = rank_list[j]
+            while r <= size:
+                if value > tree_value[r]:
+                    tree_value[r], tree_anchor[r] = value, j
+                r += r & -r
+        start = end
+
+    chains = []
+    used = [False] * n
+    for last in np.argsort(-np.array(score), kind="stable").tolist():
+        if used[last]:
+            continue
+        chain = []
+        anchor = last
+        while anchor >= 0 and not used[anchor]:
+            used[anchor] = True
+            chain.append(anchor)
+            anchor = previous[anchor]
+        chain = np.array(chain[::-1], dtype=np.int64)
+        gaps = np.diff(pos1[chain]) + np.diff(pos2[chain])
+        cuts = np.flatnonzero((np.diff(pos1[chain]) > max_gap) | (np.diff(pos2[chain]) > max_gap)) + 1
+        for piece, piece_gaps in zip(np.split(chain, cuts), np.split(gaps, cuts)):
+            # piece_gaps ends with the gap to the next piece, which is not in the chain
+            piece_score = k * len(piece) - gap_cost * float(piece_gaps[:len(piece) - 1].sum())
+            if len(piece) >= min_anchors and piece_score >= min_score:
+                chains.append((piece, piece_score))
+    chains.sort(key=lambda chain: -chain[1])
+    return chains
+
+
+def find_blocks(genome_seq, intervals, k=DEFAULT_K, w=DEFAULT_WINDOW,
+                max_occurrences=MAX_OCCURRENCES, gap_cost=GAP_COST, max_gap=MAX_GAP,
+                min_anchors=MIN_ANCHORS, min_score=MIN_SCORE, cancel=None, metrics=None):
+    """Yield the synteny blocks of every interval pair, in pair order.
+
+    intervals are (chromo_id, start, end) over genome_seq, which is packed
+    once as in parallel.compare_intervals; blocks of one pair come sorted
+    by start1.  cancel and metrics work as in engine.compare_all.
+    """
+    with stage(metrics, "pack"):
+        packed = PackedSequence.from_genome(genome_seq)
+    index = SeedIndex(k, w, max_occurrences)
+    with stage(metrics, "seeds"):
+        for _, start, end in intervals:
+            if cancel is not None and cancel.is_set():
+                return
+            index.add(packed.view(start, end))
+        seq1, seq2, pos1, pos2, reverse = index.anchors()
+        if len(seq1) == 0:
+            return
+        count = len(intervals)
+        pairs = seq1 * count + seq2
+        order = np.lexsort((pos2, pos1, reverse, pairs))
+        pairs, pos1, pos2, reverse = pairs[order], pos1[order], pos2[order], reverse[order]
+        bounds = np.flatnonzero(np.concatenate(
+            ([True], (pairs[1:] != pairs[:-1]) | (reverse[1:] != reverse[:-1]), [True])))
+
+    pending = []
+    for first, last in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+        if cancel is not None and cancel.is_set():
+            return
+        i, j = divmod(int(pairs[first]), count)
+        strand = "-" if reverse[first] else "+"
+        p1, p2 = pos1[first:last], pos2[first:last]
+        with stage(metrics, "chain"):
+            chains = chain_anchors(p1, -p2 if strand == "-" else p2, k, gap_cost, max_gap,
+                                   min_anchors, min_score)
+        (id1, start1, _), (id2, start2, _) = intervals[i], intervals[j]
+        for chain, score in chains:
+            pending.append({
+                "index": rank_pair(i, j, count) + 1,
+                "id1": id1,
+                "id2": id2,
+                "strand": strand,
+                "start1": start1 + int(p1[chain].min()),
+                "end1": start1 + int(p1[chain].max()) + k,
+                "start2": start2 + int(p2[chain].min()),
+                "end2": start2 + int(p2[chain].max()) + k,
+                "anchors": len(chain),
+                "score": round(score, 2),
+            })
+        # Both strands of a pair are adjacent; emit once the pair is complete
+        if last == len(pairs) or pairs[last] != pairs[first]:
+            pending.sort(key=lambda block: (block["start1"], block["start2"]))
+            yield from pending
+            pending = []
+
+
+def write_blocks(f, blocks):
+    """Write blocks as TSV with a BLOCK_COLUMNS header"""
+    f.write("\t".join(BLOCK_COLUMNS) + "\n")
+    for block in blocks:
+        f.write("\t".join(str(block[column]) for column in BLOCK_COLUMNS) + "\n")
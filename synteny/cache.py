@@ -0,0 +1,127 @@
+"""Persistent, content-addressed cache of pair results.
+
+Each entry is keyed by a SHA-256 of the engine version and the digests of
+both sequences, so a result is reused whenever the same two sequences
+are compared again, whatever their IDs, files or coordinates.  Entries
+hold what ``engine.score_pair`` returns (similarity, best offset, match
+count, statistics).  The alignment visual is cheap to rebuild from the
+offset, so it is not stored.
+
+The store is a single SQLite file.  When it grows past ``max_bytes`` the
+least recently used entries are evicted; eviction runs when the cache is
+closed, so entries looked up during a run stay available until it ends.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+from .alignment import ENGINE_VERSION
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Approximate per-row overhead added to the payload size for eviction
+_ROW_OVERHEAD = 128
+
+
+def default_cache_path():
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "synteny", "results.sqlite")
+
+
+def sequence_digest(seq):
+    """SHA-256 hex digest of a sequence (str or packed view)"""
+    if isinstance(seq, str):
+        try:
+            data = seq.encode('ascii')
+        except UnicodeEncodeError:
+            data = seq.encode('utf-32-le')
+    else:
+        codes = seq.codes()
+        data = codes.tobytes() if codes.dtype.itemsize == 1 else codes.astype('<u4').tobytes()
+    return hashlib.sha256(data).hexdigest()
+
+
+def pair_key(digest1, digest2, both_strands=False, gapped=None):
+    # Forward ungapped keys are unchanged, so existing caches stay valid
+    options = ":both" if both_strands else ""
+    if gapped is not None:
+        options += ":" + gapped.key()
+    return hashlib.sha256(f"{ENGINE_VERSION}:{digest1}:{digest2}{options}".encode()).hexdigest()
+
+
+class ResultCache:
+    def __init__(self, path=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path or default_cache_path()
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        # The GUI reads from its worker thread; access is never concurrent
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " key TEXT PRIMARY KEY,"
+            " payload TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_used REAL NOT NULL)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS results_lru ON results (last_used)")
+        self._db.commit()
+
+    def contains(self, key):
+        """Whether key is stored; does not count as a hit or miss"""
+        row = self._db.execute("SELECT 1 FROM results WHERE key = ?", (key,)).fetchone()
+        return row is not None
+
+    def get(self, key):
+        """Stored result for key, or None; updates hit/miss counts and LRU"""
+        row = self._db.execute("SELECT payload FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._db.execute("UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0])
+
+    def put(self, key, result):
+        payload = json.dumps(result)
+        self._db.execute(
+            "INSERT OR REPLACE INTO results (key, payload, size, last_used) VALUES (?, ?, ?, ?)",
+            (key, payload, len(payload) + len(key) + _ROW_OVERHEAD, time.time()))
+
+    def size(self):
+        return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits max_bytes"""
+        excess = self.size() - self.max_bytes
+        if excess <= 0:
+            return 0
+        removed = 0
+        rows = self._db.execute("SELECT key, size FROM results ORDER BY last_used").fetchall()
+        for key, size in rows:
+            if excess <= 0:
+                break
+            self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+            excess -= size
+            removed += 1
+        self._db.commit()
+        return removed
+
+    def commit(self):
+        self._db.commit()
+
+    def close(self):
+        self.evict()
+        self._db.commit()
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,457 @@
+"""Command-line entry point: ``python -m synteny GENOME CHROMOSOMES``.
+
+Pair results are streamed as they are computed, one line or table row
+each, as TSV (with a header row), CSV, JSON Lines or a self-contained
+HTML page (see ``export``); the format follows the ``--output`` name
+unless ``-f`` is given, and ``--gzip`` (or a ``.gz`` name) compresses.
+The best pair is reported at the end: as a ``"summary"`` record in JSON
+Lines and HTML, on stderr for TSV and CSV.
+With ``--best-only`` only that pair is computed and written, using the
+branch-and-bound search in ``search``.  ``--both-strands`` also scores
+the reverse complement of each pair's second interval and adds a
+``strand`` field (a last TSV column).  ``--gapped local|global`` scores
+pairs with banded affine-gap dynamic programming (see ``gapped``) and
+adds a ``score`` column.  ``--blocks`` writes synteny blocks (chained
+shared k-mer seeds, see ``blocks``) instead of pair records; it needs no
+pairwise alignment, so it also works on whole chromosomes.
+``--against GENOME CHROMOSOMES`` (repeatable) compares the intervals of
+each assembly with those of every other one instead (see
+``crossgenome``) and writes one condensed similarity matrix per pair of
+assemblies.
+``--serve HOST:PORT`` hands the pairs out in units to workers started
+with ``python -m synteny.distributed HOST:PORT`` (see ``distributed``);
+the output is the same as a local run.
+``--metrics`` writes per-stage timings as JSON and ``--profile`` dumps
+cProfile/tracemalloc output next to the report.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+from . import engine
+from .alignment import METHODS
+from .cache import DEFAULT_MAX_BYTES, ResultCache, default_cache_path
+from .distributed import Coordinator, parse_address
+from .export import (FORMATS, best_summary, format_for_path, open_output, pair_columns,
+                     record_writer)
+from .fasta import open_genome, record_spans
+from .metrics import ProfileCapture, RunMetrics, format_summary
+from .parallel import compare_intervals
+from .search import best_pair_intervals
+
+try:
+    from .composition import load_composition
+except ImportError:  # pragma: no cover - NumPy is optional
+    load_composition = None
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="synteny",
+        description="Compare every pair of chromosome intervals in a genome.")
+    parser.add_argument("genome", help="FASTA file with the genome sequence")
+    parser.add_argument("chromosomes", help="CSV file with Chromosome_ID,Start,End[,Record] rows")
+    parser.add_argument("-f", "--format", choices=FORMATS,
+                        help="output format (default: from the --output name, else tsv)")
+    parser.add_argument("-o", "--output", default="-",
+                        help="output file (default: stdout)")
+    parser.add_argument("--gzip", action="store_true",
+                        help="gzip the output file (implied by a .gz --output name)")
+    parser.add_argument("--method", choices=METHODS, default="auto",
+                        help="alignment engine (default: auto)")
+    parser.add_argument("-j", "--workers", type=int, default=1,
+                        help="worker processes; 0 uses every core (default: 1)")
+    parser.add_argument("--cache", nargs="?", const=default_cache_path(), metavar="PATH",
+                        help="reuse pair results from a persistent cache "
+                             f"(default location: {default_cache_path()})")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                        metavar="MB", help="evict least recently used entries beyond this size")
+    parser.add_argument("--prefilter-top", type=int, metavar="N",
+                        help="align only the N pairs with the highest MinHash estimate")
+    parser.add_argument("--prefilter-min", type=float, metavar="FRACTION",
+                        help="align only pairs whose MinHash estimate is at least FRACTION")
+    parser.add_argument("--sketch-k", type=int, default=16, help="k-mer length for sketches (default: 16)")
+    parser.add_argument("--sketch-size", type=int, default=256, help="hashes kept per sketch (default: 256)")
+    parser.add_argument("--both-strands", action="store_true",
+                        help="also compare against the reverse complement of the second interval")
+    parser.add_argument("--gapped", choices=("local", "global"),
+                        help="score pairs with gapped alignment instead of ungapped sliding")
+    parser.add_argument("--band", type=_band, default=64, metavar="N",
+                        help="diagonals either side of the gapped band, or 'none' (default: 64)")
+    parser.add_argument("--match", type=int, default=2, help="gapped match score (default: 2)")
+    parser.add_argument("--mismatch", type=int, default=-3,
+                        help="gapped mismatch score (default: -3)")
+    parser.add_argument("--gap-open", type=int, default=5,
+                        help="gapped gap opening penalty (default: 5)")
+    parser.add_argument("--gap-extend", type=int, default=2,
+                        help="gapped penalty per gap base (default: 2)")
+    parser.add_argument("--blocks", action="store_true",
+                        help="write synteny blocks from chained k-mer seeds instead of pair results")
+    parser.add_argument("--seed-k", type=int, default=15,
+                        help="k-mer length of block seeds (default: 15)")
+    parser.add_argument("--seed-window", type=int, default=10,
+                        help="k-mers per minimizer window of block seeds (default: 10)")
+    parser.add_argument("--max-gap", type=int, default=10_000,
+                        help="largest gap inside a synteny block, in bp (default: 10000)")
+    parser.add_argument("--against", nargs=2, action="append", metavar=("GENOME", "CHROMOSOMES"),
+                        help="compare against the chromosomes of another assembly and write "
+                             "similarity matrices (repeatable)")
+    parser.add_argument("--tile", type=int, default=16,
+                        help="rows and columns per scheduling tile with --against (default: 16)")
+    parser.add_argument("--best-only", action="store_true",
+                        help="find only the best pair, pruning pairs that cannot beat it")
+    parser.add_argument("--serve", metavar="HOST:PORT",
+                        help="hand pairs out to 'python -m synteny.distributed' workers "
+                             "connecting here (port 0 picks a free one)")
+    parser.add_argument("--unit-size", type=int, default=64, metavar="N",
+                        help="pairs per work unit with --serve (default: 64)")
+    parser.add_argument("--lease", type=float, default=600, metavar="SECONDS",
+                        help="seconds before an unfinished unit is given to another worker "
+                             "with --serve (default: 600)")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="write a JSON run summary with per-stage timings ('-' for stderr)")
+    parser.add_argument("--profile", action="store_true",
+                        help="capture cProfile and tracemalloc output next to the report")
+    return parser
+
+
+def _band(text):
+    if text.lower() == "none":
+        return None
+    band = int(text)
+    if band < 0:
+        raise argparse.ArgumentTypeError("band must be >= 0")
+    return band
+
+
+def _gapped_model(args):
+    """gapped.GappedModel from the --gapped options, or None"""
+    if args.gapped is None:
+        return None
+    from .gapped import GappedModel, Scoring
+    return GappedModel(args.gapped, args.band,
+                       Scoring(args.match, args.mismatch, args.gap_open, args.gap_extend))
+
+
+def run(args, out, err, metrics=None):
+    def warn(message):
+        print(f"warning: {message}", file=err)
+
+    metrics = metrics or RunMetrics()
+    if args.against:
+        return _run_against(args, out, err, metrics, warn)
+    with metrics.stage("read_genome"):
+        genome_seq = open_genome(args.genome, warn=warn)
+    with metrics.stage("read_intervals"):
+        intervals = engine.read_chromosome_intervals(
+            args.chromosomes, len(genome_seq), warn=warn, records=record_spans(genome_seq))
+    composition = None
+    if load_composition is not None:
+        with metrics.stage("composition"):
+            composition = load_composition(genome_seq)
+    gapped = _gapped_model(args)
+
+    if args.blocks:
+        return _run_blocks(args, out, err, genome_seq, intervals, metrics, composition)
+    writer = record_writer(args.format, out,
+                           pair_columns(args.both_strands, args.gapped is not None))
+
+    if args.best_only:
+        return _run_best_only(args, out, writer, err, genome_seq, intervals, metrics,
+                              composition, gapped)
+
+    prefilter = None
+    if args.prefilter_top is not None or args.prefilter_min is not None:
+        from .sketch import Prefilter
+        prefilter = Prefilter(args.sketch_k, args.sketch_size, top=args.prefilter_top,
+                              threshold=args.prefilter_min, both_strands=args.both_strands)
+
+    cache = ResultCache(args.cache, args.cache_size * 1024 * 1024) if args.cache else None
+    coordinator = None
+    if args.serve:
+        coordinator = _serve(args, err, genome_seq, intervals, gapped)
+    try:
+        if coordinator is not None:
+            best, count = _write_served(args, out, writer, coordinator, metrics)
+        else:
+            best, count = _write_records(args, out, writer, genome_seq, intervals, cache,
+                                         prefilter, metrics, composition, gapped)
+    finally:
+        if cache is not None:
+            cache.close()
+
+    with metrics.stage("genome_gc"):
+        gc = _genome_gc(genome_seq, composition)
+    summary = {
+        "genome_length": len(genome_seq),
+        "genome_gc_content": gc,
+        "chromosomes": len(intervals),
+        "comparisons": count,
+        "best": None,
+    }
+    if cache is not None:
+        summary["cache"] = {"hits": cache.hits, "misses": cache.misses}
+    if coordinator is not None:
+        summary["distributed"] = {"workers": coordinator.workers, "retries": coordinator.retries}
+    if prefilter is not None:
+        summary["candidates"] = prefilter.selected
+    if best.record is not None:
+        summary["best"] = best_summary(best.record)
+
+    if not writer.finish(summary):
+        if best.record is not None:
+            print(_best_line(best.record), file=err)
+        if cache is not None:
+            print(f"cache: {cache.hits} hits, {cache.misses} misses", file=err)
+        if coordinator is not None:
+            print(f"distributed: {coordinator.workers} workers, "
+                  f"{coordinator.retries} units retried", file=err)
+        if prefilter is not None:
+            print(f"prefilter: {prefilter.selected} candidate pairs aligned", file=err)
+    out.flush()
+    metrics.pairs = count
+    return 0
+
+
+def _best_line(record):
+    strand = f", strand {record['strand']}" if "strand" in record else ""
+    return f"best: {record['id1']} vs {record['id2']} ({record['similarity']:.2f}%{strand})"
+
+
+def _write_record(args, out, writer, record, metrics):
+    with metrics.stage("write"):
+        writer.write(record)
+        # Flushing every record would defeat gzip's compression
+        if not args.gzip:
+            out.flush()
+
+
+def _genome_gc(genome_seq, composition):
+    if composition is not None:
+        return composition.gc_content()
+    return engine.gc_content(genome_seq)
+
+
+def _run_best_only(args, out, writer, err, genome_seq, intervals, metrics, composition,
+                   gapped):
+    with metrics.stage("search"):
+        record, stats = best_pair_intervals(genome_seq, intervals, args.method,
+                                            both_strands=args.both_strands, gapped=gapped)
+    if record is not None:
+        _write_record(args, out, writer, record, metrics)
+    metrics.pairs = stats["pairs"]
+
+    summary = {
+        "genome_length": len(genome_seq),
+        "genome_gc_content": _genome_gc(genome_seq, composition),
+        "chromosomes": len(intervals),
+        "comparisons": stats["aligned"],
+        "pruned": stats["pruned"],
+        "best": best_summary(record) if record is not None else None,
+    }
+    if not writer.finish(summary):
+        if record is not None:
+            print(_best_line(record), file=err)
+        print(f"search: aligned {stats['aligned']} of {stats['pairs']} pairs "
+              f"({stats['pruned']} pruned)", file=err)
+    out.flush()
+    return 0
+
+
+def _run_blocks(args, out, err, genome_seq, intervals, metrics, composition):
+    from .blocks import BLOCK_COLUMNS, find_blocks
+    writer = record_writer(args.format, out, BLOCK_COLUMNS, kind="block")
+    count = 0
+    pairs = set()
+    for block in find_blocks(genome_seq, intervals, args.seed_k, args.seed_window,
+                             max_gap=args.max_gap, metrics=metrics):
+        count += 1
+        pairs.add(block["index"])
+        with metrics.stage("write"):
+            writer.write(block)
+    metrics.pairs = len(intervals) * (len(intervals) - 1) // 2
+
+    summary = {
+        "genome_length": len(genome_seq),
+        "genome_gc_content": _genome_gc(genome_seq, composition),
+        "chromosomes": len(intervals),
+        "blocks": count,
+        "pairs_with_blocks": len(pairs),
+    }
+    if not writer.finish(summary):
+        print(f"blocks: {count} synteny blocks in {len(pairs)} chromosome pairs", file=err)
+    out.flush()
+    return 0
+
+
+def _run_against(args, out, err, metrics, warn):
+    from .crossgenome import (collect_matrices, compare_assemblies, open_assembly,
+                              unique_names, write_matrix)
+    assemblies = []
+    with metrics.stage("read_genome"):
+        for genome_file, chromo_file in [(args.genome, args.chromosomes)] + args.against:
+            assemblies.append(open_assembly(genome_file, chromo_file, warn=warn))
+    assemblies = unique_names(assemblies)
+    records = compare_assemblies(assemblies, args.method, args.both_strands, _gapped_model(args),
+                                 args.tile, metrics=metrics)
+    matrices = collect_matrices(assemblies, records)
+    metrics.pairs = sum(matrix.filled for matrix in matrices)
+
+    best = None
+    for matrix in matrices:
+        if matrix.best is not None and (best is None
+                                        or matrix.best["similarity"] > best["similarity"]):
+            best = matrix.best
+    with metrics.stage("write"):
+        if args.format == "jsonl":
+            for matrix in matrices:
+                out.write(json.dumps(dict(type="matrix", **matrix.to_dict())) + "\n")
+            summary = {
+                "type": "summary",
+                "assemblies": [{"name": assembly.name, "genome_length": len(assembly.genome),
+                                "chromosomes": len(assembly.intervals)}
+                               for assembly in assemblies],
+                "comparisons": metrics.pairs,
+                "best": None,
+            }
+            if best is not None:
+                summary["best"] = best_summary(best)
+            out.write(json.dumps(summary) + "\n")
+        else:
+            for k, matrix in enumerate(matrices):
+                if k:
+                    out.write("\n")
+                write_matrix(out, matrix)
+            if best is not None:
+                print(f"{_best_line(best)} [{best['assembly1']} vs {best['assembly2']}]", file=err)
+    out.flush()
+    return 0
+
+
+def _write_records(args, out, writer, genome_seq, intervals, cache, prefilter, metrics,
+                   composition, gapped):
+    best = engine.BestPair()
+    count = 0
+    for record in compare_intervals(genome_seq, intervals, args.method, args.workers or None,
+                                    cache=cache, prefilter=prefilter, metrics=metrics,
+                                    composition=composition, both_strands=args.both_strands,
+                                    gapped=gapped):
+        best.update(record)
+        count += 1
+        _write_record(args, out, writer, record, metrics)
+    return best, count
+
+
+def _serve(args, err, genome_seq, intervals, gapped):
+    def log(message):
+        print(f"serve: {message}", file=err)
+        err.flush()
+
+    coordinator = Coordinator(os.path.abspath(args.genome), len(genome_seq), intervals,
+                              args.method, args.both_strands, gapped, parse_address(args.serve),
+                              args.unit_size, args.lease, log=log)
+    host, port = coordinator.address
+    log(f"listening on {host}:{port} ({len(coordinator.units)} units)")
+    return coordinator
+
+
+def _write_served(args, out, writer, coordinator, metrics):
+    best = engine.BestPair()
+    count = 0
+    for record in metrics.timed("workers", coordinator.records(), aligned=True):
+        best.update(record)
+        count += 1
+        _write_record(args, out, writer, record, metrics)
+    return best, count
+
+
+def _report_metrics(args, metrics, err):
+    metrics.finish()
+    summary = metrics.summary()
+    if args.metrics == "-":
+        print(f"metrics: {format_summary(summary)}", file=err)
+        json.dump(summary, err, indent=2)
+        err.write("\n")
+    elif args.metrics:
+        with open(args.metrics, "w") as f:
+            json.dump(summary, f, indent=2)
+            f.write("\n")
+
+
+def _profile_base(args):
+    """Profiles go next to the report, or to ./synteny-run.* for stdout"""
+    if args.output == "-":
+        return "synteny-run"
+    return os.path.splitext(args.output)[0]
+
+
+def _reject(parser, mode, options):
+    """Exit with a usage error if any (option, used) pair is used with mode"""
+    for option, used in options:
+        if used:
+            parser.error(f"{mode} cannot be combined with {option}")
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        _gapped_model(args)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.format is None:
+        args.format = format_for_path(args.output)
+    args.gzip = args.gzip or args.output.lower().endswith(".gz")
+    if args.gzip and args.output == "-":
+        parser.error("--gzip needs an --output file")
+    if args.blocks and args.best_only:
+        parser.error("--blocks and --best-only cannot be combined")
+    # Options only the plain all-pairs run reads
+    pairwise = (("--cache", args.cache),
+                ("--prefilter-top/--prefilter-min",
+                 args.prefilter_top is not None or args.prefilter_min is not None),
+                ("-j", args.workers != 1))
+    if args.against:
+        _reject(parser, "--against", (("--blocks", args.blocks),
+                                      ("--best-only", args.best_only)) + pairwise)
+        if args.tile < 1:
+            parser.error("--tile must be at least 1")
+        if args.format not in ("tsv", "jsonl"):
+            parser.error("--against writes tsv or jsonl")
+    if args.blocks:
+        _reject(parser, "--blocks", (("--gapped", args.gapped),) + pairwise)
+    if args.best_only:
+        _reject(parser, "--best-only", pairwise)
+    if args.serve:
+        _reject(parser, "--serve", (("--blocks", args.blocks), ("--best-only", args.best_only),
+                                    ("--against", args.against)) + pairwise)
+        try:
+            parse_address(args.serve)
+        except ValueError as e:
+            parser.error(str(e))
+        if args.unit_size < 1:
+            parser.error("--unit-size must be at least 1")
+    metrics = RunMetrics()
+    profile = ProfileCapture() if args.profile else None
+    try:
+        if profile is not None:
+            profile.start()
+        try:
+            if args.output == "-":
+                status = run(args, sys.stdout, sys.stderr, metrics)
+            else:
+                with open_output(args.output, args.gzip) as out:
+                    status = run(args, out, sys.stderr, metrics)
+        finally:
+            if profile is not None:
+                profile.stop()
+        _report_metrics(args, metrics, sys.stderr)
+        if profile is not None:
+            paths = profile.dump(_profile_base(args))
+            print(f"profile: {', '.join(paths)}", file=sys.stderr)
+        return status
+    except (OSError, RuntimeError) as e:  # RuntimeError: a --serve unit failed every attempt
+        print(f"synteny: {e}", file=sys.stderr)
+        return 1
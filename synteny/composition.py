@@ -0,0 +1,203 @@
+"""Prefix-sum composition index over a genome.
+
+``CompositionIndex`` stores cumulative base counts at every ``block``
+boundary (4 kbp by default), so any ``[start, end)`` interval is answered
+from two table rows plus a scan of at most one block at each edge -
+constant work whatever the interval length.  Columns:
+
+* ``A``, ``C``, ``G``, ``T``, ``N`` - case-insensitive counts
+* ``G_upper``, ``C_upper`` - upper-case G and C only, the numerator of
+  ``engine.gc_content``; every GC figure here (``gc_content``,
+  ``summary``, the profiles) uses that definition, so the composition
+  section agrees with the pair statistics
+
+Anything else (IUPAC codes, ...) is the length minus the column sums.
+For a 3 Gbp genome the table is about 20 MB.  It is saved next to an
+indexed FASTA as ``<fasta>.cmp.npz`` and reused while newer than the
+FASTA, like the ``.fai``.  Requires NumPy.
+"""
+
+import functools
+import os
+
+import numpy as np
+
+DEFAULT_BLOCK = 4096
+COLUMNS = ("A", "C", "G", "T", "N", "G_upper", "C_upper")
+
+# Interval edges whose prefix counts are remembered; every chromosome edge
+# is looked up again for each pair it is in
+PREFIX_CACHE = 4096
+
+# Points per chromosome in a report GC profile (windows overlap by half)
+PROFILE_POINTS = 24
+
+# Each byte falls in one class; _CLASS_COLUMNS sums classes into COLUMNS
+_CLASSES = ("A", "C", "c", "G", "g", "T", "N", "other")
+_CLASS = np.full(256, _CLASSES.index("other"), dtype=np.uint8)
+for _name, _chars in (("A", b"Aa"), ("C", b"C"), ("c", b"c"), ("G", b"G"), ("g", b"g"),
+                      ("T", b"Tt"), ("N", b"Nn")):
+    _CLASS[list(_chars)] = _CLASSES.index(_name)
+_CLASS_COLUMNS = np.zeros((len(_CLASSES), len(COLUMNS)), dtype=np.int64)
+for _names, _column in (("A", "A"), ("Cc", "C"), ("Gg", "G"), ("T", "T"), ("N", "N"),
+                        ("G", "G_upper"), ("C", "C_upper")):
+    for _name in _names:
+        _CLASS_COLUMNS[_CLASSES.index(_name), COLUMNS.index(_column)] = 1
+
+_COUNT_COLUMN = {"G": COLUMNS.index("G_upper"), "C": COLUMNS.index("C_upper")}
+
+
+def composition_path(fasta_path):
+    return fasta_path + ".cmp.npz"
+
+
+def _classes(text):
+    """Class of every character of a str, as a uint8 array"""
+    try:
+        raw = np.frombuffer(text.encode('ascii'), dtype=np.uint8)
+    except UnicodeEncodeError:
+        raw = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+        raw = np.where(raw < 256, raw, 0).astype(np.uint8)  # byte 0 is "other"
+    return _CLASS[raw]
+
+
+def _column_counts(text):
+    """COLUMNS counts of a str"""
+    return np.bincount(_classes(text), minlength=len(_CLASSES)) @ _CLASS_COLUMNS
+
+
+class CompositionIndex:
+    def __init__(self, cumulative, length, block, source=None):
+        self.cumulative = cumulative
+        self.length = length
+        self.block = block
+        self.source = source  # sliceable genome used for the partial blocks
+        self._prefix = functools.lru_cache(maxsize=PREFIX_CACHE)(self._prefix_counts)
+
+    @classmethod
+    def from_genome(cls, genome, block=DEFAULT_BLOCK, chunk=1 << 22):
+        """Build from a str or any sliceable genome (IndexedFasta, PackedSequence)"""
+        length = len(genome)
+        chunk = max(block, chunk // block * block)
+        dtype = np.uint32 if length < 1 << 32 else np.uint64
+        blocks = length // block
+        cumulative = np.zeros((blocks + 1, len(COLUMNS)), dtype=dtype)
+        total = np.zeros(len(COLUMNS), dtype=np.uint64)
+        row = 1
+        for pos in range(0, blocks * block, chunk):
+            classes = _classes(genome[pos:min(pos + chunk, blocks * block)]).reshape(-1, block)
+            per_class = np.stack([np.count_nonzero(classes == k, axis=1)
+                                  for k in range(len(_CLASSES))], axis=1)
+            per_block = (per_class @ _CLASS_COLUMNS).astype(np.uint64)
+            running = np.cumsum(per_block, axis=0) + total
+            cumulative[row:row + len(running)] = running
+            total = running[-1]
+            row += len(running)
+        return cls(cumulative, length, block, genome)
+
+    @classmethod
+    def load(cls, path, source=None):
+        with np.load(path) as data:
+            return cls(data["cumulative"], int(data["length"]), int(data["block"]), source)
+
+    def save(self, path):
+        # Write through a file object so numpy does not append another .npz
+        with open(path, "wb") as f:
+            np.savez(f, cumulative=self.cumulative, length=self.length, block=self.block)
+
+    @property
+    def nbytes(self):
+        return self.cumulative.nbytes
+
+    def _prefix_counts(self, pos):
+        """Column counts over [0, pos); use the memoized _prefix"""
+        block, rest = divmod(pos, self.block)
+        counts = self.cumulative[block].astype(np.int64)
+        if rest:
+            start = block * self.block
+            counts += _column_counts(self.source[start:pos])
+        return counts
+
+    def counts(self, start, end):
+        """{column: count} over [start, end), clipped like a slice"""
+        start, end, _ = slice(start, end).indices(self.length)
+        if start >= end:
+            return dict.fromkeys(COLUMNS, 0)
+        values = self._prefix(end) - self._prefix(start)
+        return dict(zip(COLUMNS, values.tolist()))
+
+    def count(self, sub, start, end):
+        """Same as str.count(sub) over [start, end) for "G" or "C" """
+        column = _COUNT_COLUMN[sub]
+        start, end, _ = slice(start, end).indices(self.length)
+        if start >= end:
+            return 0
+        return int(self._prefix(end)[column] - self._prefix(start)[column])
+
+    def gc_content(self, start=0, end=None):
+        """engine.gc_content of genome[start:end]: upper-case G+C over length"""
+        start, end, _ = slice(start, end).indices(self.length)
+        if start >= end:
+            return None
+        counts = self.counts(start, end)
+        return (counts["G_upper"] + counts["C_upper"]) / (end - start)
+
+    def summary(self, start, end):
+        """Base counts, gc_content and N fraction of an interval"""
+        start, end, _ = slice(start, end).indices(self.length)
+        length = max(0, end - start)
+        counts = self.counts(start, end)
+        return {
+            "length": length,
+            "counts": {base: counts[base] for base in "ACGTN"},
+            "gc": self.gc_content(start, end),
+            "n_fraction": counts["N"] / length if length else None,
+        }
+
+    def gc_profile(self, start, end, window, step=None):
+        """[(window start, gc_content or None), ...] across [start, end)"""
+        start, end, _ = slice(start, end).indices(self.length)
+        step = step or window
+        profile = []
+        pos = start
+        while pos < end:
+            stop = min(end, pos + window)
+            profile.append((pos, self.summary(pos, stop)["gc"]))
+            if stop == end:
+                break
+            pos += step
+        return profile
+
+    def report_profile(self, start, end, points=PROFILE_POINTS):
+        """gc_profile with windows sized for about points overlapping steps"""
+        length = max(0, end - start)
+        step = max(1, length // points)
+        return self.gc_profile(start, end, 2 * step, step)
+
+
+def load_composition(genome, block=DEFAULT_BLOCK, rebuild=False):
+    """Index for genome, reusing or writing <fasta>.cmp.npz for an IndexedFasta"""
+    fasta = getattr(genome, "path", None)
+    if fasta is None:
+        return CompositionIndex.from_genome(genome, block)
+    path = composition_path(fasta)
+    if (not rebuild and os.path.exists(path)
+            and os.path.getmtime(path) >= os.path.getmtime(fasta)):
+        index = CompositionIndex.load(path, genome)
+        if index.length == len(genome) and index.block == block:
+            return index
+    index = CompositionIndex.from_genome(genome, block)
+    try:
+        index.save(path)
+    except OSError:
+        pass  # read-only location: keep the index in memory only
+    return index
+
+
+def chromosome_profiles(index, intervals, points=PROFILE_POINTS):
+    """Composition summary and GC profile of each (chromo_id, start, end)"""
+    profiles = []
+    for chromo_id, start, end in intervals:
+        profile = [gc for _, gc in index.report_profile(start, end, points)]
+        profiles.append(dict(id=chromo_id, **index.summary(start, end), profile=profile))
+    return profiles
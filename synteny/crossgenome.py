@@ -0,0 +1,246 @@
+"""Chromosome-versus-chromosome comparison across assemblies.
+
+An ``Assembly`` is one genome file with its chromosome intervals.  For
+two assemblies every interval of the first (rows) is compared with every
+interval of the second (columns); with more, every pair of assemblies is
+compared the same way.  Records are the usual pair records plus
+``assembly1``/``assembly2`` and the ``row``/``col`` of the cell.
+
+Pairs are scheduled in tiles of up to ``tile`` rows by ``tile`` columns.
+Intervals are sorted by length first, so a tile holds sequences of
+similar size, and ``alignment.tile_offsets`` transforms each of them once
+per tile and reuses the spectra for all its pairs.  A tile is shrunk when
+its transforms would exceed ``TILE_BYTES``.  Without NumPy, and for
+gapped models, pairs are scored one by one in the same order.
+
+Results are collected into ``SimilarityMatrix`` objects - one condensed
+rows x columns table per assembly pair - rather than a flat pair log.
+"""
+
+import os
+from collections import namedtuple
+
+from . import engine
+from .alignment import _resolve_method, tile_offsets
+from .fasta import open_genome, record_spans
+from .metrics import stage
+
+try:
+    from .packed import PackedSequence
+except ImportError:  # pragma: no cover - NumPy is optional
+    PackedSequence = None
+
+try:
+    from .composition import load_composition
+except ImportError:  # pragma: no cover - NumPy is optional
+    load_composition = None
+
+Assembly = namedtuple("Assembly", "name genome intervals")
+
+# Rows and columns per tile
+DEFAULT_TILE = 16
+
+# Budget for the spectra of one tile; about 40 bytes per base of FFT size
+# and sequence (one complex128 half-spectrum per character)
+TILE_BYTES = 256 * 1024 * 1024
+_SPECTRUM_BYTES = 40
+
+
+def open_assembly(genome_file, chromo_file, name=None, warn=None):
+    """Load an Assembly named after its genome file unless name is given"""
+    genome = open_genome(genome_file, warn=warn)
+    intervals = engine.read_chromosome_intervals(chromo_file, len(genome), warn=warn,
+                                                 records=record_spans(genome))
+    if name is None:
+        name = os.path.splitext(os.path.basename(genome_file))[0]
+    return Assembly(name, genome, intervals)
+
+
+def unique_names(assemblies):
+    """Assemblies renamed name, name.2, ... where their names collide"""
+    seen = {}
+    renamed = []
+    for assembly in assemblies:
+        count = seen[assembly.name] = seen.get(assembly.name, 0) + 1
+        renamed.append(assembly._replace(name=f"{assembly.name}.{count}")
+                       if count > 1 else assembly)
+    return renamed
+
+
+def assembly_pairs(count):
+    """(a, b) for every pair of assemblies compared, in output order"""
+    return list(engine.iter_pairs(count))
+
+
+def _tiles(order, lengths, tile, partner_longest):
+    """Split order (sorted by length) into tiles within the count and byte budgets"""
+    tiles = []
+    current = []
+    for k in order:
+        longest = lengths[current[0]] if current else lengths[k]
+        if current and (len(current) == tile or
+                        (len(current) + 1) * (longest + partner_longest) * _SPECTRUM_BYTES
+                        > TILE_BYTES // 2):
+            tiles.append(current)
+            current = []
+        current.append(k)
+    if current:
+        tiles.append(current)
+    return tiles
+
+
+class _Source:
+    """Intervals of one assembly as zero-copy packed views when NumPy is available"""
+
+    def __init__(self, assembly, packed, metrics):
+        self.assembly = assembly
+        self.store = None
+        if packed:
+            with stage(metrics, "pack"):
+                self.store = PackedSequence.from_genome(assembly.genome)
+            if load_composition is not None:
+                with stage(metrics, "composition"):
+                    self.store.composition = load_composition(assembly.genome)
+
+    def sequence(self, k):
+        _, start, end = self.assembly.intervals[k]
+        if self.store is not None:
+            return self.store.view(start, end)
+        return self.assembly.genome[start:end]
+
+
+def compare_two(assembly1, assembly2, method="auto", both_strands=False, gapped=None,
+                tile=DEFAULT_TILE, cancel=None, metrics=None, sources=None):
+    """Yield a record for every interval of assembly1 against every one of assembly2.
+
+    Records come tile by tile; row and col give each cell.  sources maps
+    assembly names to already packed inputs (see compare_assemblies).
+    """
+    method = _resolve_method(method)
+    tiled = method == "fft" and gapped is None
+    sources = sources if sources is not None else {}
+    for assembly in (assembly1, assembly2):
+        if assembly.name not in sources:
+            sources[assembly.name] = _Source(assembly, PackedSequence is not None, metrics)
+    rows, cols = sources[assembly1.name], sources[assembly2.name]
+    lengths1 = [end - start for _, start, end in assembly1.intervals]
+    lengths2 = [end - start for _, start, end in assembly2.intervals]
+    order1 = sorted(range(len(lengths1)), key=lambda k: -lengths1[k])
+    order2 = sorted(range(len(lengths2)), key=lambda k: -lengths2[k])
+    row_tiles = _tiles(order1, lengths1, tile, max(lengths2, default=0))
+    col_tiles = _tiles(order2, lengths2, tile, max(lengths1, default=0))
+
+    for row_tile in row_tiles:
+        row_seqs = [rows.sequence(k) for k in row_tile]
+        for col_tile in col_tiles:
+            if cancel is not None and cancel.is_set():
+                return
+            col_seqs = [cols.sequence(k) for k in col_tile]
+            if tiled:
+                with stage(metrics, "align"):
+                    results = list(tile_offsets(row_seqs, col_seqs, both_strands))
+            else:
+                results = [(r, c, None) for r in range(len(row_tile)) for c in range(len(col_tile))]
+            for r, c, found in results:
+                seq1, seq2 = row_seqs[r], col_seqs[c]
+                if found is None:
+                    result = engine.score_pair(seq1, seq2, method, metrics, both_strands, gapped)
+                else:
+                    max_match, offset, strand = found
+                    result = engine.pair_result(seq1, seq2, max_match, offset,
+                                                strand if both_strands else None, metrics=metrics)
+                i, j = row_tile[r], col_tile[c]
+                record = {"assembly1": assembly1.name, "assembly2": assembly2.name,
+                          "row": i, "col": j}
+                record.update(engine.pair_record(assembly1.intervals[i][0],
+                                                 assembly2.intervals[j][0], result))
+                yield record
+
+
+def compare_assemblies(assemblies, method="auto", both_strands=False, gapped=None,
+                       tile=DEFAULT_TILE, cancel=None, metrics=None):
+    """compare_two over every pair of assemblies; each genome is packed once.
+
+    Assembly names must be unique (see unique_names).
+    """
+    sources = {}
+    for a, b in assembly_pairs(len(assemblies)):
+        yield from compare_two(assemblies[a], assemblies[b], method, both_strands, gapped, tile,
+                               cancel, metrics, sources)
+
+
+class SimilarityMatrix:
+    """Similarity (%) of every row interval against every column interval.
+
+    Cells are None until their record is added; with both-strand records
+    strands holds "+" or "-" per cell.  best is the record of the highest
+    cell, the smallest (row, col) on ties.
+    """
+
+    def __init__(self, assembly1, assembly2):
+        self.name1 = assembly1.name
+        self.name2 = assembly2.name
+        self.ids1 = [chromo_id for chromo_id, _, _ in assembly1.intervals]
+        self.ids2 = [chromo_id for chromo_id, _, _ in assembly2.intervals]
+        self.similarity = [[None] * len(self.ids2) for _ in self.ids1]
+        self.strands = None
+        self.best = None
+        self.filled = 0
+
+    @property
+    def shape(self):
+        return len(self.ids1), len(self.ids2)
+
+    def add(self, record):
+        i, j = record["row"], record["col"]
+        if self.similarity[i][j] is None:
+            self.filled += 1
+        self.similarity[i][j] = record["similarity"]
+        if "strand" in record:
+            if self.strands is None:
+                self.strands = [[None] * len(self.ids2) for _ in self.ids1]
+            self.strands[i][j] = record["strand"]
+        # Tiles arrive out of row-major order, so ties are settled by cell
+        best = self.best
+        if (best is None or record["similarity"] > best["similarity"]
+                or (record["similarity"] == best["similarity"]
+                    and (record["row"], record["col"]) < (best["row"], best["col"]))):
+            self.best = record
+
+    def row_best(self, i):
+        """Column index of the best cell of row i, or None"""
+        values = [(v, -j) for j, v in enumerate(self.similarity[i]) if v is not None]
+        return -max(values)[1] if values else None
+
+    def to_dict(self):
+        """Plain-dict form for JSON"""
+        matrix = {
+            "assembly1": self.name1,
+            "assembly2": self.name2,
+            "rows": self.ids1,
+            "cols": self.ids2,
+            "similarity": self.similarity,
+        }
+        if self.strands is not None:
+            matrix["strands"] = self.strands
+        return matrix
+
+
+def collect_matrices(assemblies, records):
+    """Fill one SimilarityMatrix per assembly pair from records; returns the list"""
+    matrices = {}
+    for a, b in assembly_pairs(len(assemblies)):
+        matrices[assemblies[a].name, assemblies[b].name] = SimilarityMatrix(assemblies[a],
+                                                                            assemblies[b])
+    for record in records:
+        matrices[record["assembly1"], record["assembly2"]].add(record)
+    return list(matrices.values())
+
+
+def write_matrix(f, matrix):
+    """Write a matrix as TSV: a "#" title line, column ids, then one row per interval"""
+    f.write(f"# {matrix.name1} (rows) vs {matrix.name2} (columns)\n")
+    f.write("\t".join([""] + matrix.ids2) + "\n")
+    for chromo_id, values in zip(matrix.ids1, matrix.similarity):
+        cells = ["" if v is None else f"{v:.2f}" for v in values]
+        f.write("\t".join([chromo_id] + cells) + "\n")
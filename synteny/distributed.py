@@ -0,0 +1,363 @@
+"""All-pairs comparison shared out to workers over TCP.
+
+A ``Coordinator`` splits the serial pair order into units of
+``unit_size`` consecutive pairs (the chunks of ``parallel``) and hands
+them to any number of workers, on this machine or others::
+
+    python -m synteny genome.fasta chromosomes.csv --serve 0.0.0.0:7070
+    python -m synteny.distributed HOST:7070 -j 4     # on each worker machine
+
+Messages are length-prefixed JSON - nothing is unpickled - in
+request/response pairs always started by the worker: ``hello`` returns
+the job (genome path and length, intervals, method, strand and gap
+settings); ``next``, ``result`` and ``error`` return the next ``unit``,
+``wait`` while every unit is out, or ``done``.  Workers read the genome
+themselves (a shared path, or ``--genome`` for a local copy, checked by
+length) and score units with the process pool's code, so records are
+identical to a local run.
+
+A unit is leased to one worker at a time.  When that worker disconnects,
+reports an error or keeps the unit past ``lease_seconds``, the unit is
+queued again; a unit failing ``max_attempts`` times fails the run.  A
+result for a unit that is already in is dropped.  ``Coordinator.records``
+yields records in report order, holding only the units that arrived
+ahead of the next one, so output and best pair match
+``engine.compare_all``.
+"""
+
+import argparse
+import json
+import multiprocessing
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import time
+from collections import deque
+
+from . import parallel
+from .fasta import open_genome
+
+DEFAULT_UNIT_SIZE = 64
+LEASE_SECONDS = 600
+MAX_ATTEMPTS = 3
+
+# How long a worker waits before asking again while every unit is leased
+WAIT_SECONDS = 0.5
+# How long records() lets connected workers hear "done" before closing
+DONE_GRACE_SECONDS = 2.0
+# Workers may start before the coordinator listens
+CONNECT_ATTEMPTS = 30
+CONNECT_RETRY_SECONDS = 1.0
+
+MAX_MESSAGE_BYTES = 1 << 30
+_HEADER = struct.Struct(">I")
+
+
+def parse_address(text):
+    """(host, port) from "HOST:PORT"; a bare ":PORT" means all interfaces"""
+    host, sep, port = text.rpartition(":")
+    if not sep or not port.isdigit():
+        raise ValueError(f"Expected HOST:PORT, got {text!r}")
+    return host or "0.0.0.0", int(port)
+
+
+def send_message(sock, message):
+    data = json.dumps(message).encode("utf-8")
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+
+def _recv_exact(sock, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(min(size - len(data), 1 << 20))
+        if not chunk:
+            return None
+        data += chunk
+    return bytes(data)
+
+
+def recv_message(sock):
+    """The next message, or None once the peer has closed the connection"""
+    header = _recv_exact(sock, _HEADER.size)
+    if header is None:
+        return None
+    (size,) = _HEADER.unpack(header)
+    if size > MAX_MESSAGE_BYTES:
+        raise ValueError(f"Message of {size} bytes is too large")
+    data = _recv_exact(sock, size)
+    return json.loads(data) if data is not None else None
+
+
+def _model_spec(gapped):
+    if gapped is None:
+        return None
+    return {"mode": gapped.mode, "band": gapped.band, "scoring": list(gapped.scoring)}
+
+
+def _model(spec):
+    if spec is None:
+        return None
+    from .gapped import GappedModel, Scoring
+    return GappedModel(spec["mode"], spec["band"], Scoring(*spec["scoring"]))
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        coordinator = self.server.coordinator
+        worker = coordinator._connect()
+        try:
+            while True:
+                message = recv_message(self.request)
+                if message is None:
+                    break
+                reply = coordinator._reply(worker, message)
+                send_message(self.request, reply)
+                if reply["op"] == "done":
+                    break
+        except (OSError, ValueError):
+            pass  # a broken worker is handled like one that disconnected
+        finally:
+            coordinator._disconnect(worker)
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class Coordinator:
+    """Serves the pair units of one run to workers; records() yields the results"""
+
+    def __init__(self, genome_path, genome_length, intervals, method="auto",
+                 both_strands=False, gapped=None, address=("127.0.0.1", 0),
+                 unit_size=DEFAULT_UNIT_SIZE, lease_seconds=LEASE_SECONDS,
+                 max_attempts=MAX_ATTEMPTS, log=None):
+        count = len(intervals)
+        self.units = list(parallel.chunks(count * (count - 1) // 2, unit_size))
+        self.job = {
+            "op": "job",
+            "genome": genome_path,
+            "genome_length": genome_length,
+            "intervals": [list(row) for row in intervals],
+            "method": method,
+            "both_strands": both_strands,
+            "gapped": _model_spec(gapped),
+        }
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.log = log or (lambda message: None)
+        self.workers = 0  # connections seen
+        self.retries = 0
+        self._lock = threading.Condition()
+        self._pending = deque(range(len(self.units)))
+        self._leases = {}  # unit -> (worker, deadline)
+        self._attempts = [0] * len(self.units)
+        self._results = {}
+        self._next = 0  # first unit records() has not yielded
+        self._active = 0
+        self._finished = False
+        self._error = None
+        self._server = _Server(address, _Handler)
+        self._server.coordinator = self
+        self.address = self._server.server_address[:2]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def records(self, cancel=None):
+        """Yield every record in report order as the workers return them.
+
+        Raises RuntimeError when a unit fails max_attempts times; stops
+        early when the optional cancel Event is set.  The server is closed
+        once the generator ends.
+        """
+        try:
+            for unit in range(len(self.units)):
+                with self._lock:
+                    while unit not in self._results:
+                        if self._error is not None:
+                            raise self._error
+                        if cancel is not None and cancel.is_set():
+                            return
+                        self._lock.wait(parallel.CANCEL_POLL_SECONDS)
+                        self._expire()
+                    records = self._results.pop(unit)
+                    self._next = unit + 1
+                yield from records
+        finally:
+            self.close()
+
+    def close(self):
+        """Tell the connected workers that the run is over, then stop serving"""
+        with self._lock:
+            self._finished = True
+            deadline = time.monotonic() + DONE_GRACE_SECONDS
+            while self._active and time.monotonic() < deadline:
+                self._lock.wait(deadline - time.monotonic())
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _connect(self):
+        with self._lock:
+            self.workers += 1
+            self._active += 1
+            return self.workers
+
+    def _disconnect(self, worker):
+        with self._lock:
+            self._active -= 1
+            for unit, (holder, _) in list(self._leases.items()):
+                if holder == worker:
+                    del self._leases[unit]
+                    self._retry(unit, f"worker {worker} disconnected")
+            self._lock.notify_all()
+
+    def _reply(self, worker, message):
+        op = message.get("op")
+        with self._lock:
+            if op == "hello":
+                self.log(f"worker {worker} connected")
+                return self.job
+            if op == "result":
+                self._store(worker, message["unit"], message["records"])
+            elif op == "error":
+                self._fail(worker, message["unit"], message.get("message", "worker error"))
+            elif op != "next":
+                return {"op": "error", "message": f"Unknown request: {op!r}"}
+            return self._assign(worker)
+
+    def _assign(self, worker):
+        self._expire()
+        if self._finished or self._error is not None:
+            return {"op": "done"}
+        if not self._pending:
+            return {"op": "wait", "seconds": WAIT_SECONDS}
+        unit = self._pending.popleft()
+        self._leases[unit] = (worker, time.monotonic() + self.lease_seconds)
+        first, size = self.units[unit]
+        return {"op": "unit", "unit": unit, "first": first, "size": size}
+
+    def _store(self, worker, unit, records):
+        if unit < self._next or unit in self._results:
+            return  # a retried unit that came back twice
+        if len(records) != self.units[unit][1]:
+            self._fail(worker, unit, f"{len(records)} records for {self.units[unit][1]} pairs")
+            return
+        # A late result is as good as the retry it overtook
+        self._leases.pop(unit, None)
+        if unit in self._pending:
+            self._pending.remove(unit)
+        self._results[unit] = records
+        self._lock.notify_all()
+
+    def _fail(self, worker, unit, reason):
+        holder = self._leases.get(unit)
+        if holder is not None and holder[0] == worker:
+            del self._leases[unit]
+            self._retry(unit, reason)
+
+    def _retry(self, unit, reason):
+        self._attempts[unit] += 1
+        first, size = self.units[unit]
+        if self._attempts[unit] >= self.max_attempts:
+            self._error = RuntimeError(f"Pairs {first + 1}-{first + size} failed "
+                                       f"{self._attempts[unit]} times; last: {reason}")
+        else:
+            self.retries += 1
+            self.log(f"retrying pairs {first + 1}-{first + size}: {reason}")
+            self._pending.appendleft(unit)  # records() is likely waiting for it
+        self._lock.notify_all()
+
+    def _expire(self):
+        now = time.monotonic()
+        for unit, (_, deadline) in list(self._leases.items()):
+            if deadline < now:
+                del self._leases[unit]
+                self._retry(unit, "lease expired")
+
+
+def _connect(address, attempts=CONNECT_ATTEMPTS):
+    for attempt in range(attempts):
+        try:
+            return socket.create_connection(address)
+        except ConnectionRefusedError:
+            if attempt == attempts - 1:
+                raise
+            time.sleep(CONNECT_RETRY_SECONDS)
+
+
+def run_worker(address, genome_path=None, connect_attempts=CONNECT_ATTEMPTS):
+    """Score units for the coordinator at (host, port) until it is done; returns the unit count"""
+    with _connect(address, connect_attempts) as sock:
+        send_message(sock, {"op": "hello"})
+        job = recv_message(sock)
+        if job is None or job.get("op") != "job":
+            raise ConnectionError("The coordinator sent no job")
+        genome = open_genome(genome_path or job["genome"])
+        if len(genome) != job["genome_length"]:
+            raise ValueError(f"Genome has {len(genome):,} bases; the coordinator's has "
+                             f"{job['genome_length']:,}")
+        parallel.init_worker(genome, [tuple(row) for row in job["intervals"]], job["method"],
+                             job["both_strands"], _model(job["gapped"]))
+        units = 0
+        request = {"op": "next"}
+        while True:
+            send_message(sock, request)
+            reply = recv_message(sock)
+            if reply is None:
+                raise ConnectionError("The coordinator closed the connection")
+            if reply["op"] == "done":
+                return units
+            if reply["op"] == "wait":
+                time.sleep(reply["seconds"])
+                request = {"op": "next"}
+                continue
+            if reply["op"] != "unit":
+                raise ConnectionError(reply.get("message", f"Unexpected reply: {reply['op']!r}"))
+            try:
+                records = parallel.run_chunk((reply["first"], reply["size"]))
+            except Exception as e:  # reported, so the unit is retried elsewhere
+                request = {"op": "error", "unit": reply["unit"],
+                           "message": f"{type(e).__name__}: {e}"}
+            else:
+                units += 1
+                request = {"op": "result", "unit": reply["unit"], "records": records}
+
+
+def _worker_main(address, genome_path):
+    try:
+        units = run_worker(address, genome_path)
+    except (OSError, ValueError) as e:
+        print(f"synteny worker: {e}", file=sys.stderr)
+        return 1
+    print(f"worker: {units} units scored", file=sys.stderr)
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="synteny.distributed",
+        description="Score pair units for a coordinator started with 'python -m synteny ... --serve'.")
+    parser.add_argument("address", help="HOST:PORT of the coordinator")
+    parser.add_argument("--genome", help="local copy of the coordinator's genome file")
+    parser.add_argument("-j", "--workers", type=int, default=1,
+                        help="worker processes to run (default: 1)")
+    args = parser.parse_args(argv)
+    try:
+        address = parse_address(args.address)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.workers <= 1:
+        return _worker_main(address, args.genome)
+    processes = [multiprocessing.Process(target=_worker_main, args=(address, args.genome))
+                 for _ in range(args.workers)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    return 0 if all(process.exitcode == 0 for process in processes) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,150 @@
+"""Dot plots of chromosome pairs at display resolution.
+
+A dot plot marks every (i, j) where the k-mer of ``seq1`` at i equals the
+k-mer of ``seq2`` at j: shared segments are diagonals, inversions (hits
+against the reverse complement of ``seq2``) anti-diagonals.  The full
+matrix of a 10 Mbp pair has 10^14 cells, so ``dot_density`` only counts
+hits per cell of a ``width`` x ``height`` grid over a region of the pair:
+
+* the sampled k-mers of ``seq2`` (below) are sorted and every k-mer of
+  ``seq1`` in the region is looked up by binary search, so work and
+  memory grow with the region, never with its square;
+* when a grid row spans many bases of ``seq2``, only about
+  ``SAMPLES_PER_CELL`` evenly spaced k-mers per row are looked up; a
+  diagonal crossing a cell is still hit by each of them;
+* k-mers occurring more than ``max_occurrences`` times in the region of
+  ``seq1`` (low-complexity sequence, tandem repeats) are skipped, as they
+  would paint solid squares.
+
+Zooming is another call with a smaller region (see ``zoom_region``), so
+only the visible part of each sequence is read and encoded.  ``shade``
+turns the counts into an RGB array; drawing it is left to the GUI.
+Requires NumPy.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from .sketch import _encode, _packed_kmers
+
+DEFAULT_K = 12
+SAMPLES_PER_CELL = 8
+MAX_OCCURRENCES = 16
+
+# Smallest region edge zoom_region goes down to, in bases
+MIN_SPAN = 50
+
+# RGB of forward and reverse-complement hits; a cell with any hit is at
+# least MIN_SHADE of the way from white to its colour
+FORWARD_COLOR = (21, 101, 192)
+REVERSE_COLOR = (216, 27, 96)
+MIN_SHADE = 0.3
+
+# Low k-mer bits indexed by the prefilter bitmap of _bin (a 16 MiB table,
+# allocated once per dot_density call; exact for k <= 12)
+_FILTER_BITS = 24
+_FILTER_MASK = np.uint64((1 << _FILTER_BITS) - 1)
+
+# forward/reverse: (height, width) hit counts, reverse None for one strand;
+# region: (start1, end1, start2, end2) the grid covers
+DotPlot = namedtuple("DotPlot", "forward reverse region k")
+
+
+def _kmers(seq, start, end, k, stride=1, reverse=False):
+    """(forward, reverse or None, positions) of the A/C/G/T k-mers starting in [start, end).
+
+    Positions are relative to start and a multiple of stride; only those
+    k-mers are packed.
+    """
+    stop = min(len(seq), end + k - 1)
+    if hasattr(seq, "window"):
+        window = seq.window(start, stop)  # packed.PackedView, zero-copy
+    else:
+        window = seq[start:stop]
+    codes = _encode(window)
+    positions = np.arange(0, max(0, min(len(codes) - k + 1, end - start)), stride)
+    picked = slice(None)
+    if stride > 1:
+        # Lay the sampled k-mers end to end; every k-th packed k-mer is one
+        codes = codes[(positions[:, None] + np.arange(k)).ravel()]
+        picked = slice(None, None, k)
+    forward, complement, valid = _packed_kmers(codes, k, canonical=reverse)
+    forward, valid = forward[picked][valid[picked]], valid[picked]
+    complement = complement[picked][valid] if reverse else None
+    return forward, complement, positions[valid]
+
+
+def _bin(keys, pos1, queries, pos2, max_occurrences, shape, spans, present):
+    """Hits of every seq1 k-mer (keys) among the seq2 queries, counted per cell of shape.
+
+    The queries are the smaller set (at most a few per cell), so they are
+    sorted and keys are looked up - after a bitmap of the queries' low
+    bits has ruled out nearly all of them.  present is that bitmap, all
+    False, and is left all False again.
+    """
+    height, width = shape
+    bits = (queries & _FILTER_MASK).astype(np.intp)
+    present[bits] = True
+    candidates = np.flatnonzero(present[(keys & _FILTER_MASK).astype(np.intp)])
+    present[bits] = False
+    keys, pos1 = keys[candidates], pos1[candidates]
+    order = np.argsort(queries, kind="stable")
+    queries = queries[order]
+    lo = np.searchsorted(queries, keys, "left")
+    counts = np.searchsorted(queries, keys, "right") - lo
+    # Occurrences in seq1 of each query, filed under the first of its equal queries
+    occurrences = np.bincount(lo, weights=counts > 0, minlength=len(queries) + 1)
+    counts[occurrences[lo] > max_occurrences] = 0
+    # One entry per hit: seq1 position of its key, seq2 position of its query
+    cols = np.repeat(pos1, counts) * width // spans[0]
+    first = np.repeat(lo - (np.cumsum(counts) - counts), counts)
+    rows = pos2[order[first + np.arange(len(first))]] * height // spans[1]
+    return np.bincount(rows * width + cols, minlength=height * width).reshape(shape)
+
+
+def dot_density(seq1, seq2, width, height, region=None, k=DEFAULT_K, both_strands=True,
+                max_occurrences=MAX_OCCURRENCES):
+    """DotPlot of the k-mer hits over region, binned into height rows by width columns.
+
+    region is (start1, end1, start2, end2), the whole pair by default;
+    columns follow seq1 and rows seq2.  The grid is never finer than one
+    base, so width and height shrink for short regions.
+    """
+    start1, end1, start2, end2 = region or (0, len(seq1), 0, len(seq2))
+    spans = (max(1, end1 - start1), max(1, end2 - start2))
+    shape = (max(1, min(height, spans[1])), max(1, min(width, spans[0])))
+
+    keys, _, pos1 = _kmers(seq1, start1, end1, k)
+    stride = max(1, spans[1] // (shape[0] * SAMPLES_PER_CELL))
+    forward, complement, pos2 = _kmers(seq2, start2, end2, k, stride, both_strands)
+
+    present = np.zeros(1 << _FILTER_BITS, dtype=bool)
+    reverse = None
+    if both_strands:
+        reverse = _bin(keys, pos1, complement, pos2, max_occurrences, shape, spans, present)
+    return DotPlot(_bin(keys, pos1, forward, pos2, max_occurrences, shape, spans, present),
+                   reverse, (start1, end1, start2, end2), k)
+
+
+def zoom_region(region, lengths, x, y, factor):
+    """region scaled by 1/factor around the fractions (x, y) of it, kept inside lengths"""
+    zoomed = []
+    for (start, end), length, fraction in zip((region[:2], region[2:]), lengths, (x, y)):
+        span = min(length, max(MIN_SPAN, round((end - start) / factor)))
+        center = start + fraction * (end - start)
+        first = min(max(0, round(center - span / 2)), length - span)
+        zoomed += [first, first + span]
+    return tuple(zoomed)
+
+
+def shade(plot):
+    """(height, width, 3) uint8 RGB image of a DotPlot on white, log-scaled per strand"""
+    rgb = np.full(plot.forward.shape + (3,), 255.0)
+    for counts, color in ((plot.forward, FORWARD_COLOR), (plot.reverse, REVERSE_COLOR)):
+        if counts is None or not counts.any():
+            continue
+        level = np.log1p(counts) / np.log1p(counts.max())
+        level = np.where(counts > 0, MIN_SHADE + (1 - MIN_SHADE) * level, 0.0)
+        rgb -= level[..., None] * (255 - np.array(color, dtype=float))
+    return np.clip(rgb, 0, 255).astype(np.uint8)
@@ -0,0 +1,232 @@
+"""Headless comparison pipeline.
+
+Reads a genome and a chromosome interval file, compares every pair of
+intervals and tracks the best match.  Results are produced one pair at a
+time as plain dicts so callers (GUI, CLI) can stream them.
+"""
+
+from .alignment import best_offset, best_strand_offset, render_alignment
+from .metrics import stage
+
+
+def read_genome_file(genome_filename):
+    """Return the genome as one string, headers removed"""
+    with open(genome_filename, 'r') as f:
+        lines = f.readlines()
+        seq = ''.join([line.strip() for line in lines if not line.startswith('>')])
+    return seq
+
+
+def read_chromosome_intervals(chromo_filename, genome_length, warn=None, records=None):
+    """Return [(chromo_id, start, end), ...] as half-open genome intervals.
+
+    Coordinates are normalized the way slicing the genome string would
+    treat them, so ``genome_seq[start:end]`` is always the chromosome.
+    Rows that cannot be parsed are skipped.  Out-of-range intervals are
+    kept as empty intervals and reported through warn(message).
+
+    When the header has a fourth ``Record`` column and records maps FASTA
+    record names to their (start, length) in the concatenated genome,
+    Start/End on such rows are relative to the named record.
+    """
+    intervals = []
+    with open(chromo_filename, 'r') as f:
+        lines = f.readlines()
+        header = [name.strip().lower() for name in lines[0].split(',')] if lines else []
+        has_record = len(header) > 3 and header[3] == 'record'
+        for line in lines[1:]:  # skip header
+            parts = line.strip().split(',')
+            if len(parts) < 3:
+                continue
+
+            chromo_id = parts[0]
+            try:
+                start = int(parts[1])
+                end = int(parts[2])
+            except ValueError:
+                continue
+
+            record = parts[3].strip() if has_record and len(parts) > 3 else ""
+            if record:
+                if not records or record not in records:
+                    if warn:
+                        warn(f"Chromosome {chromo_id} names unknown record {record!r}; skipped.")
+                    continue
+                base, length = records[record]
+            else:
+                base, length = 0, genome_length
+
+            if start >= length:
+                start = end = length
+                if warn:
+                    warn(f"Chromosome {chromo_id} start position {parts[1]} is out of genome range.")
+            else:
+                start, end, _ = slice(start, end).indices(length)
+                end = max(start, end)
+                if start == end and warn:
+                    warn(f"Chromosome {chromo_id} sequence is empty.")
+
+            intervals.append((chromo_id, base + start, base + end))
+    return intervals
+
+
+def read_chromosome_file(chromo_filename, genome_seq, warn=None):
+    """Return [(chromo_id, chromo_seq), ...] sliced from genome_seq"""
+    intervals = read_chromosome_intervals(chromo_filename, len(genome_seq), warn)
+    return [(chromo_id, genome_seq[start:end]) for chromo_id, start, end in intervals]
+
+
+def gc_content(seq, chunk=1 << 22):
+    """Fraction of G and C in seq, or None for an empty sequence.
+
+    This is the one GC definition of the package: upper-case G and C over
+    the full length, N and soft-masked bases included.  seq may be a str
+    or packed.PackedView (counted directly) or a sliceable genome such as
+    fasta.IndexedFasta, which is scanned chunk by chunk.
+    """
+    length = len(seq)
+    if not length:
+        return None
+    if hasattr(seq, "count"):
+        return (seq.count('G') + seq.count('C')) / length
+    gc = 0
+    for pos in range(0, length, chunk):
+        piece = seq[pos:pos + chunk]
+        gc += piece.count('G') + piece.count('C')
+    return gc / length
+
+
+def calculate_statistics(seq1, seq2):
+    """Calculate additional statistics about the alignment"""
+    len1, len2 = len(seq1), len(seq2)
+    max_len = max(len1, len2)
+    min_len = min(len1, len2)
+    gc1, gc2 = gc_content(seq1), gc_content(seq2)
+
+    return {
+        "length_ratio": f"{min_len/max_len:.1%}",
+        "gc_content1": f"{gc1:.1%}" if gc1 is not None else "N/A",
+        "gc_content2": f"{gc2:.1%}" if gc2 is not None else "N/A"
+    }
+
+
+def iter_pairs(count):
+    """Yield (i, j) for every unordered pair, in report order"""
+    for i in range(count):
+        for j in range(i+1, count):
+            yield i, j
+
+
+def score_pair(seq1, seq2, method="auto", metrics=None, both_strands=False, gapped=None):
+    """Align one pair and return its result without the visual.
+
+    This is the part worth caching: everything in it depends only on the
+    two sequences (and the engine version).  With both_strands the reverse
+    complement of seq2 is scored as well and the result gains a "strand"
+    of "+" or "-".  gapped is an optional gapped.GappedModel used instead
+    of ungapped sliding; the result then also has its "score".
+    """
+    strand = score = None
+    with stage(metrics, "align"):
+        if gapped is not None:
+            max_match, offset, strand, score = gapped.score(seq1, seq2, method, both_strands)
+        elif both_strands:
+            max_match, offset, strand = best_strand_offset(seq1, seq2, method)
+        else:
+            max_match, offset = best_offset(seq1, seq2, method)
+    return pair_result(seq1, seq2, max_match, offset, strand if both_strands else None, score,
+                       metrics)
+
+
+def pair_result(seq1, seq2, max_match, offset, strand=None, score=None, metrics=None):
+    """score_pair's result for an alignment found elsewhere (e.g. alignment.tile_offsets)"""
+    if metrics is not None:
+        metrics.count_aligned(len(seq1), len(seq2))
+    result = {
+        "len1": len(seq1),
+        "len2": len(seq2),
+        "matches": max_match,
+        "offset": offset,
+        "similarity": (max_match / len(seq2)) * 100 if len(seq2) else 0.0,
+    }
+    if strand is not None:
+        result["strand"] = strand
+    if score is not None:
+        result["score"] = score
+    with stage(metrics, "statistics"):
+        result.update(calculate_statistics(seq1, seq2))
+    return result
+
+
+def pair_record(id1, id2, result):
+    """Report record for a scored pair.
+
+    Records stay compact (scores and the best offset only); the alignment
+    picture is rebuilt with record_visual for the few pairs that are shown.
+    """
+    record = {"id1": id1, "id2": id2}
+    record.update(result)
+    return record
+
+
+def record_visual(record, seq1, seq2, metrics=None, gapped=None):
+    """The [top, mid, bottom, label] alignment visual of a record, or [] without an offset.
+
+    Records scored with a gapped.GappedModel need the same model here.
+    """
+    if record["offset"] is None:
+        return []
+    with stage(metrics, "visual"):
+        if gapped is not None:
+            return gapped.render(seq1, seq2, record.get("strand", "+"))
+        return render_alignment(seq1, seq2, record["offset"], record.get("strand", "+"))
+
+
+def compare_pair(id1, seq1, id2, seq2, method="auto", metrics=None, both_strands=False,
+                 gapped=None):
+    """Align one pair and return its result record"""
+    return pair_record(id1, id2, score_pair(seq1, seq2, method, metrics, both_strands, gapped))
+
+
+def numbered_pairs(count):
+    """Yield (index, i, j) for every pair, index counting from 1"""
+    for index, (i, j) in enumerate(iter_pairs(count), 1):
+        yield index, i, j
+
+
+def compare_all(chromo_list, method="auto", cancel=None, pairs=None, metrics=None,
+                both_strands=False, gapped=None):
+    """Yield a record for every chromosome pair, numbered from 1.
+
+    cancel is an optional threading.Event checked between pairs.  pairs
+    optionally restricts the run to a list of (index, i, j).  metrics is
+    an optional metrics.RunMetrics.  both_strands also scores the reverse
+    complement of the second sequence of each pair, and gapped selects a
+    gapped alignment model (see score_pair).
+    """
+    if pairs is None:
+        pairs = numbered_pairs(len(chromo_list))
+    for index, i, j in pairs:
+        if cancel is not None and cancel.is_set():
+            return
+        id1, seq1 = chromo_list[i]
+        id2, seq2 = chromo_list[j]
+        record = {"index": index}
+        record.update(compare_pair(id1, seq1, id2, seq2, method, metrics, both_strands, gapped))
+        yield record
+
+
+class BestPair:
+    """Track the best record; the first pair to reach a score wins ties"""
+
+    def __init__(self):
+        self.record = None
+        self.similarity = 0
+
+    def update(self, record):
+        if record["similarity"] > self.similarity:
+            self.similarity = record["similarity"]
+            self.record = record
+            return True
+        return False
+
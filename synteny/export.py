@@ -0,0 +1,177 @@
+"""Streaming writers for comparison results.
+
+Records are written one at a time as the engine yields them, so memory
+stays constant whatever the number of pairs:
+
+* ``DelimitedWriter`` - TSV (a header row, similarity to two decimals,
+  empty cells for None) or CSV with the same values, quoted as needed
+* ``JsonlWriter`` - one ``{"type": kind, ...}`` object per record and a
+  ``"summary"`` record last
+* ``HtmlWriter`` - a self-contained page (inline style, no scripts): the
+  table is streamed row by row and the summary closes the document
+
+Every writer has ``write(record)`` and ``finish(summary)``; ``finish``
+returns whether the summary went into the file (TSV and CSV have no
+place for it).  ``open_output`` opens a path for writing, through gzip
+when asked or when the name ends in ``.gz``, and ``format_for_path``
+guesses a format from the name.
+"""
+
+import csv
+import gzip
+import html
+import json
+import os
+
+FORMATS = ("tsv", "csv", "jsonl", "html")
+
+PAIR_COLUMNS = ["index", "id1", "id2", "len1", "len2", "similarity",
+                "length_ratio", "gc_content1", "gc_content2", "matches", "offset"]
+
+# Cross-genome records have no pair index; row and col give the matrix cell
+CROSS_COLUMNS = ["assembly1", "assembly2", "row", "col"] + PAIR_COLUMNS[1:]
+
+# Left-aligned in HTML tables
+_TEXT_COLUMNS = {"id1", "id2", "assembly1", "assembly2", "strand"}
+
+_EXTENSIONS = {".tsv": "tsv", ".csv": "csv", ".jsonl": "jsonl", ".json": "jsonl",
+               ".html": "html", ".htm": "html"}
+
+_HTML_STYLE = """body { font-family: 'Segoe UI', sans-serif; color: #2c3e50; margin: 2em; }
+h1 { font-size: 20px; } h2 { font-size: 16px; margin-top: 1.5em; }
+table { border-collapse: collapse; font-size: 13px; }
+th, td { border: 1px solid #d0d7de; padding: 3px 8px; text-align: right; }
+th { background: #f0f2f5; position: sticky; top: 0; }
+td.text { text-align: left; }
+tr:nth-child(even) td { background: #fafbfc; }
+dt { font-weight: bold; float: left; clear: left; width: 12em; }
+dd { margin-left: 13em; }"""
+
+
+def pair_columns(both_strands=False, gapped=False, cross=False):
+    """Columns of pair records from a run with these options"""
+    columns = list(CROSS_COLUMNS if cross else PAIR_COLUMNS)
+    if both_strands:
+        columns.append("strand")
+    if gapped:
+        columns.append("score")
+    return columns
+
+
+def format_for_path(path, default="tsv"):
+    """Format named by a file's extension (ignoring a trailing .gz), else default"""
+    root, extension = os.path.splitext(path.lower())
+    if extension == ".gz":
+        extension = os.path.splitext(root)[1]
+    return _EXTENSIONS.get(extension, default)
+
+
+def open_output(path, compress=None):
+    """Text file for writing; gzip-compressed with compress, or by default for *.gz"""
+    if compress is None:
+        compress = path.lower().endswith(".gz")
+    if compress:
+        return gzip.open(path, "wt", encoding="utf-8", newline="")
+    return open(path, "w", encoding="utf-8", newline="")
+
+
+def _summary_text(value):
+    if isinstance(value, dict):
+        return ", ".join(f"{key}: {_summary_text(item)}" for key, item in value.items())
+    if isinstance(value, list):
+        return ", ".join(_summary_text(item) for item in value)
+    if isinstance(value, float):
+        return f"{value:.4g}"
+    return "" if value is None else str(value)
+
+
+def _cell(column, value):
+    if value is None:
+        return ""
+    if column == "similarity":
+        return f"{value:.2f}"
+    return str(value)
+
+
+class DelimitedWriter:
+    def __init__(self, f, columns, delimiter="\t"):
+        self.f = f
+        self.columns = columns
+        self.delimiter = delimiter
+        # TSV stays the plain tab-joined text it has always been
+        self._csv = csv.writer(f, lineterminator="\n") if delimiter == "," else None
+        self._row(columns)
+
+    def _row(self, values):
+        if self._csv is not None:
+            self._csv.writerow(values)
+        else:
+            self.f.write(self.delimiter.join(values) + "\n")
+
+    def write(self, record):
+        self._row([_cell(column, record[column]) for column in self.columns])
+
+    def finish(self, summary):
+        return False
+
+
+class JsonlWriter:
+    def __init__(self, f, kind="pair"):
+        self.f = f
+        self.kind = kind
+
+    def write(self, record):
+        self.f.write(json.dumps(dict(type=self.kind, **record)) + "\n")
+
+    def finish(self, summary):
+        self.f.write(json.dumps(dict(type="summary", **summary)) + "\n")
+        return True
+
+
+class HtmlWriter:
+    def __init__(self, f, columns, title="Genome Comparison Report"):
+        self.f = f
+        self.columns = columns
+        header = "".join(f"<th>{html.escape(column)}</th>" for column in columns)
+        f.write("<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"utf-8\">\n"
+                f"<title>{html.escape(title)}</title>\n<style>\n{_HTML_STYLE}\n</style>\n"
+                f"</head>\n<body>\n<h1>{html.escape(title)}</h1>\n"
+                f"<table>\n<thead><tr>{header}</tr></thead>\n<tbody>\n")
+
+    def write(self, record):
+        cells = []
+        for column in self.columns:
+            css = ' class="text"' if column in _TEXT_COLUMNS else ""
+            cells.append(f"<td{css}>{html.escape(_cell(column, record[column]))}</td>")
+        self.f.write("<tr>" + "".join(cells) + "</tr>\n")
+
+    def finish(self, summary):
+        self.f.write("</tbody>\n</table>\n<h2>Summary</h2>\n<dl>\n")
+        for key, value in summary.items():
+            self.f.write(f"<dt>{html.escape(key)}</dt>"
+                         f"<dd>{html.escape(_summary_text(value))}</dd>\n")
+        self.f.write("</dl>\n</body>\n</html>\n")
+        return True
+
+
+def record_writer(fmt, f, columns, kind="pair"):
+    """Writer of records in format fmt (one of FORMATS) to the open text file f"""
+    if fmt == "tsv":
+        return DelimitedWriter(f, columns)
+    if fmt == "csv":
+        return DelimitedWriter(f, columns, delimiter=",")
+    if fmt == "jsonl":
+        return JsonlWriter(f, kind)
+    if fmt == "html":
+        return HtmlWriter(f, columns)
+    raise ValueError(f"Unknown export format: {fmt!r}")
+
+
+def best_summary(record):
+    """The id1, id2, similarity (and strand) of a best record, for summaries"""
+    best = {key: record[key] for key in ("id1", "id2", "similarity")}
+    if "strand" in record:
+        best["strand"] = record["strand"]
+    if "assembly1" in record:
+        best = dict(assembly1=record["assembly1"], assembly2=record["assembly2"], **best)
+    return best
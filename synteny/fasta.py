@@ -0,0 +1,211 @@
+"""Indexed, memory-mapped FASTA access.
+
+A samtools-style ``.fai`` index (name, length, offset, line bases, line
+bytes per record) is built by streaming the file once and saved next to
+it; later runs reuse it as long as it is newer than the FASTA.  Sequence
+is then read through ``mmap``, decoding only the bytes a requested
+interval covers.
+
+``IndexedFasta`` behaves like the concatenated genome string that
+``engine.read_genome_file`` returns: ``len()`` is the total length and
+slicing ``genome[start:end]`` returns the sequence across record
+boundaries.  Per-record access goes through ``fetch(name, start, end)``.
+"""
+
+import bisect
+import mmap
+import os
+from collections import namedtuple
+
+from . import engine
+
+FaiRecord = namedtuple("FaiRecord", "name length offset linebases linewidth")
+
+
+class FastaIndexError(ValueError):
+    """The FASTA layout cannot be described by a .fai index"""
+
+
+def fai_path(fasta_path):
+    return fasta_path + ".fai"
+
+
+def build_fai(fasta_path):
+    """Stream fasta_path once and return its FaiRecord list"""
+    records = []
+    names = set()
+    current = None
+
+    def finish():
+        name, length, offset, linebases, linewidth = current[:5]
+        records.append(FaiRecord(name, length, offset, linebases or 0, linewidth or 0))
+
+    position = 0
+    with open(fasta_path, 'rb') as f:
+        for lineno, line in enumerate(f, 1):
+            size = len(line)
+            if line.startswith(b'>'):
+                if current is not None:
+                    finish()
+                fields = line[1:].split()
+                if not fields:
+                    raise FastaIndexError(f"line {lineno}: empty record name")
+                name = fields[0].decode('utf-8', 'replace')
+                if name in names:
+                    raise FastaIndexError(f"line {lineno}: duplicate record name {name!r}")
+                names.add(name)
+                # name, length, offset, linebases, linewidth, last line seen
+                current = [name, 0, position + size, None, None, False]
+            else:
+                bases_line = line.rstrip(b'\r\n')
+                bases = len(bases_line)
+                if bases and (not bases_line.isascii() or bases_line != bases_line.strip()):
+                    raise FastaIndexError(f"line {lineno}: whitespace or non-ASCII bytes in sequence")
+                if current is None:
+                    if bases:
+                        raise FastaIndexError(f"line {lineno}: sequence before the first header")
+                elif bases == 0:
+                    current[5] = True
+                elif current[5]:
+                    raise FastaIndexError(f"line {lineno}: line length differs within record {current[0]!r}")
+                else:
+                    if current[3] is None:
+                        current[3], current[4] = bases, size
+                    elif bases > current[3]:
+                        raise FastaIndexError(f"line {lineno}: line length differs within record {current[0]!r}")
+                    if bases < current[3] or size != current[4]:
+                        current[5] = True
+                    current[1] += bases
+            position += size
+    if current is not None:
+        finish()
+    return records
+
+
+def write_fai(path, records):
+    with open(path, 'w') as f:
+        for r in records:
+            f.write(f"{r.name}\t{r.length}\t{r.offset}\t{r.linebases}\t{r.linewidth}\n")
+
+
+def read_fai(path):
+    records = []
+    with open(path, 'r') as f:
+        for line in f:
+            parts = line.rstrip('\n').split('\t')
+            if len(parts) < 5:
+                continue
+            records.append(FaiRecord(parts[0], *(int(p) for p in parts[1:5])))
+    return records
+
+
+def load_fai(fasta_path, rebuild=False):
+    """Return the index for fasta_path, reusing or writing the .fai file"""
+    index_path = fai_path(fasta_path)
+    if (not rebuild and os.path.exists(index_path)
+            and os.path.getmtime(index_path) >= os.path.getmtime(fasta_path)):
+        return read_fai(index_path)
+    records = build_fai(fasta_path)
+    try:
+        write_fai(index_path, records)
+    except OSError:
+        pass  # read-only location: keep the index in memory only
+    return records
+
+
+class IndexedFasta:
+    """Random access to a FASTA file through its .fai index and mmap"""
+
+    def __init__(self, path, rebuild=False):
+        self.path = path
+        self.records = {}
+        self._starts = []
+        self._names = []
+        total = 0
+        for record in load_fai(path, rebuild):
+            self.records[record.name] = record
+            self._starts.append(total)
+            self._names.append(record.name)
+            total += record.length
+        self.length = total
+        self._file = open(path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    @property
+    def names(self):
+        return list(self._names)
+
+    def record_spans(self):
+        """{name: (start, length)} of each record in concatenated coordinates"""
+        return {name: (start, self.records[name].length)
+                for name, start in zip(self._names, self._starts)}
+
+    def fetch(self, name, start, end):
+        """Sequence of record name over [start, end), clipped to the record"""
+        record = self.records[name]
+        start, end, _ = slice(start, end).indices(record.length)
+        if start >= end:
+            return ""
+        width, bases = record.linewidth, record.linebases
+        first = record.offset + (start // bases) * width + start % bases
+        last = record.offset + ((end - 1) // bases) * width + (end - 1) % bases + 1
+        return self._mm[first:last].translate(None, b'\r\n').decode('ascii')
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice) or key.step not in (None, 1):
+            raise TypeError("IndexedFasta supports only contiguous slices")
+        start, end, _ = key.indices(self.length)
+        pieces = []
+        k = max(0, bisect.bisect_right(self._starts, start) - 1)
+        while start < end and k < len(self._names):
+            record_start = self._starts[k]
+            record_end = record_start + self.records[self._names[k]].length
+            if start < record_end:
+                stop = min(end, record_end)
+                pieces.append(self.fetch(self._names[k], start - record_start, stop - record_start))
+                start = stop
+            k += 1
+        return "".join(pieces)
+
+    def close(self):
+        if isinstance(self._mm, mmap.mmap):
+            self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __getstate__(self):
+        # Reopened (and re-mapped) on unpickling, e.g. in worker processes
+        return {"path": self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"])
+
+
+def record_spans(genome):
+    """Record spans of an IndexedFasta; {} for an in-memory genome string"""
+    if isinstance(genome, IndexedFasta):
+        return genome.record_spans()
+    return {}
+
+
+def open_genome(genome_filename, warn=None):
+    """Open a genome for interval access.
+
+    Returns an IndexedFasta when the file can be indexed, otherwise the
+    whole sequence as a string (the layout read_genome_file accepts).
+    """
+    try:
+        return IndexedFasta(genome_filename)
+    except FastaIndexError as e:
+        if warn:
+            warn(f"Genome file cannot be indexed ({e}); reading it into memory.")
+        return engine.read_genome_file(genome_filename)
@@ -0,0 +1,273 @@
+"""Banded gapped alignment with affine gap penalties.
+
+The sliding engines in ``alignment`` only place ``seq2`` ungapped, so one
+indel halves the similarity of otherwise identical chromosomes.  A
+``GappedModel`` scores a pair with Smith-Waterman (``"local"``) or
+Needleman-Wunsch (``"global"``) dynamic programming instead, with
+Gotoh's affine gaps: a gap of k bases costs ``gap_open + k * gap_extend``.
+
+The matrix is filled one row (one base of ``seq2``) at a time, each row a
+handful of NumPy operations over the band.  Vertical gaps and the
+diagonal only depend on the previous row; horizontal gaps within a row
+are a prefix maximum (exact whenever ``gap_open >= 0``).  Each cell
+holds ``score * (len2 + 1) + identities`` in one int64, so the maximum
+also carries the identity count of the best path and, among equal
+scores, prefers more identities.
+
+With a ``band`` only cells within that many diagonals of the best
+ungapped offset are filled (global alignment is banded around the main
+diagonal, widened to reach the far corner), so 100 kbp pairs cost
+O(len * band).  ``band=None`` fills the whole matrix.  A traceback is
+only kept when a picture is rendered.  Requires NumPy.
+
+The fill is vectorized along rows, not anti-diagonals or Farrar stripes:
+the rows of a band are as wide as the band, while its anti-diagonals are
+half as wide and twice as many, so they would double the Python-level
+steps.  Those steps are the cost - about 10-20 us per base of ``seq2``
+for bands up to a few hundred, roughly 1-2 s for a 100 kbp pair - and
+grow with ``len(seq2)`` whatever the band.
+
+Records keep the ungapped meaning of their fields: ``matches`` counts
+identical aligned columns, similarity is ``matches / len2``, ``offset`` is
+the diagonal (seq1 minus seq2 position) where the alignment ends, and
+``score`` is the DP score.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from .alignment import _codes, best_offset, reverse_complement
+
+MODES = ("local", "global")
+
+Scoring = namedtuple("Scoring", "match mismatch gap_open gap_extend")
+DEFAULT_SCORING = Scoring(2, -3, 5, 2)
+
+# Diagonals either side of the band centre
+DEFAULT_BAND = 64
+
+_NEG = -(1 << 60)
+
+# Traceback sources of a cell
+_STOP, _DIAG, _UP, _LEFT = 0, 1, 2, 3
+
+
+class GappedModel:
+    def __init__(self, mode="local", band=DEFAULT_BAND, scoring=DEFAULT_SCORING):
+        if mode not in MODES:
+            raise ValueError(f"Unknown gapped mode: {mode!r}")
+        if band is not None and band < 0:
+            raise ValueError("band must be >= 0")
+        if scoring.gap_open < 0 or scoring.gap_extend <= 0:
+            raise ValueError("gap_open must be >= 0 and gap_extend > 0")
+        self.mode = mode
+        self.band = band
+        self.scoring = Scoring(*scoring)
+
+    def __repr__(self):
+        return f"GappedModel({self.mode!r}, band={self.band}, scoring={tuple(self.scoring)})"
+
+    def key(self):
+        """Text identifying the model in cache keys"""
+        return f"{self.mode}:{self.band}:" + ",".join(map(str, self.scoring))
+
+    def align(self, seq1, seq2, method="auto", traceback=False):
+        """Alignment dict: score, matches, end1, end2 and, with traceback, rows.
+
+        rows is (top, track, bottom): seq1 and seq2 with "-" for gaps and
+        the R/W/X track between them.  matches is 0 and end1/end2 are None
+        when a local alignment finds nothing positive.
+        """
+        len1, len2 = len(seq1), len(seq2)
+        if len1 == 0 or len2 == 0:
+            return {"score": 0, "matches": 0, "end1": None, "end2": None,
+                    "rows": ("", "", "") if traceback else None}
+        if self.mode == "global":
+            width = self.band if self.band is not None else max(len1, len2)
+            center, lo, hi = 0, -(width + max(0, len2 - len1)), width + max(0, len1 - len2)
+        elif self.band is None:
+            center, lo, hi = 0, -len2, len1
+        else:
+            center = best_offset(seq1, seq2, method)[1] or 0
+            lo, hi = -self.band, self.band
+        return _fill(_codes(seq1), _codes(seq2), self.mode == "local", self.scoring,
+                     center, lo, hi, seq1, seq2, traceback)
+
+    def score(self, seq1, seq2, method="auto", both_strands=False):
+        """(matches, offset, strand, score) of the best alignment.
+
+        offset is None without an alignment; with both_strands the reverse
+        complement of seq2 is aligned too and wins only with more matches.
+        """
+        best = None
+        strands = ("+", "-") if both_strands else ("+",)
+        for strand in strands:
+            seq = seq2 if strand == "+" else reverse_complement(seq2)
+            result = self.align(seq1, seq, method)
+            if best is None or result["matches"] > best[0]:
+                offset = result["end1"] - result["end2"] if result["matches"] else None
+                best = (result["matches"], offset, strand, result["score"])
+        return best
+
+    def render(self, seq1, seq2, strand="+"):
+        """[top, mid, bottom, label] visual of the alignment, as render_alignment"""
+        if strand == "-":
+            seq2 = reverse_complement(seq2)
+        result = self.align(seq1, seq2, traceback=True)
+        top, track, bottom = result["rows"]
+        similarity = (result["matches"] / len(seq2)) * 100 if len(seq2) else 0.0
+        return [top, track, bottom,
+                f"Similarity: {similarity:.2f}% ({self.mode}, score {result['score']})"]
+
+
+def _fill(a, b, local, scoring, center, lo, hi, seq1, seq2, traceback):
+    """Fill the band j - i - center in [lo, hi] row by row (one Python step per seq2 base)"""
+    len1, len2 = len(a), len(b)
+    scale = len2 + 1
+    match = scoring.match * scale + 1
+    mismatch = scoring.mismatch * scale
+    extend = scoring.gap_extend * scale
+    open_extend = (scoring.gap_open + scoring.gap_extend) * scale
+
+    width = hi - lo + 1
+    t = np.arange(width, dtype=np.int64)
+    first_col = center + lo + t  # column j of each band cell on row 0
+    left_ext = t * extend
+
+    # Substitution scores of each seq2 character against every column,
+    # padded so that any row's band is a plain slice
+    pad = max(0, -(1 + center + lo))
+    columns = np.full(pad + len1 + 1 + max(0, len2 + center + hi - len1), -1, dtype=np.int64)
+    columns[pad + 1:pad + 1 + len1] = a
+    profiles = {code: np.where(columns == code, match, mismatch)
+                for code in np.unique(b).tolist()}
+
+    j = first_col
+    inside = (j >= 0) & (j <= len1)
+    if local:
+        h = np.where(inside, 0, _NEG)
+    else:
+        h = np.where(inside, -(scoring.gap_open + j * scoring.gap_extend) * scale, _NEG)
+        h[j == 0] = 0
+    e = np.full(width, _NEG, dtype=np.int64)
+    h = h.astype(np.int64)
+
+    if traceback:
+        source = np.zeros((len2 + 1, width), dtype=np.uint8)
+        up_extends = np.zeros((len2 + 1, width), dtype=bool)
+        left_extends = np.zeros((len2 + 1, width), dtype=bool)
+    best, best_cell = 0, None
+    shifted_h = np.empty(width, dtype=np.int64)
+    shifted_e = np.empty(width, dtype=np.int64)
+    f = np.empty(width, dtype=np.int64)
+    f[0] = _NEG
+
+    for i in range(1, len2 + 1):
+        j0 = first_col[0] + i
+        # Rows whose band lies inside columns 1..len1 need no edge handling
+        interior = j0 >= 1 and j0 + width - 1 <= len1
+        diag = h + profiles[int(b[i - 1])][pad + j0:pad + j0 + width]
+        # Vertical neighbour (i - 1, j) is one band cell to the right
+        shifted_h[:-1], shifted_h[-1] = h[1:], _NEG
+        shifted_e[:-1], shifted_e[-1] = e[1:], _NEG
+        up_open = shifted_h - open_extend
+        up_extend = shifted_e - extend
+        e = np.maximum(up_open, up_extend)
+        h_no_left = np.maximum(diag, e)
+        if local:
+            np.maximum(h_no_left, 0, out=h_no_left)
+        if not interior:
+            j = first_col + i
+            outside = (j < 0) | (j > len1)
+            boundary = j == 0
+            edge = 0 if local else -(scoring.gap_open + i * scoring.gap_extend) * scale
+            h_no_left[boundary] = edge
+            e[boundary] = edge
+            h_no_left[outside] = _NEG
+            e[outside] = _NEG
+
+        # Horizontal gaps: f[t] = max over k < t of h_no_left[k] - open - (t-1-k) * extend
+        running = np.maximum.accumulate(h_no_left + left_ext)
+        np.subtract(running[:-1], open_extend + left_ext[:-1], out=f[1:])
+        if not interior:
+            f[boundary | outside] = _NEG
+        h = np.maximum(h_no_left, f)
+        if not interior:
+            h[outside] = _NEG
+
+        if local:
+            k = int(np.argmax(h))
+            if h[k] > best:
+                best, best_cell = int(h[k]), (i, k)
+        if traceback:
+            source[i] = np.where(h == diag, _DIAG, np.where(h == e, _UP,
+                                 np.where(h == f, _LEFT, _STOP)))
+            if local:
+                source[i][h == 0] = _STOP
+            if not interior:
+                source[i][boundary] = _STOP
+            up_extends[i] = up_extend >= up_open
+            left_extends[i, 1:] = f[:-1] - extend == f[1:]
+
+    if local:
+        if best_cell is None:
+            return {"score": 0, "matches": 0, "end1": None, "end2": None,
+                    "rows": ("", "", "") if traceback else None}
+        end2, k = best_cell
+        value = best
+    else:
+        end2, k = len2, len1 - len2 - center - lo
+        value = int(h[k])
+    end1 = end2 + center + lo + k
+    matches = value % scale
+    result = {"score": (value - matches) // scale, "matches": matches,
+              "end1": end1, "end2": end2, "rows": None}
+    if traceback:
+        result["rows"] = _trace(str(seq1), str(seq2), source, up_extends, left_extends,
+                                center + lo, end1, end2, local)
+    return result
+
+
+def _trace(seq1, seq2, source, up_extends, left_extends, diagonal, i1, i2, local):
+    """Walk the traceback from (i2, i1) back to a stop; returns (top, track, bottom)"""
+    top, track, bottom = [], [], []
+
+    def column(c1, c2):
+        top.append(c1)
+        bottom.append(c2)
+        track.append("X" if "-" in (c1, c2) else "R" if c1 == c2 else "W")
+
+    state = _DIAG
+    while i1 > 0 or i2 > 0:
+        if i2 == 0 or i1 == 0:
+            if local:
+                break
+            # Global edge: the rest is one gap
+            while i1 > 0:
+                i1 -= 1
+                column(seq1[i1], "-")
+            while i2 > 0:
+                i2 -= 1
+                column("-", seq2[i2])
+            break
+        k = i1 - i2 - diagonal
+        if state == _DIAG:
+            state = source[i2, k]
+            if state == _STOP:
+                break
+            if state == _DIAG:
+                i1, i2 = i1 - 1, i2 - 1
+                column(seq1[i1], seq2[i2])
+            continue
+        if state == _UP:
+            extends = up_extends[i2, k]
+            i2 -= 1
+            column("-", seq2[i2])
+        else:
+            extends = left_extends[i2, k]
+            i1 -= 1
+            column(seq1[i1], "-")
+        if not extends:
+            state = _DIAG
+    return ("".join(reversed(top)), "".join(reversed(track)), "".join(reversed(bottom)))
@@ -0,0 +1,191 @@
+"""Per-stage metrics and opt-in profiling for comparison runs.
+
+A ``RunMetrics`` is passed down the pipeline (``compare_intervals``,
+``engine.compare_all``, ``engine.score_pair``, ...) the same way the
+cancel Event is; every function accepts ``metrics=None`` and then costs
+nothing extra.  Each stage accumulates wall time, CPU time of the thread
+that ran it and a call count:
+
+* ``read_genome``, ``read_intervals``, ``composition``, ``genome_gc`` -
+  input parsing and genome composition
+* ``pack``, ``slice``, ``prefilter``, ``digest``, ``cache`` - preparation
+* ``align``, ``statistics`` - per-pair work in this process
+* ``visual`` - alignment pictures, rebuilt only for the pairs shown
+* ``workers`` - time spent waiting on the process pool (whose CPU time is
+  reported separately as ``worker_cpu_seconds``)
+* ``search`` - the branch-and-bound best-pair search
+* ``seeds``, ``chain`` - synteny block seeding and anchor chaining
+* ``render`` / ``write`` - GUI drawing or CLI output
+
+``ProfileCapture`` wraps a run in cProfile and tracemalloc and writes
+both next to a report.
+"""
+
+import contextlib
+import cProfile
+import io
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+# Lines kept in the text dumps of ProfileCapture
+PROFILE_TOP = 40
+
+
+def peak_rss_bytes():
+    """Peak resident set size of this process, or None where unknown"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _children_cpu():
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def stage(metrics, name):
+    """metrics.stage(name), or a no-op context when metrics is None"""
+    return metrics.stage(name) if metrics is not None else contextlib.nullcontext()
+
+
+class RunMetrics:
+    def __init__(self):
+        self.stages = {}  # name -> [wall seconds, cpu seconds, calls]
+        self.pairs = 0
+        self.pairs_aligned = 0
+        self.bases_aligned = 0
+        self.workers = 1
+        self.wall_seconds = None
+        self.cpu_seconds = None
+        self.worker_cpu_seconds = None
+        self._lock = threading.Lock()  # the GUI times rendering on another thread
+        self._started = time.perf_counter()
+        self._cpu_started = time.process_time()
+        self._children_started = _children_cpu()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - wall, time.thread_time() - cpu)
+
+    def add(self, name, wall, cpu, calls=1):
+        with self._lock:
+            entry = self.stages.setdefault(name, [0.0, 0.0, 0])
+            entry[0] += wall
+            entry[1] += cpu
+            entry[2] += calls
+
+    def timed(self, name, records, aligned=False):
+        """Yield from records, timing each step as stage name.
+
+        With aligned, every record also counts as an aligned pair (for
+        records computed where score_pair could not count them).
+        """
+        records = iter(records)
+        try:
+            while True:
+                with self.stage(name):
+                    record = next(records, None)
+                if record is None:
+                    return
+                if aligned:
+                    self.count_aligned(record["len1"], record["len2"])
+                yield record
+        finally:
+            close = getattr(records, "close", None)
+            if close is not None:
+                close()
+
+    def count_aligned(self, len1, len2):
+        with self._lock:
+            self.pairs_aligned += 1
+            self.bases_aligned += len1 + len2
+
+    def finish(self):
+        """Fix the run totals; call once the consumer is done"""
+        self.wall_seconds = time.perf_counter() - self._started
+        self.cpu_seconds = time.process_time() - self._cpu_started
+        self.worker_cpu_seconds = _children_cpu() - self._children_started
+
+    def summary(self):
+        """Plain-dict summary suitable for JSON"""
+        if self.wall_seconds is None:
+            self.finish()
+        with self._lock:
+            stages = {name: {"wall_seconds": wall, "cpu_seconds": cpu, "calls": calls}
+                      for name, (wall, cpu, calls) in self.stages.items()}
+        return {
+            "wall_seconds": self.wall_seconds,
+            "cpu_seconds": self.cpu_seconds,
+            "worker_cpu_seconds": self.worker_cpu_seconds,
+            "workers": self.workers,
+            "pairs": self.pairs,
+            "pairs_aligned": self.pairs_aligned,
+            "bases_aligned": self.bases_aligned,
+            "pairs_per_second": self.pairs / self.wall_seconds if self.wall_seconds else 0.0,
+            "peak_rss_bytes": peak_rss_bytes(),
+            "stages": stages,
+        }
+
+
+def format_summary(summary, limit=None):
+    """One-line rendering of a summary: slowest stages first"""
+    stages = sorted(summary["stages"].items(), key=lambda item: -item[1]["wall_seconds"])
+    parts = [f"{name} {values['wall_seconds']:.2f}s" for name, values in stages[:limit]]
+    parts.append(f"{summary['pairs_per_second']:,.1f} pairs/s")
+    if summary["bases_aligned"]:
+        parts.append(f"{summary['bases_aligned'] / 1e6:,.1f} Mbp aligned")
+    if summary["peak_rss_bytes"] is not None:
+        parts.append(f"peak RSS {summary['peak_rss_bytes'] / (1024 * 1024):,.0f} MiB")
+    return " • ".join(parts)
+
+
+class ProfileCapture:
+    """cProfile of the calling thread plus tracemalloc, dumped beside a report"""
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+        self.snapshot = None
+        self._tracing = False
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+        self.snapshot = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+
+    def dump(self, base):
+        """Write base.prof, base.profile.txt and base.memory.txt; returns the paths"""
+        paths = [base + ".prof", base + ".profile.txt"]
+        self.profile.dump_stats(paths[0])
+        text = io.StringIO()
+        pstats.Stats(self.profile, stream=text).sort_stats("cumulative").print_stats(PROFILE_TOP)
+        with open(paths[1], "w") as f:
+            f.write(text.getvalue())
+        if self.snapshot is not None:
+            paths.append(base + ".memory.txt")
+            with open(paths[2], "w") as f:
+                for statistic in self.snapshot.statistics("lineno")[:PROFILE_TOP]:
+                    f.write(f"{statistic}\n")
+        return paths
@@ -0,0 +1,308 @@
+"""Multi-core all-pairs comparison.
+
+The genome is copied once into ``multiprocessing.shared_memory`` (or, for
+an ``IndexedFasta``, memory-mapped by each worker); workers slice
+chromosome intervals in place, so no chromosome sequence is ever pickled
+to a worker.  The pair matrix is split into
+contiguous chunks of the serial pair order and results are yielded in
+that same order, which keeps output and best-pair tie-breaking identical
+to ``engine.compare_all``.
+
+``python -m synteny.bench scaling`` reports throughput for 1..N workers.
+"""
+
+import multiprocessing
+import os
+from multiprocessing import shared_memory
+
+from . import engine
+from .cache import pair_key, sequence_digest
+from .metrics import stage
+
+try:
+    from .packed import PackedSequence
+except ImportError:  # pragma: no cover - NumPy is optional
+    PackedSequence = None
+
+
+class SharedGenome:
+    """A genome string held once in shared memory.
+
+    Pickling sends only the segment name, so a copy unpickled in a worker
+    attaches to the same memory.  Slicing decodes just that interval.
+    """
+
+    def __init__(self, genome_seq):
+        try:
+            data = genome_seq.encode('ascii')
+            self.encoding, self.width = 'ascii', 1
+        except UnicodeEncodeError:
+            data = genome_seq.encode('utf-32-le')
+            self.encoding, self.width = 'utf-32-le', 4
+        self.length = len(genome_seq)
+        self._shm = shared_memory.SharedMemory(create=True, size=max(1, len(data)))
+        self._shm.buf[:len(data)] = data
+        self._owner = True
+        self.name = self._shm.name
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, key):
+        start, end, _ = key.indices(self.length)
+        end = max(start, end)
+        return str(self._shm.buf[start * self.width:end * self.width], self.encoding)
+
+    def __getstate__(self):
+        return {"name": self.name, "encoding": self.encoding,
+                "width": self.width, "length": self.length}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._shm = shared_memory.SharedMemory(name=self.name)
+        self._owner = False
+
+    def close(self):
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# How often a waiting consumer re-checks its cancel Event
+CANCEL_POLL_SECONDS = 0.1
+
+# Per-process state set up by init_worker
+_worker = {}
+
+
+def init_worker(genome, intervals, method, both_strands=False, gapped=None):
+    """Set the state run_chunk reads; the pool initializer, also used by distributed workers"""
+    _worker["genome"] = genome
+    _worker["intervals"] = intervals
+    _worker["method"] = method
+    _worker["both_strands"] = both_strands
+    _worker["gapped"] = gapped
+
+
+def _sequence(k):
+    chromo_id, start, end = _worker["intervals"][k]
+    return chromo_id, _worker["genome"][start:end]
+
+
+def unrank_pair(index, count):
+    """Map a 0-based position in the serial pair order back to (i, j)"""
+    i = 0
+    row = count - 1
+    while index >= row:
+        index -= row
+        i += 1
+        row -= 1
+    return i, i + 1 + index
+
+
+def rank_pair(i, j, count):
+    """0-based position of pair (i, j), i < j, in the serial pair order"""
+    return i * (2 * count - i - 1) // 2 + (j - i - 1)
+
+
+def _chunk_pairs(first, size):
+    """(index, i, j) for size consecutive pairs of the serial order"""
+    count = len(_worker["intervals"])
+    i, j = unrank_pair(first, count)
+    for index in range(first + 1, first + size + 1):
+        yield index, i, j
+        j += 1
+        if j == count:
+            i += 1
+            j = i + 1
+
+
+def run_chunk(task):
+    """Compare a chunk: either (first, size) of the serial order or a list of (index, i, j)"""
+    pairs = task if isinstance(task, list) else _chunk_pairs(*task)
+    records = []
+    cached = {}
+    for index, i, j in pairs:
+        if i not in cached:
+            cached = {i: _sequence(i)}
+        id1, seq1 = cached[i]
+        id2, seq2 = _sequence(j)
+        record = {"index": index}
+        record.update(engine.compare_pair(id1, seq1, id2, seq2, _worker["method"],
+                                          both_strands=_worker["both_strands"],
+                                          gapped=_worker["gapped"]))
+        records.append(record)
+    return records
+
+
+def chunks(total, size):
+    """(first, size) run_chunk tasks covering the first total pairs of the serial order"""
+    for first in range(0, total, size):
+        yield first, min(size, total - first)
+
+
+def _pair_chunks(pairs, size):
+    for first in range(0, len(pairs), size):
+        yield pairs[first:first + size]
+
+
+def compare_all_parallel(genome_seq, intervals, method="auto", workers=None,
+                         chunk_size=None, cancel=None, pairs=None, both_strands=False,
+                         gapped=None):
+    """Yield the same records as engine.compare_all, computed on a process pool.
+
+    intervals are (chromo_id, start, end) rows from
+    engine.read_chromosome_intervals.  pairs optionally restricts the run
+    to a list of (index, i, j) in report order.  Closing the generator
+    early, or setting the optional cancel Event, terminates the pool.
+    """
+    workers = workers or os.cpu_count() or 1
+    total = len(intervals) * (len(intervals) - 1) // 2 if pairs is None else len(pairs)
+    if total == 0:
+        return
+    if chunk_size is None:
+        chunk_size = max(1, min(256, total // (workers * 4)))
+    tasks = chunks(total, chunk_size) if pairs is None else _pair_chunks(pairs, chunk_size)
+
+    # A plain string is copied into shared memory once; file-backed genomes
+    # (IndexedFasta) are reopened and mapped by each worker instead
+    shared = SharedGenome(genome_seq) if isinstance(genome_seq, str) else None
+    try:
+        pool = multiprocessing.Pool(
+            workers,
+            initializer=init_worker,
+            initargs=(shared if shared is not None else genome_seq, list(intervals), method,
+                      both_strands, gapped))
+        try:
+            results = pool.imap(run_chunk, tasks)
+            for _ in range(0, total, chunk_size):
+                while True:
+                    if cancel is not None and cancel.is_set():
+                        return
+                    try:
+                        records = results.next(CANCEL_POLL_SECONDS)
+                        break
+                    except multiprocessing.TimeoutError:
+                        continue
+                yield from records
+            pool.close()
+        finally:
+            pool.terminate()
+            pool.join()
+    finally:
+        if shared is not None:
+            shared.close()
+
+
+def compare_intervals(genome_seq, intervals, method="auto", workers=1, cancel=None,
+                      packed=None, cache=None, prefilter=None, metrics=None, composition=None,
+                      both_strands=False, gapped=None):
+    """Serial or parallel comparison of genome intervals, in report order.
+
+    In serial mode the genome is packed 2 bits per base (when NumPy is
+    available, or packed=True) and chromosomes are zero-copy views into it.
+    With a cache.ResultCache only pairs it does not hold are aligned.  A
+    sketch.Prefilter restricts the run to the candidate pairs it selects
+    (chosen before this function returns).  metrics is an optional
+    metrics.RunMetrics filled in as the records are consumed.  A
+    composition.CompositionIndex of the genome lets packed chromosomes
+    answer the GC statistics without rescanning.  both_strands also scores
+    the reverse complement of each pair's second sequence; gapped is an
+    optional gapped.GappedModel replacing ungapped sliding.
+    """
+    if packed is None:
+        packed = workers == 1 and PackedSequence is not None
+    if metrics is not None:
+        metrics.workers = workers or os.cpu_count() or 1
+    with stage(metrics, "pack"):
+        source = PackedSequence.from_genome(genome_seq) if packed else genome_seq
+    if packed:
+        source.composition = composition
+
+    def sequence(k):
+        chromo_id, start, end = intervals[k]
+        return chromo_id, source.view(start, end) if packed else source[start:end]
+
+    pairs = None
+    if prefilter is not None:
+        with stage(metrics, "prefilter"):
+            pairs = prefilter.select(sequence(k)[1] for k in range(len(intervals)))
+
+    if cache is not None:
+        return _compare_cached(genome_seq, intervals, sequence, method, workers, cancel, cache,
+                               pairs, metrics, both_strands, gapped)
+    if workers == 1:
+        with stage(metrics, "slice"):
+            chromo_list = [sequence(k) for k in range(len(intervals))]
+        return engine.compare_all(chromo_list, method, cancel, pairs, metrics, both_strands, gapped)
+    records = compare_all_parallel(genome_seq, intervals, method, workers, cancel=cancel, pairs=pairs,
+                                   both_strands=both_strands, gapped=gapped)
+    return metrics.timed("workers", records, aligned=True) if metrics is not None else records
+
+
+# Record fields that are not part of the cached pair result
+_RECORD_ONLY = ("index", "id1", "id2")
+
+# Cache writes are committed in batches of this many pairs
+_CACHE_COMMIT_EVERY = 100
+
+
+def _compare_cached(genome_seq, intervals, sequence, method, workers, cancel, cache, pairs,
+                    metrics=None, both_strands=False, gapped=None):
+    count = len(intervals)
+    with stage(metrics, "digest"):
+        digests = [sequence_digest(sequence(k)[1]) for k in range(count)]
+    if pairs is None:
+        pairs = engine.numbered_pairs(count)
+
+    # Only pairs the cache cannot answer are sent to the process pool
+    computed = None
+    misses = set()
+    if workers != 1:
+        pairs = list(pairs)
+        with stage(metrics, "cache"):
+            pending = [(index, i, j) for index, i, j in pairs
+                       if not cache.contains(pair_key(digests[i], digests[j], both_strands, gapped))]
+        misses = {index for index, _, _ in pending}
+        computed = compare_all_parallel(genome_seq, intervals, method, workers,
+                                        cancel=cancel, pairs=pending, both_strands=both_strands,
+                                        gapped=gapped)
+        if metrics is not None:
+            computed = metrics.timed("workers", computed, aligned=True)
+
+    try:
+        for done, (index, i, j) in enumerate(pairs, 1):
+            if cancel is not None and cancel.is_set():
+                return
+            key = pair_key(digests[i], digests[j], both_strands, gapped)
+            if index in misses:
+                record = next(computed, None)
+                if record is None:  # cancelled inside the pool
+                    return
+                cache.misses += 1
+                with stage(metrics, "cache"):
+                    cache.put(key, {k: v for k, v in record.items() if k not in _RECORD_ONLY})
+            else:
+                with stage(metrics, "cache"):
+                    result = cache.get(key)
+                if result is None:
+                    result = engine.score_pair(sequence(i)[1], sequence(j)[1], method, metrics,
+                                               both_strands, gapped)
+                    with stage(metrics, "cache"):
+                        cache.put(key, result)
+                record = {"index": index}
+                record.update(engine.pair_record(intervals[i][0], intervals[j][0], result))
+            if done % _CACHE_COMMIT_EVERY == 0:
+                with stage(metrics, "cache"):
+                    cache.commit()
+            yield record
+    finally:
+        cache.commit()
+        if computed is not None:
+            computed.close()
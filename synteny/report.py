@@ -0,0 +1,283 @@
+"""Layout of the comparison report, independent of any widget toolkit.
+
+Each part of the report is a list of segments: ``(text, tag)`` pairs
+where tag names a Text widget style (``"header"``, ``"A"``, ``"match"``,
+...), is a tuple of such names, or is None.  Sequences and alignment
+tracks are collapsed into runs of one tag, so a 1 kbp sequence is a
+handful of segments rather than a thousand.  The GUI inserts a whole
+part with a single ``Text.insert`` call; ``plain_text`` gives the same
+report for export.
+"""
+
+import os
+import re
+
+# Alignments of sequences shorter than this are drawn in the report
+VISUAL_MAX_BP = 1000
+
+# Alignment rows longer than this are drawn as stacked blocks of this width
+VISUAL_WIDTH = 100
+
+_NUCLEOTIDE_RUN = re.compile(r"[Aa]+|[TtUu]+|[Cc]+|[Gg]+|[^AaTtUuCcGg]+")
+_NUCLEOTIDE_TAGS = {"A": "A", "T": "T", "U": "T", "C": "C", "G": "G"}
+
+_TRACK_RUN = re.compile(r"R+|W+|[^RW]+")
+_TRACK_STYLE = {"R": ("|", "match"), "W": ("·", "mismatch")}
+
+# Synteny blocks listed in the report, best first
+BLOCKS_SHOWN = 20
+
+# Similarity matrices: rows listed, columns shown as numbers, shaded grid width
+MATRIX_ROWS = 60
+MATRIX_COLUMNS = 8
+MATRIX_GRID_WIDTH = 100
+MATRIX_LABEL = 20
+
+_SHADES = " ·░▒▓█"  # no value, then one shade per 20% of similarity
+_SPARK_BARS = "▁▂▃▄▅▆▇█"
+
+_STRAND_NAMES = {"+": "forward (+)", "-": "reverse complement (−)"}
+
+
+def sequence_segments(sequence):
+    """Colour runs of a sequence: one segment per run of the same base"""
+    return [(m.group(), _NUCLEOTIDE_TAGS.get(m.group()[0].upper(), "N"))
+            for m in _NUCLEOTIDE_RUN.finditer(sequence)]
+
+
+def track_segments(alignment_line):
+    """Match (|), mismatch (·) and gap runs of an R/W/X alignment track"""
+    segments = []
+    for m in _TRACK_RUN.finditer(alignment_line):
+        char, tag = _TRACK_STYLE.get(m.group()[0], (" ", "gap"))
+        segments.append((char * len(m.group()), tag))
+    return segments
+
+
+def alignment_segments(seq1, seq2, alignment_line, width=VISUAL_WIDTH):
+    """The "Alignment Visualization" block for one alignment visual"""
+    segments = [("\nAlignment Visualization:\n", "subheader")]
+    columns = max(len(seq1), len(seq2), len(alignment_line))
+    step = width if columns > width else max(1, columns)
+    for start in range(0, columns, step):
+        if start:
+            segments.append(("\n", None))
+        end = start + step
+        segments.append(("Reference: ", None))
+        segments.extend(sequence_segments(seq1[start:end]))
+        segments.append(("\n           ", None))
+        segments.extend(track_segments(alignment_line[start:end]))
+        segments.append(("\nComparison: ", None))
+        segments.extend(sequence_segments(seq2[start:end]))
+        segments.append(("\n", None))
+    return segments
+
+
+def can_visualize(record, max_bp=VISUAL_MAX_BP):
+    return record["len1"] < max_bp and record["len2"] < max_bp
+
+
+def header_segments(info, genome_file, chromo_file):
+    """Title, warnings and genome/chromosome summary"""
+    gc_content = info["gc_content"]
+    segments = [("GENOME COMPARISON REPORT\n", "header"), ("=" * 60 + "\n\n", None)]
+    for message in info["warnings"]:
+        segments.append((f"⚠ Warning: {message}\n", None))
+    segments += [
+        ("Genome Information:\n", "subheader"),
+        (f"• File: {os.path.basename(genome_file)}\n", None),
+        (f"• Length: {info['genome_length']:,} bp\n", None),
+        (f"• GC Content: {gc_content:.1%}\n\n" if gc_content is not None else "• GC Content: N/A\n\n", None),
+        ("Chromosome Information:\n", "subheader"),
+        (f"• File: {os.path.basename(chromo_file)}\n", None),
+        (f"• Chromosomes to compare: {info['chromosomes']}\n\n", None),
+        ("Pairwise Comparisons:\n", "subheader"),
+        ("=" * 60 + "\n\n", None),
+    ]
+    return segments
+
+
+def assemblies_header_segments(info):
+    """Title, warnings and assembly summary of a cross-genome run"""
+    segments = [("GENOME COMPARISON REPORT\n", "header"), ("=" * 60 + "\n\n", None)]
+    for message in info["warnings"]:
+        segments.append((f"⚠ Warning: {message}\n", None))
+    segments.append(("Assemblies:\n", "subheader"))
+    for assembly in info["assemblies"]:
+        segments.append((f"• {assembly['name']}: {assembly['genome_length']:,} bp, "
+                         f"{assembly['chromosomes']} chromosomes\n", None))
+    segments += [(f"\nComparisons: {info['total']:,}\n\n", None),
+                 ("Similarity Matrices:\n", "subheader"),
+                 ("=" * 60 + "\n", None)]
+    return segments
+
+
+def _clip(text, width):
+    return text if len(text) <= width else text[:width - 1] + "…"
+
+
+def _shade(value):
+    if value is None:
+        return " "
+    return _SHADES[1 + min(4, int(value // 20))]
+
+
+def matrix_segments(matrix, max_rows=MATRIX_ROWS, max_columns=MATRIX_COLUMNS):
+    """One crossgenome.SimilarityMatrix: percentages when narrow, a shaded grid when wide"""
+    rows, cols = matrix.shape
+    segments = [(f"\n{matrix.name1} (rows) × {matrix.name2} (columns): {rows} × {cols}\n",
+                 "highlight")]
+    best = matrix.best
+    if best is not None:
+        segments.append((f"• Best: {best['id1']} vs {best['id2']} "
+                         f"({best['similarity']:.2f}%)\n", None))
+    label = min(MATRIX_LABEL, max([len(chromo_id) for chromo_id in matrix.ids1], default=0))
+    numeric = cols <= max_columns
+    if numeric:
+        header = "".join(f"{_clip(chromo_id, 7):>8}" for chromo_id in matrix.ids2)
+        segments.append((" " * label + header + "\n", "subheader"))
+    else:
+        segments.append((f"Shading: {_SHADES[1]} <20% {_SHADES[2]} <40% {_SHADES[3]} <60% "
+                         f"{_SHADES[4]} <80% {_SHADES[5]} ≥80%; first {MATRIX_GRID_WIDTH} "
+                         "columns\n", None))
+    for chromo_id, values in list(zip(matrix.ids1, matrix.similarity))[:max_rows]:
+        if numeric:
+            cells = "".join("       -" if v is None else f"{v:8.2f}" for v in values)
+        else:
+            cells = "".join(_shade(v) for v in values[:MATRIX_GRID_WIDTH])
+        segments.append((f"{_clip(chromo_id, label):<{label}} {cells}\n", None))
+    if rows > max_rows:
+        segments.append((f"… and {rows - max_rows:,} more rows (all are saved with an exported "
+                         "report)\n", None))
+    return segments
+
+
+def strand_segments(record):
+    """Strand line of a both-strand record; nothing for forward-only runs"""
+    if "strand" not in record:
+        return []
+    return [(f"• Strand: {_STRAND_NAMES[record['strand']]}\n", None)]
+
+
+def score_segments(record):
+    """Alignment score line of a gapped record; nothing for ungapped runs"""
+    if record.get("score") is None:
+        return []
+    return [(f"• Alignment score: {record['score']}\n", None)]
+
+
+def link_tag(record):
+    """Tag of the show/hide alignment link of a record"""
+    return f"pair-{record['index']}"
+
+
+def dotplot_tag(record):
+    """Tag of the dot plot link of a record"""
+    return f"dots-{record['index']}"
+
+
+def comparison_segments(record, visual=None, links=True, max_bp=VISUAL_MAX_BP):
+    """One pair result.
+
+    visual (from engine.record_visual) is drawn when given; otherwise, with
+    links, a "Show alignment" link tagged ("link", link_tag(record)) marks
+    the pairs that can be drawn.  With links every pair also gets a "Dot
+    plot" link tagged ("link", dotplot_tag(record)).
+    """
+    id1, id2 = record["id1"], record["id2"]
+    segments = [
+        (f"Comparison {record['index']}: {id1} vs {id2}\n", "highlight"),
+        (f"• Similarity: {record['similarity']:.2f}%\n", None),
+        *strand_segments(record),
+        *score_segments(record),
+        (f"• Length ratio: {record['length_ratio']}\n", None),
+        (f"• GC Content: {id1}={record['gc_content1']}, {id2}={record['gc_content2']}\n\n", None),
+    ]
+    if record["offset"] is not None and can_visualize(record, max_bp):
+        if visual:
+            if links:
+                segments.append(("▾ Hide alignment\n", ("link", link_tag(record))))
+            segments += alignment_segments(visual[0], visual[2], visual[1])
+        elif links:
+            segments.append(("▸ Show alignment\n", ("link", link_tag(record))))
+    elif record["offset"] is not None:
+        segments.append((f"[Alignment visualization available for sequences < {max_bp}bp]\n", None))
+    if links:
+        segments.append(("▸ Dot plot\n", ("link", dotplot_tag(record))))
+    segments.append(("-" * 60 + "\n\n", None))
+    return segments
+
+
+def sparkline(values):
+    """Bars scaled to the range of values; None (an empty window) is a space"""
+    present = [v for v in values if v is not None]
+    if not present:
+        return " " * len(values)
+    low, high = min(present), max(present)
+    scale = (len(_SPARK_BARS) - 1) / (high - low) if high > low else 0
+    return "".join(" " if v is None else _SPARK_BARS[round((v - low) * scale)] for v in values)
+
+
+def composition_segments(profiles):
+    """The "Chromosome Composition" section: one summary and GC profile per chromosome"""
+    segments = [("\n" + "=" * 60 + "\n", None),
+                ("Chromosome Composition:\n", "subheader"),
+                ("GC as in the pair statistics; profile from start to end, "
+                 "scaled per chromosome\n\n", None)]
+    for profile in profiles:
+        gc = f"{profile['gc']:.1%}" if profile["gc"] is not None else "N/A"
+        n_fraction = f"{profile['n_fraction']:.1%}" if profile["n_fraction"] is not None else "N/A"
+        segments.append((f"• {profile['id']}: {profile['length']:,} bp, GC {gc}, N {n_fraction}\n",
+                         None))
+        values = [v for v in profile["profile"] if v is not None]
+        if values:
+            segments.append((f"  {sparkline(profile['profile'])}  "
+                             f"{min(values):.1%}–{max(values):.1%}\n", None))
+    return segments
+
+
+def block_segments(blocks, limit=BLOCKS_SHOWN):
+    """The "Synteny Blocks" section: totals, then the highest-scoring blocks"""
+    pairs = len({block["index"] for block in blocks})
+    inverted = sum(block["strand"] == "-" for block in blocks)
+    segments = [("\n" + "=" * 60 + "\n", None),
+                ("Synteny Blocks:\n", "subheader"),
+                (f"{len(blocks):,} blocks in {pairs:,} chromosome pairs ({inverted:,} inverted)\n\n",
+                 None)]
+    ranked = sorted(blocks, key=lambda block: (-block["score"], block["index"]))
+    for block in ranked[:limit]:
+        segments.append((f"• {block['id1']}:{block['start1']:,}-{block['end1']:,} ⇄ "
+                         f"{block['id2']}:{block['start2']:,}-{block['end2']:,} "
+                         f"({_STRAND_NAMES[block['strand']]}), {block['anchors']:,} anchors, "
+                         f"score {block['score']:,.0f}\n", None))
+    if len(ranked) > limit:
+        segments.append((f"… and {len(ranked) - limit:,} more (all are saved with an exported "
+                         "report)\n", None))
+    return segments
+
+
+def cancelled_segments(comparison_count):
+    return [(f"\n⚠ Analysis cancelled after {comparison_count} comparisons; "
+             "results below are partial.\n", "highlight")]
+
+
+def best_match_segments(record, visual=None, max_bp=VISUAL_MAX_BP):
+    """The best match section closing the report; visual is only drawn for short pairs"""
+    segments = [
+        ("\n" + "=" * 60 + "\n", None),
+        ("★ BEST MATCH RESULT ★\n", "best"),
+        (f"• Chromosome Pair: {record['id1']} and {record['id2']}\n", None),
+        *strand_segments(record),
+        *score_segments(record),
+        (f"• Similarity Score: {record['similarity']:.2f}%\n\n", None),
+    ]
+    if record["offset"] is not None:
+        if not can_visualize(record, max_bp):
+            segments.append(("[Full alignment not shown for long sequences]\n", None))
+        elif visual:
+            segments += alignment_segments(visual[0], visual[2], visual[1])
+    return segments
+
+
+def plain_text(segments):
+    return "".join(text for text, _ in segments)
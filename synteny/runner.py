@@ -0,0 +1,317 @@
+"""Run a full comparison on a background thread.
+
+The GUI must never block on file parsing or alignment, so a
+``BackgroundRun`` does both on a worker thread and posts messages to a
+queue that the caller drains at its own pace:
+
+* ``("start", info)`` - input files parsed; info holds genome length, GC
+  content, chromosome count, pair total, any interval warnings and, with
+  NumPy, per-chromosome composition and GC profiles
+* ``("pair", record)`` - one finished comparison, in report order; with
+  best_only, a single message carrying the best pair.  Records carry no
+  alignment picture; ``visual(record)`` rebuilds it for the pairs shown
+* ``("matrices", matrices)`` - with further assemblies, the
+  ``crossgenome.SimilarityMatrix`` list, once every pair is done; no
+  "pair" messages are posted and "start" info lists the assemblies
+* ``("blocks", blocks)`` - with blocks=True, the synteny blocks
+  (``blocks.find_blocks``) once every pair is done
+* ``("finished", None)``, ``("cancelled", None)`` or ``("error", exc)``
+  - always the last message
+
+With stream_path, pair records are also written to that file (format
+from its name, gzip for ``.gz``; see ``export``) on the worker thread as
+they are produced, followed by a summary, so the file is complete
+whatever the GUI has rendered.
+
+``metrics`` collects per-stage timings as the run goes (the caller adds
+its own rendering stage and calls ``metrics.finish()``); with
+profile=True the worker thread also runs under a
+``metrics.ProfileCapture``, available as ``profile`` once it ends.
+"""
+
+import queue
+import sqlite3
+import threading
+import time
+
+from . import engine
+from .cache import DEFAULT_MAX_BYTES, ResultCache
+from .crossgenome import (assembly_pairs, collect_matrices, compare_assemblies, open_assembly,
+                          unique_names)
+from .export import best_summary, format_for_path, open_output, pair_columns, record_writer
+from .fasta import open_genome, record_spans
+from .metrics import ProfileCapture, RunMetrics
+from .parallel import compare_intervals, unrank_pair
+from .search import best_pair_intervals
+
+try:
+    from .composition import chromosome_profiles, load_composition
+except ImportError:  # pragma: no cover - NumPy is optional
+    load_composition = None
+
+try:
+    from .blocks import find_blocks
+except ImportError:  # pragma: no cover - NumPy is optional
+    find_blocks = None
+
+
+class BackgroundRun:
+    def __init__(self, genome_file, chromo_file, method="auto", workers=1,
+                 cache_path=None, cache_max_bytes=DEFAULT_MAX_BYTES, prefilter=None,
+                 best_only=False, profile=False, both_strands=False, gapped=None,
+                 blocks=False, assemblies=(), stream_path=None):
+        self.genome_file = genome_file
+        self.chromo_file = chromo_file
+        self.method = method
+        self.workers = workers
+        self.cache_path = cache_path
+        self.cache_max_bytes = cache_max_bytes
+        self.prefilter = prefilter
+        self.best_only = best_only
+        self.both_strands = both_strands
+        self.gapped = gapped  # gapped.GappedModel, or None for ungapped
+        self.blocks = blocks
+        # Further (genome_file, chromo_file) pairs for a cross-genome run
+        self.assemblies = list(assemblies)
+        self.stream_path = stream_path
+        self.search_stats = None
+        self.metrics = RunMetrics()
+        self.profile = ProfileCapture() if profile else None
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.queue = queue.Queue()
+        self.total = 0
+        self.done = 0
+        self.started = None
+        self.genome_seq = None
+        self.intervals = None
+        self.loaded = None  # crossgenome.Assembly list of a cross-genome run
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread.start()
+
+    def cancel(self):
+        """Ask the run to stop; a ("cancelled", None) message follows"""
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def is_alive(self):
+        return self._thread.is_alive()
+
+    def join(self, timeout=None):
+        self._thread.join(timeout)
+
+    def drain(self, limit=None):
+        """Return up to limit queued messages without blocking"""
+        messages = []
+        while limit is None or len(messages) < limit:
+            try:
+                messages.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return messages
+
+    def pairs_per_second(self):
+        if self.started is None:
+            return 0.0
+        elapsed = time.perf_counter() - self.started
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    def eta_seconds(self):
+        """Estimated seconds left, or None before the first pair finishes"""
+        rate = self.pairs_per_second()
+        if rate <= 0:
+            return None
+        return (self.total - self.done) / rate
+
+    def sequences(self, record):
+        """(seq1, seq2) of a record from this run"""
+        if "assembly1" in record:
+            loaded = {assembly.name: assembly for assembly in self.loaded}
+            assembly1, assembly2 = loaded[record["assembly1"]], loaded[record["assembly2"]]
+            genome1, (_, start1, end1) = assembly1.genome, assembly1.intervals[record["row"]]
+            genome2, (_, start2, end2) = assembly2.genome, assembly2.intervals[record["col"]]
+        else:
+            i, j = unrank_pair(record["index"] - 1, len(self.intervals))
+            genome1 = genome2 = self.genome_seq
+            (_, start1, end1), (_, start2, end2) = self.intervals[i], self.intervals[j]
+        return genome1[start1:end1], genome2[start2:end2]
+
+    def visual(self, record):
+        """Alignment visual of a record from this run (see engine.record_visual)"""
+        seq1, seq2 = self.sequences(record)
+        return engine.record_visual(record, seq1, seq2, self.metrics, gapped=self.gapped)
+
+    def _run(self):
+        if self.profile is not None:
+            self.profile.start()
+        try:
+            message = self._run_stages()
+        finally:
+            if self.profile is not None:
+                self.profile.stop()
+        self.metrics.pairs = self.done
+        self.queue.put(message)
+
+    def _run_stages(self):
+        """Do the whole run; returns the final message"""
+        warnings = []
+        cache = None
+        if self.cache_path and not self.best_only:
+            try:
+                cache = ResultCache(self.cache_path, self.cache_max_bytes)
+            except (OSError, sqlite3.Error) as e:
+                warnings.append(f"Result cache unavailable ({e}); all pairs will be aligned.")
+        try:
+            self._compare(warnings, cache)
+        except Exception as e:
+            return ("error", e)
+        finally:
+            if cache is not None:
+                self.cache_hits, self.cache_misses = cache.hits, cache.misses
+                cache.close()
+        cancelled = self.cancelled and self.done < self.total
+        return ("cancelled" if cancelled else "finished", None)
+
+    def _compare(self, warnings, cache):
+        metrics = self.metrics
+        if self.assemblies:
+            self._compare_assemblies(warnings)
+            return
+        with metrics.stage("read_genome"):
+            genome_seq = open_genome(self.genome_file, warn=warnings.append)
+        with metrics.stage("read_intervals"):
+            intervals = engine.read_chromosome_intervals(
+                self.chromo_file, len(genome_seq), warn=warnings.append,
+                records=record_spans(genome_seq))
+        # Kept for visual(); the genome is memory-mapped, not read into memory
+        self.genome_seq, self.intervals = genome_seq, intervals
+        if self.blocks and find_blocks is None:
+            warnings.append("Synteny blocks need NumPy; they are not computed.")
+        composition = None
+        if load_composition is not None:
+            with metrics.stage("composition"):
+                composition = load_composition(genome_seq)
+        if self.best_only:
+            self._search(genome_seq, intervals, warnings, composition)
+        else:
+            self._compare_pairs(genome_seq, intervals, warnings, cache, composition)
+        if self.blocks and find_blocks is not None and not self.cancelled:
+            blocks = list(find_blocks(genome_seq, intervals, cancel=self._cancel,
+                                      metrics=metrics))
+            if not self.cancelled:
+                self.queue.put(("blocks", blocks))
+
+    def _compare_pairs(self, genome_seq, intervals, warnings, cache, composition):
+        metrics = self.metrics
+        records = compare_intervals(genome_seq, intervals, self.method, self.workers,
+                                    cancel=self._cancel, cache=cache, prefilter=self.prefilter,
+                                    metrics=metrics, composition=composition,
+                                    both_strands=self.both_strands, gapped=self.gapped)
+        if self.prefilter is not None:
+            self.total = self.prefilter.selected
+        else:
+            self.total = len(intervals) * (len(intervals) - 1) // 2
+        self._post_start(genome_seq, intervals, warnings, composition)
+
+        for record in self._stream(records):
+            self.done += 1
+            self.queue.put(("pair", record))
+
+    def _search(self, genome_seq, intervals, warnings, composition):
+        self.total = len(intervals) * (len(intervals) - 1) // 2
+        self._post_start(genome_seq, intervals, warnings, composition)
+        with self.metrics.stage("search"):
+            record, self.search_stats = best_pair_intervals(genome_seq, intervals, self.method,
+                                                            cancel=self._cancel,
+                                                            both_strands=self.both_strands,
+                                                            gapped=self.gapped)
+        if self.cancelled:
+            return
+        self.done = self.total
+        for record in self._stream([record] if record is not None else []):
+            self.queue.put(("pair", record))
+
+    def _compare_assemblies(self, warnings):
+        if self.best_only or self.blocks:
+            warnings.append("Best Match Only and Synteny Blocks apply to single-genome runs; "
+                            "all assembly pairs are compared.")
+        with self.metrics.stage("read_genome"):
+            loaded = [open_assembly(genome_file, chromo_file, warn=warnings.append)
+                      for genome_file, chromo_file in
+                      [(self.genome_file, self.chromo_file)] + self.assemblies]
+        self.loaded = loaded = unique_names(loaded)
+        self.total = sum(len(loaded[a].intervals) * len(loaded[b].intervals)
+                         for a, b in assembly_pairs(len(loaded)))
+        self.queue.put(("start", {
+            "assemblies": [{"name": assembly.name, "genome_length": len(assembly.genome),
+                            "chromosomes": len(assembly.intervals)} for assembly in loaded],
+            "total": self.total,
+            "warnings": warnings,
+        }))
+        records = compare_assemblies(loaded, self.method, self.both_strands, self.gapped,
+                                     cancel=self._cancel, metrics=self.metrics)
+        records = self._stream(records, cross=True)
+        self.queue.put(("matrices", collect_matrices(loaded, self._count(records))))
+
+    def _count(self, records):
+        for record in records:
+            self.done += 1
+            yield record
+
+    def _stream(self, records, cross=False):
+        """records, also written to stream_path as they pass"""
+        if self.stream_path is None:
+            yield from records
+            return
+        best = engine.BestPair()
+        count = 0
+        with open_output(self.stream_path) as f:
+            writer = record_writer(format_for_path(self.stream_path), f,
+                                   pair_columns(self.both_strands, self.gapped is not None, cross))
+            for record in records:
+                with self.metrics.stage("write"):
+                    writer.write(record)
+                best.update(record)
+                count += 1
+                yield record
+            writer.finish({
+                "comparisons": count,
+                "cancelled": self.cancelled,
+                "best": best_summary(best.record) if best.record is not None else None,
+            })
+
+    def _post_start(self, genome_seq, intervals, warnings, composition):
+        profiles = None
+        with self.metrics.stage("genome_gc"):
+            if composition is not None:
+                gc_content = composition.gc_content()
+                profiles = chromosome_profiles(composition, intervals)
+            else:
+                gc_content = engine.gc_content(genome_seq)
+        self.queue.put(("start", {
+            "genome_length": len(genome_seq),
+            "gc_content": gc_content,
+            "chromosomes": len(intervals),
+            "composition": profiles,
+            "total": self.total,
+            "warnings": warnings,
+        }))
+
+
+def format_duration(seconds):
+    """Render seconds as H:MM:SS, or '--:--' when unknown"""
+    if seconds is None:
+        return "--:--"
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes:02d}:{seconds:02d}"
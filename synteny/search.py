@@ -0,0 +1,206 @@
+"""Exact branch-and-bound search for the single best pair.
+
+The report headline only needs the pair ``engine.BestPair`` would pick
+from an exhaustive run: the highest similarity, the earliest pair on
+ties.  This search returns exactly that pair while aligning far fewer:
+
+* every pair gets a composition bound - an ungapped placement cannot
+  match more of a character than the rarer of the two sequences holds -
+  and pairs are visited strongest bound first, so an early good pair
+  prunes every pair whose bound cannot beat it;
+* a visited pair is only aligned over offsets whose overlap is at least
+  the number of matches needed to beat the current best, which shrinks
+  the window of ``seq1`` given to the engine.
+
+With both_strands each strand of ``seq2`` has its own bound (the reverse
+complement's composition is the complemented one) and only the strands
+that could still win are aligned.  A gapped model is bounded the same
+way (gaps never add identities) but each visited pair is aligned in full.
+"""
+
+import time
+from collections import Counter
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy is optional
+    np = None
+
+from . import engine
+from .alignment import best_offset, reverse_complement
+
+try:
+    from .packed import PackedSequence
+except ImportError:  # pragma: no cover - packing needs NumPy
+    PackedSequence = None
+
+
+def composition(seq):
+    """{character code: count} for seq (str or packed view)"""
+    if np is None:
+        return {ord(ch): n for ch, n in Counter(str(seq)).items()}
+    if isinstance(seq, str):
+        try:
+            codes = np.frombuffer(seq.encode('ascii'), dtype=np.uint8)
+        except UnicodeEncodeError:
+            codes = np.frombuffer(seq.encode('utf-32-le'), dtype=np.uint32)
+    else:
+        codes = seq.codes()
+    values, counts = np.unique(codes, return_counts=True)
+    return dict(zip(values.tolist(), counts.tolist()))
+
+
+def complement_composition(comp):
+    """Composition of the reverse complement of a sequence of composition comp"""
+    complemented = Counter()
+    for code, n in comp.items():
+        complemented[ord(reverse_complement(chr(code)))] += n
+    return dict(complemented)
+
+
+def match_upper_bound(comp1, comp2, len1, len2):
+    """Most matches any offset of the two sequences could produce"""
+    shared = sum(min(n, comp2[code]) for code, n in comp1.items() if code in comp2)
+    return min(shared, len1, len2)
+
+
+def _similarity(matches, len2):
+    # Same expression as engine.score_pair so float ties compare identically
+    return (matches / len2) * 100 if len2 else 0.0
+
+
+def _beats(similarity, index, best_similarity, best_index):
+    """Would this pair replace the current best in report order?"""
+    if best_index is None:
+        return similarity > best_similarity
+    return similarity > best_similarity or (similarity == best_similarity and index < best_index)
+
+
+def _matches_needed(len2, index, best_similarity, best_index):
+    """Fewest matches with which this pair would beat the current best"""
+    needed = int(best_similarity * len2 / 100)
+    while needed > 0 and _beats(_similarity(needed - 1, len2), index, best_similarity, best_index):
+        needed -= 1
+    while needed <= len2 and not _beats(_similarity(needed, len2), index, best_similarity, best_index):
+        needed += 1
+    return needed
+
+
+def bounded_best_offset(seq1, seq2, min_matches, method="auto"):
+    """best_offset restricted to offsets overlapping at least min_matches bases.
+
+    Returns (max_match, offset) exactly as best_offset would when the true
+    maximum is >= min_matches, otherwise (0, None).
+    """
+    len1, len2 = len(seq1), len(seq2)
+    min_matches = max(1, min_matches)
+    if min_matches > min(len1, len2):
+        return 0, None
+    # Offsets o with overlap >= min_matches: o in [min_matches - len2, len1 - min_matches]
+    lo, hi = min_matches - len2, len1 - min_matches
+    window_start = max(0, lo)
+    window_end = min(len1, hi + len2)
+    if isinstance(seq1, str):
+        window = seq1[window_start:window_end]
+    else:
+        window = seq1.window(window_start, window_end)
+    max_match, offset = best_offset(window, seq2, method)
+    if offset is None or max_match < min_matches:
+        return 0, None
+    return max_match, offset + window_start
+
+
+def _bounded_strands(seq1, seq2, bounds, needed, method):
+    """(max_match, offset, strand) over the strands whose bound reaches needed"""
+    # Forward first, so it wins ties with the reverse strand
+    max_match, offset, strand = 0, None, "+"
+    for strand_bound, candidate_strand in zip(bounds, ("+", "-")):
+        strand_needed = max(needed, max_match + 1)
+        if strand_bound < strand_needed:
+            continue
+        seq = seq2 if candidate_strand == "+" else reverse_complement(seq2)
+        strand_match, strand_offset = bounded_best_offset(seq1, seq, strand_needed, method)
+        if strand_offset is not None and strand_match > max_match:
+            max_match, offset, strand = strand_match, strand_offset, candidate_strand
+    return max_match, offset, strand
+
+
+def find_best_pair(chromo_list, method="auto", cancel=None, both_strands=False, gapped=None):
+    """Return (best record or None, stats) for chromo_list.
+
+    The record is the one engine.BestPair selects from compare_all, with
+    the same index.  stats counts aligned and pruned pairs.
+    """
+    started = time.perf_counter()
+    comps = [composition(seq) for _, seq in chromo_list]
+    lengths = [len(seq) for _, seq in chromo_list]
+    reverse_comps = [complement_composition(comp) for comp in comps] if both_strands else None
+
+    candidates = []
+    for index, i, j in engine.numbered_pairs(len(chromo_list)):
+        bounds = [match_upper_bound(comps[i], comps[j], lengths[i], lengths[j])]
+        if both_strands:
+            bounds.append(match_upper_bound(comps[i], reverse_comps[j], lengths[i], lengths[j]))
+        candidates.append((_similarity(max(bounds), lengths[j]), index, i, j, bounds))
+    candidates.sort(key=lambda item: (-item[0], item[1]))
+
+    best_similarity, best_index, best = 0, None, None
+    aligned = 0
+    for bound, index, i, j, bounds in candidates:
+        if cancel is not None and cancel.is_set():
+            break
+        if not _beats(bound, index, best_similarity, best_index):
+            break  # sorted by (bound, index): nothing after this can win either
+        id1, seq1 = chromo_list[i]
+        id2, seq2 = chromo_list[j]
+        needed = _matches_needed(lengths[j], index, best_similarity, best_index)
+        if gapped is not None:
+            max_match, offset, strand, score = gapped.score(seq1, seq2, method, both_strands)
+        else:
+            max_match, offset, strand = _bounded_strands(seq1, seq2, bounds, needed, method)
+            score = None
+        aligned += 1
+        if offset is None:
+            continue
+        similarity = _similarity(max_match, lengths[j])
+        if _beats(similarity, index, best_similarity, best_index):
+            best_similarity, best_index = similarity, index
+            best = (i, j, max_match, offset, strand, score)
+
+    record = None
+    if best is not None:
+        i, j, max_match, offset, strand, score = best
+        (id1, seq1), (id2, seq2) = chromo_list[i], chromo_list[j]
+        result = {
+            "len1": lengths[i],
+            "len2": lengths[j],
+            "matches": max_match,
+            "offset": offset,
+            "similarity": best_similarity,
+        }
+        if both_strands:
+            result["strand"] = strand
+        if score is not None:
+            result["score"] = score
+        result.update(engine.calculate_statistics(seq1, seq2))
+        record = {"index": best_index}
+        record.update(engine.pair_record(id1, id2, result))
+
+    stats = {
+        "pairs": len(candidates),
+        "aligned": aligned,
+        "pruned": len(candidates) - aligned,
+        "seconds": time.perf_counter() - started,
+    }
+    return record, stats
+
+
+def best_pair_intervals(genome_seq, intervals, method="auto", cancel=None, packed=None,
+                        both_strands=False, gapped=None):
+    """find_best_pair over genome intervals, packing the genome like compare_intervals"""
+    if packed is None:
+        packed = PackedSequence is not None
+    source = PackedSequence.from_genome(genome_seq) if packed else genome_seq
+    chromo_list = [(chromo_id, source.view(start, end) if packed else source[start:end])
+                   for chromo_id, start, end in intervals]
+    return find_best_pair(chromo_list, method, cancel, both_strands, gapped)
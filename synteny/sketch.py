@@ -0,0 +1,171 @@
+"""MinHash k-mer sketches for pruning the all-pairs comparison.
+
+Each chromosome is reduced once to a bottom-s MinHash sketch: the ``size``
+smallest 64-bit hashes of its distinct k-mers (k-mers touching anything
+other than A/C/G/T are skipped; case is ignored).  Comparing two sketches
+costs O(size) whatever the sequence lengths, and gives an estimate of
+how much of ``seq2``'s k-mer content also occurs in ``seq1`` - the same
+direction as the similarity ``calculate_alignment`` reports.  With
+canonical k-mers (the smaller of each k-mer and its reverse complement)
+a sequence and its reverse complement have the same sketch, as needed
+for both-strand runs.
+
+``Prefilter`` ranks every pair by that estimate and passes only the top
+candidates, and/or those above a threshold, on to exact alignment.
+``recall_report`` measures what was lost against an exhaustive run; use
+``python -m synteny.bench sketch`` to tune k and sketch size.  Requires
+NumPy.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+_ENCODE = np.full(256, 255, dtype=np.uint8)
+for _code, _base in enumerate(b"ACGT"):
+    _ENCODE[_base] = _code
+    _ENCODE[_base + 32] = _code
+
+MAX_K = 32  # k-mers are packed 2 bits per base into a uint64
+
+Sketch = namedtuple("Sketch", "mins cardinality")
+
+
+def _encode(seq):
+    """2-bit codes of seq, 255 for anything that is not A/C/G/T"""
+    if isinstance(seq, str):
+        try:
+            raw = np.frombuffer(seq.encode('ascii'), dtype=np.uint8)
+        except UnicodeEncodeError:
+            raw = np.frombuffer(seq.encode('utf-32-le'), dtype=np.uint32)
+    else:
+        raw = seq.codes()  # packed.PackedView
+    if raw.dtype == np.uint8:
+        return _ENCODE[raw]
+    return np.where(raw < 256, _ENCODE[np.minimum(raw, 255).astype(np.uint8)], 255).astype(np.uint8)
+
+
+def _mix64(values):
+    """splitmix64 finalizer: spreads packed k-mers over the uint64 range"""
+    with np.errstate(over='ignore'):
+        z = values + np.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return z ^ (z >> np.uint64(31))
+
+
+def _packed_kmers(codes, k, canonical=False):
+    """(forward, reverse or None, valid) packed k-mers of 2-bit codes, one per start"""
+    if not 1 <= k <= MAX_K:
+        raise ValueError(f"k must be between 1 and {MAX_K}")
+    n = max(0, len(codes) - k + 1)
+    bad = np.concatenate(([0], np.cumsum(codes == 255)))
+    valid = (bad[k:] - bad[:-k]) == 0 if n else np.zeros(0, dtype=bool)
+    clean = np.where(codes == 255, 0, codes).astype(np.uint64)
+    forward = np.zeros(n, dtype=np.uint64)
+    for j in range(k):
+        forward <<= np.uint64(2)
+        forward |= clean[j:j + n]
+    reverse = None
+    if canonical:
+        # Codes are A=0 C=1 G=2 T=3, so a base's complement is 3 - code
+        complement = np.uint64(3) - clean
+        reverse = np.zeros(n, dtype=np.uint64)
+        for j in range(k - 1, -1, -1):
+            reverse <<= np.uint64(2)
+            reverse |= complement[j:j + n]
+    return forward, reverse, valid
+
+
+def kmer_hashes(seq, k, canonical=False):
+    """Hashes of every A/C/G/T-only k-mer of seq, in sequence order"""
+    forward, reverse, valid = _packed_kmers(_encode(seq), k, canonical)
+    packed = np.minimum(forward, reverse) if canonical else forward
+    return _mix64(packed[valid])
+
+
+def sketch(seq, k=16, size=256, canonical=False):
+    """Bottom-size MinHash sketch of seq's distinct k-mers"""
+    hashes = np.unique(kmer_hashes(seq, k, canonical))
+    return Sketch(hashes[:size], len(hashes))
+
+
+def containment(sketch1, sketch2):
+    """Estimated fraction of sketch2's k-mers that also occur in sketch1"""
+    if sketch1.cardinality == 0 or sketch2.cardinality == 0:
+        return 0.0
+    size = max(1, min(len(sketch1.mins), len(sketch2.mins)))
+    union = np.union1d(sketch1.mins, sketch2.mins)[:size]
+    shared = np.count_nonzero(np.isin(union, sketch1.mins, assume_unique=True)
+                              & np.isin(union, sketch2.mins, assume_unique=True))
+    jaccard = shared / len(union)
+    intersection = jaccard * (sketch1.cardinality + sketch2.cardinality) / (1 + jaccard)
+    return min(1.0, intersection / sketch2.cardinality)
+
+
+class Prefilter:
+    """Select candidate pairs by sketch estimate.
+
+    top keeps the best N pairs, threshold keeps pairs whose estimate is at
+    least that fraction; with both, a pair must pass both.  After
+    select(), estimates maps pair index to its estimate and selected is
+    the number of candidates.  both_strands sketches canonical k-mers so
+    reverse-complement homologs are found too.
+    """
+
+    def __init__(self, k=16, size=256, top=None, threshold=None, both_strands=False):
+        if top is None and threshold is None:
+            raise ValueError("Prefilter needs top and/or threshold")
+        self.k = k
+        self.size = size
+        self.top = top
+        self.threshold = threshold
+        self.both_strands = both_strands
+        self.estimates = {}
+        self.selected = 0
+
+    def select(self, sequences):
+        """Return the chosen (index, i, j) pairs, in report order"""
+        sketches = [sketch(seq, self.k, self.size, self.both_strands) for seq in sequences]
+        count = len(sketches)
+        self.estimates = {}
+        scored = []
+        index = 0
+        for i in range(count):
+            for j in range(i + 1, count):
+                index += 1
+                estimate = containment(sketches[i], sketches[j])
+                self.estimates[index] = estimate
+                if self.threshold is None or estimate >= self.threshold:
+                    scored.append((estimate, index, i, j))
+        if self.top is not None:
+            # Highest estimate first; earlier pairs win ties
+            scored.sort(key=lambda item: (-item[0], item[1]))
+            scored = scored[:self.top]
+        pairs = sorted((index, i, j) for _, index, i, j in scored)
+        self.selected = len(pairs)
+        return pairs
+
+
+def recall_report(exhaustive_records, selected_indices, ks=(1, 10, 100)):
+    """How many of the exhaustive run's top-k pairs the prefilter kept.
+
+    exhaustive_records are records from a full run; selected_indices are
+    the pair indices the prefilter passed on.  Ranking follows the report:
+    higher similarity first, earlier pair first on ties, so recall@1 says
+    whether the best pair survived.
+    """
+    selected = set(selected_indices)
+    ranked = sorted(exhaustive_records, key=lambda r: (-r["similarity"], r["index"]))
+    report = {
+        "pairs": len(ranked),
+        "candidates": len(selected),
+        "fraction_aligned": len(selected) / len(ranked) if ranked else 0.0,
+        "best_retained": bool(ranked) and ranked[0]["index"] in selected,
+        "recall": {},
+    }
+    for k in ks:
+        top = ranked[:k]
+        if top:
+            report["recall"][k] = sum(r["index"] in selected for r in top) / len(top)
+    return report
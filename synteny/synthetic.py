@@ -0,0 +1,174 @@
+"""Seeded synthetic genomes and chromosome interval files.
+
+Benchmarks need inputs of a known size and structure, from a few kbp to
+Gbp.  ``write_genome`` streams a random genome to FASTA a chunk at a time
+(memory stays O(chunk) whatever the length) and plants repeat families:
+``families`` random templates of ``family_length`` bp, each copy carrying
+``divergence`` substitutions, together making up about
+``repeat_fraction`` of the genome.  Optional runs of N and soft-masked
+(lowercase) stretches exercise the non-ACGT paths.
+
+``write_intervals`` then picks chromosome intervals: a share of them are
+exact repeat copies (so they have strong homologs among the other
+intervals) and the rest are random background.  The same arguments and
+seed always give byte-identical files.  Requires NumPy.
+"""
+
+import numpy as np
+
+LINE_WIDTH = 60
+N_RUN = 100  # length of each N run
+LOWER_RUN = 500  # length of each soft-masked run
+
+_BASES = np.frombuffer(b"ACGT", dtype=np.uint8)
+
+
+def parse_size(text):
+    """'250', '10k', '5M', '1.5G' -> bases"""
+    text = str(text).strip()
+    scale = {"k": 10 ** 3, "m": 10 ** 6, "g": 10 ** 9}.get(text[-1:].lower())
+    if scale is None:
+        return int(text)
+    return int(float(text[:-1]) * scale)
+
+
+def _random_bases(rng, n, gc):
+    at = (1 - gc) / 2
+    return _BASES[rng.choice(4, size=n, p=[at, gc / 2, gc / 2, at])]
+
+
+def _mutate(rng, codes, divergence, gc):
+    codes = codes.copy()
+    hits = np.flatnonzero(rng.random(len(codes)) < divergence)
+    codes[hits] = _random_bases(rng, len(hits), gc)
+    return codes
+
+
+def _sprinkle(rng, codes, fraction, run, value):
+    """Overwrite about fraction of codes with runs of run bases set by value()"""
+    if fraction <= 0 or len(codes) == 0:
+        return
+    for start in rng.integers(0, len(codes), size=rng.poisson(len(codes) * fraction / run)):
+        codes[start:start + run] = value(codes[start:start + run])
+
+
+class _FastaWriter:
+    """Wrap a stream of base codes into FASTA records of LINE_WIDTH columns"""
+
+    def __init__(self, f, record_lengths):
+        self.f = f
+        self.records = list(record_lengths)
+        self.record = -1
+        self.remaining = 0
+        self.column = 0
+
+    def _next_record(self):
+        if self.record >= 0 and self.column:
+            self.f.write(b"\n")
+        self.record += 1
+        self.remaining = self.records[self.record]
+        self.column = 0
+        self.f.write(f">chr{self.record + 1}\n".encode())
+
+    def write(self, codes):
+        data = codes.tobytes()
+        while data:
+            if self.remaining == 0:
+                self._next_record()
+            take, data = data[:self.remaining], data[self.remaining:]
+            self.remaining -= len(take)
+            head = min(len(take), LINE_WIDTH - self.column)
+            lines = [take[:head]]
+            if self.column + head == LINE_WIDTH:
+                lines.append(b"\n")
+            lines.extend(take[pos:pos + LINE_WIDTH] + b"\n"
+                         for pos in range(head, len(take) - LINE_WIDTH + 1, LINE_WIDTH))
+            tail = head + (len(take) - head) // LINE_WIDTH * LINE_WIDTH
+            lines.append(take[tail:])
+            self.f.write(b"".join(lines))
+            self.column = (self.column + len(take)) % LINE_WIDTH
+
+    def close(self):
+        if self.column:
+            self.f.write(b"\n")
+            self.column = 0
+        # Records left empty at the end still get their header
+        while self.record + 1 < len(self.records):
+            self._next_record()
+
+
+def write_genome(path, length, seed=0, records=1, gc=0.5, repeat_fraction=0.1,
+                 families=8, family_length=2000, divergence=0.05, n_fraction=0.0,
+                 lower_fraction=0.0, chunk=1 << 20):
+    """Write a synthetic FASTA of length bases split over records.
+
+    Returns [(family, start, end), ...] for every planted repeat copy, in
+    concatenated genome coordinates.
+    """
+    if not 0 <= repeat_fraction < 1:
+        raise ValueError("repeat_fraction must be in [0, 1)")
+    rng = np.random.default_rng(seed)
+    templates = [_random_bases(rng, family_length, gc) for _ in range(families)]
+    record_lengths = [length // records + (k < length % records) for k in range(records)]
+    # Background gaps between copies are exponential with this mean
+    mean_gap = family_length * (1 - repeat_fraction) / repeat_fraction if repeat_fraction else None
+
+    copies = []
+    pos = 0
+    with open(path, "wb") as f:
+        writer = _FastaWriter(f, record_lengths)
+        while pos < length:
+            gap = length - pos if mean_gap is None else int(rng.exponential(mean_gap))
+            for start in range(0, min(gap, length - pos), chunk):
+                codes = _random_bases(rng, min(chunk, gap - start, length - pos - start), gc)
+                _sprinkle(rng, codes, n_fraction, N_RUN, lambda run: ord("N"))
+                _sprinkle(rng, codes, lower_fraction, LOWER_RUN, lambda run: run | 0x20)
+                writer.write(codes)
+            pos = min(length, pos + gap)
+            if pos < length and families:
+                family = int(rng.integers(families))
+                copy = _mutate(rng, templates[family], divergence, gc)[:length - pos]
+                writer.write(copy)
+                copies.append((family, pos, pos + len(copy)))
+                pos += len(copy)
+        writer.close()
+    return copies
+
+
+def write_intervals(path, genome_length, count, copies=(), seed=0, homologous_fraction=0.5,
+                    min_length=500, max_length=5000):
+    """Write a Chromosome_ID,Start,End CSV of count intervals.
+
+    About homologous_fraction of them are planted repeat copies from
+    write_genome; the rest are random intervals of min_length..max_length.
+    """
+    rng = np.random.default_rng(seed)
+    copies = list(copies)
+    homologous = min(len(copies), int(round(count * homologous_fraction)))
+    chosen = [copies[k] for k in sorted(rng.choice(len(copies), size=homologous, replace=False))] \
+        if homologous else []
+    intervals = [(f"rep{family}_{k}", start, end) for k, (family, start, end) in enumerate(chosen)]
+
+    max_length = max(1, min(max_length, genome_length))
+    min_length = max(1, min(min_length, max_length))
+    for k in range(count - homologous):
+        size = int(rng.integers(min_length, max_length + 1))
+        start = int(rng.integers(0, genome_length - size + 1))
+        intervals.append((f"bg{k}", start, start + size))
+    order = rng.permutation(len(intervals))
+
+    with open(path, "w") as f:
+        f.write("Chromosome_ID,Start,End\n")
+        for k in order:
+            f.write("%s,%d,%d\n" % intervals[k])
+    return len(intervals)
+
+
+def generate(fasta_path, csv_path, length, intervals, seed=0, **options):
+    """write_genome then write_intervals; returns a summary of what was written"""
+    genome_options = {key: options.pop(key) for key in list(options)
+                      if key in ("records", "gc", "repeat_fraction", "families", "family_length",
+                                 "divergence", "n_fraction", "lower_fraction")}
+    copies = write_genome(fasta_path, length, seed, **genome_options)
+    count = write_intervals(csv_path, length, intervals, copies, seed + 1, **options)
+    return {"length": length, "intervals": count, "repeat_copies": len(copies), "seed": seed}
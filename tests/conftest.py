@@ -0,0 +1,21 @@
+import random
+
+import pytest
+
+from synteny import alignment
+
+
+@pytest.fixture
+def rng():
+    return random.Random(20240601)
+
+
+@pytest.fixture(params=["direct", "fft"])
+def engine_path(request, monkeypatch):
+    """Force align_offsets onto its direct-correlation or FFT branch"""
+    monkeypatch.setattr(alignment, "DIRECT_CELLS", 1 << 62 if request.param == "direct" else 0)
+    return request.param
+
+
+def random_dna(rng, length, alphabet="ACGT"):
+    return "".join(rng.choice(alphabet) for _ in range(length))
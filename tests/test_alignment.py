@@ -0,0 +1,54 @@
+import pytest
+
+from conftest import random_dna
+from synteny.alignment import (_best_offset_reference, _calculate_alignment_reference,
+                               best_offset, calculate_alignment)
+
+np = pytest.importorskip("numpy")
+
+
+def test_random_pairs_match_reference(rng, engine_path):
+    for _ in range(150):
+        seq1 = random_dna(rng, rng.randint(1, 60), rng.choice(["ACGT", "AC", "ACGTN"]))
+        seq2 = random_dna(rng, rng.randint(1, 60), rng.choice(["ACGT", "GT", "ACGTN"]))
+        assert calculate_alignment(seq1, seq2, "fft") == _calculate_alignment_reference(seq1, seq2)
+        assert best_offset(seq1, seq2, "fft") == _best_offset_reference(seq1, seq2)
+
+
+@pytest.mark.parametrize("seq1, seq2", [("", ""), ("", "ACGT"), ("ACGT", "")])
+def test_empty_inputs(seq1, seq2, engine_path):
+    for method in ("fft", "reference"):
+        assert calculate_alignment(seq1, seq2, method) == (0.0, [])
+        assert best_offset(seq1, seq2, method) == (0, None)
+
+
+@pytest.mark.parametrize("seq1, seq2", [("A", "A"), ("A", "C"), ("A", "CAG"), ("GTA", "A")])
+def test_length_one_inputs(seq1, seq2, engine_path):
+    assert calculate_alignment(seq1, seq2, "fft") == _calculate_alignment_reference(seq1, seq2)
+    assert best_offset(seq1, seq2, "fft") == _best_offset_reference(seq1, seq2)
+
+
+def test_unequal_lengths(rng, engine_path):
+    seq1 = random_dna(rng, 400)
+    for length in (1, 7, 399, 401, 900):
+        seq2 = random_dna(rng, length)
+        assert calculate_alignment(seq1, seq2, "fft") == _calculate_alignment_reference(seq1, seq2)
+        assert calculate_alignment(seq2, seq1, "fft") == _calculate_alignment_reference(seq2, seq1)
+
+
+@pytest.mark.parametrize("seq1, seq2, expected", [
+    ("ACAC", "AC", (2, 0)),
+    ("TTACGTTACG", "ACG", (3, 2)),
+    ("AAAA", "AAAA", (4, 0)),
+    ("CA", "AC", (1, -1)),
+])
+def test_ties_pick_smallest_offset(seq1, seq2, expected, engine_path):
+    assert _best_offset_reference(seq1, seq2) == expected
+    assert best_offset(seq1, seq2, "fft") == expected
+    assert calculate_alignment(seq1, seq2, "fft") == _calculate_alignment_reference(seq1, seq2)
+
+
+def test_no_match(engine_path):
+    assert best_offset("AAAA", "CCC", "fft") == (0, None)
+    assert calculate_alignment("AAAA", "CCC", "fft") == (0.0, [])
+    assert _calculate_alignment_reference("AAAA", "CCC") == (0.0, [])
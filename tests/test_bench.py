@@ -0,0 +1,69 @@
+import pytest
+
+from synteny.bench import MIN_FLAG_SECONDS, compare_to_baseline, measure_dotplot, measure_stages
+from synteny.fasta import fai_path
+
+
+def results(**stages):
+    """Suite results for one "small" case; stages maps name -> (seconds, peak_bytes)"""
+    return {"cases": {"small": {"stages": {
+        name: {"seconds": seconds, "peak_bytes": peak, "items": 1}
+        for name, (seconds, peak) in stages.items()}}}}
+
+
+def flagged(rows):
+    return {(row["stage"], row["metric"]) for row in rows if row["regression"]}
+
+
+def test_flags_slower_and_bigger_stages():
+    baseline = results(align=(1.0, 1000), parse=(2.0, 1000), stats=(1.0, 1000))
+    current = results(align=(1.3, 1000), parse=(2.4, 1000), stats=(0.5, 2000))
+    rows = compare_to_baseline(current, baseline, tolerance=0.25, memory_tolerance=0.5)
+    assert flagged(rows) == {("align", "seconds"), ("stats", "peak_bytes")}
+    assert len(rows) == 6
+    row = next(row for row in rows if (row["stage"], row["metric"]) == ("align", "seconds"))
+    assert row == {"case": "small", "stage": "align", "metric": "seconds", "baseline": 1.0,
+                   "current": 1.3, "ratio": 1.3, "regression": True}
+
+
+def test_fast_stages_are_not_flagged_on_time():
+    fast = MIN_FLAG_SECONDS / 10
+    rows = compare_to_baseline(results(align=(fast * 5, 10)), results(align=(fast, 10)))
+    assert flagged(rows) == set()
+    rows = compare_to_baseline(results(align=(MIN_FLAG_SECONDS * 2, 10)),
+                               results(align=(fast, 10)))
+    assert flagged(rows) == {("align", "seconds")}
+
+
+def test_only_stages_in_both_are_compared():
+    baseline = results(align=(1.0, 0), parse=(1.0, 10))
+    current = results(align=(1.0, 5), extra=(9.0, 9))
+    current["cases"]["large"] = results(align=(9.0, 9))["cases"]["small"]
+    rows = compare_to_baseline(current, baseline)
+    assert {(row["case"], row["stage"]) for row in rows} == {("small", "align")}
+    # Growth from a zero baseline is infinite
+    assert flagged(rows) == {("align", "peak_bytes")}
+
+
+def test_measure_stages_leaves_the_index_alone(tmp_path):
+    pytest.importorskip("numpy")
+    from synteny.synthetic import generate
+    fasta, csv = str(tmp_path / "g.fasta"), str(tmp_path / "g.csv")
+    generate(fasta, csv, 20_000, 6, seed=2, max_length=1_000)
+    with open(fai_path(fasta), "w") as f:
+        f.write("stale index the benchmark must not touch\n")
+    stages = measure_stages(fasta, csv, repeat=1)
+    assert open(fai_path(fasta)).read() == "stale index the benchmark must not touch\n"
+    assert stages["open_genome"]["items"] == stages["read_genome_file"]["items"] == 20_000
+    assert stages["read_chromosome_file"]["items"] == 6
+    assert stages["all_pairs"]["items"] == 15
+    assert all(measured["seconds"] >= 0 and measured["peak_bytes"] > 0
+               for measured in stages.values())
+
+
+def test_measure_dotplot_zooms_into_the_centre():
+    pytest.importorskip("numpy")
+    views = measure_dotplot(30_000, size=100, zooms=2)
+    assert [view["region"] for view in views] == [
+        (0, 30_000, 0, 30_000), (7_500, 22_500, 7_500, 22_500), (11_250, 18_750, 11_250, 18_750)]
+    assert all(view["hits"] > 0 and view["seconds"] >= 0 for view in views)
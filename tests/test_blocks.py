@@ -0,0 +1,98 @@
+import pytest
+
+from conftest import random_dna
+from synteny.alignment import reverse_complement
+
+np = pytest.importorskip("numpy")
+
+from synteny.blocks import DEFAULT_K, DEFAULT_WINDOW, chain_anchors, find_blocks  # noqa: E402
+
+# Minimizers sample about one seed per window, so block ends fall within
+# a window (plus a k-mer) of the planted segment's ends
+SLACK = DEFAULT_WINDOW + DEFAULT_K
+
+
+def brute_force_chain(pos1, pos2, k, gap_cost):
+    """Best chain score by O(n^2) dynamic programming in pos1 order"""
+    score = {}
+    for j in sorted(range(len(pos1)), key=lambda j: pos1[j]):
+        best = 0.0
+        for i in score:
+            if pos1[i] < pos1[j] and pos2[i] < pos2[j]:
+                best = max(best, score[i] - gap_cost * (pos1[j] - pos1[i] + pos2[j] - pos2[i]))
+        score[j] = k + best
+    return max(score.values())
+
+
+def test_chain_anchors_hand_built():
+    # 0, 1, 2, 4 are collinear; 3 is out of order and 5 is too far to pay off
+    pos1 = [0, 20, 40, 45, 60, 500]
+    pos2 = [0, 20, 40, 10, 60, 900]
+    chains = chain_anchors(pos1, pos2, k=10, gap_cost=0.1, max_gap=10_000, min_anchors=1,
+                           min_score=0)
+    anchors, score = chains[0]
+    assert anchors.tolist() == [0, 1, 2, 4]
+    assert score == pytest.approx(4 * 10 - 0.1 * 3 * 40)
+    assert sorted(a for chain, _ in chains for a in chain.tolist()) == list(range(6))
+
+
+def test_chain_anchors_filters_and_cuts():
+    pos1 = [0, 20, 40, 5000, 5020, 5040]
+    chains = chain_anchors(pos1, pos1, k=10, gap_cost=0.001, max_gap=1000, min_anchors=3,
+                           min_score=0)
+    assert sorted(chain.tolist() for chain, _ in chains) == [[0, 1, 2], [3, 4, 5]]
+    assert chain_anchors(pos1, pos1, k=10, min_anchors=7) == []
+    assert chain_anchors([], []) == []
+
+
+def test_chain_anchors_matches_brute_force(rng):
+    for _ in range(100):
+        n = rng.randint(1, 25)
+        pos1 = [rng.randrange(200) for _ in range(n)]
+        pos2 = [rng.randrange(200) for _ in range(n)]
+        chains = chain_anchors(pos1, pos2, k=15, gap_cost=0.05, max_gap=10_000, min_anchors=1,
+                               min_score=0)
+        assert chains[0][1] == pytest.approx(brute_force_chain(pos1, pos2, 15, 0.05))
+        chain = chains[0][0]
+        assert all(np.diff(np.array(pos1)[chain]) > 0) and all(np.diff(np.array(pos2)[chain]) > 0)
+
+
+@pytest.fixture
+def planted(rng):
+    """Genome of three chromosomes sharing a 3 kbp segment, inverted in the third"""
+    segment = random_dna(rng, 3000)
+    chromosomes = [
+        ("A", random_dna(rng, 2000) + segment + random_dna(rng, 2000)),
+        ("B", random_dna(rng, 1500) + segment + random_dna(rng, 1000)),
+        ("C", random_dna(rng, 1000) + reverse_complement(segment) + random_dna(rng, 1500)),
+    ]
+    genome, intervals = "", []
+    for chromo_id, seq in chromosomes:
+        intervals.append((chromo_id, len(genome), len(genome) + len(seq)))
+        genome += seq
+    # Genome coordinates of the planted copy in each chromosome
+    copies = {"A": 2000, "B": 7000 + 1500, "C": 7000 + 5500 + 1000}
+    return genome, intervals, copies
+
+
+def assert_covers(start, end, copy):
+    assert copy <= start <= copy + SLACK
+    assert copy + 3000 - SLACK <= end <= copy + 3000
+
+
+def test_find_blocks_planted_segments(planted):
+    genome, intervals, copies = planted
+    blocks = list(find_blocks(genome, intervals))
+    assert [(b["index"], b["id1"], b["id2"], b["strand"]) for b in blocks] == [
+        (1, "A", "B", "+"), (2, "A", "C", "-"), (3, "B", "C", "-")]
+    for block in blocks:
+        assert_covers(block["start1"], block["end1"], copies[block["id1"]])
+        assert_covers(block["start2"], block["end2"], copies[block["id2"]])
+        assert block["anchors"] >= 3000 * 2 // (DEFAULT_WINDOW + 1) // 2
+        assert block["score"] > 0
+
+
+def test_find_blocks_unrelated_chromosomes(rng):
+    genome = random_dna(rng, 6000)
+    intervals = [("x", 0, 3000), ("y", 3000, 6000)]
+    assert list(find_blocks(genome, intervals)) == []
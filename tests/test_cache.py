@@ -0,0 +1,109 @@
+import itertools
+
+import pytest
+
+from conftest import random_dna
+from synteny import cache as cache_module
+from synteny.cache import ResultCache, pair_key, sequence_digest
+from synteny.parallel import compare_intervals
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Strictly increasing time.time() so LRU order is deterministic"""
+    ticks = itertools.count(1000)
+    monkeypatch.setattr(cache_module.time, "time", lambda: float(next(ticks)))
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "sub" / "results.sqlite")
+
+
+def test_hits_and_misses(path):
+    with ResultCache(path) as cache:
+        assert cache.get("a") is None
+        cache.put("a", {"similarity": 50.0, "offset": 3})
+        assert cache.get("a") == {"similarity": 50.0, "offset": 3}
+        assert cache.get("b") is None
+        assert cache.contains("a") and not cache.contains("b")
+        assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_reopen_keeps_entries(path):
+    with ResultCache(path) as cache:
+        cache.put("a", [1, 2])
+    with ResultCache(path) as cache:
+        assert cache.get("a") == [1, 2]
+        assert (cache.hits, cache.misses) == (1, 0)
+
+
+def test_key_depends_on_options():
+    pytest.importorskip("numpy")
+    from synteny.gapped import GappedModel, Scoring
+    d1, d2 = sequence_digest("ACGT"), sequence_digest("ACGA")
+    local = GappedModel("local", 16)
+    keys = [
+        pair_key(d1, d2),
+        pair_key(d2, d1),
+        pair_key(d1, d2, both_strands=True),
+        pair_key(d1, d2, gapped=local),
+        pair_key(d1, d2, gapped=GappedModel("global", 16)),
+        pair_key(d1, d2, gapped=GappedModel("local", 32)),
+        pair_key(d1, d2, gapped=GappedModel("local", 16, Scoring(1, -1, 2, 1))),
+        pair_key(d1, d2, both_strands=True, gapped=local),
+    ]
+    assert len(set(keys)) == len(keys)
+    assert pair_key(d1, d2, gapped=GappedModel("local", 16)) == pair_key(d1, d2, gapped=local)
+
+
+def test_digest_ignores_representation():
+    pytest.importorskip("numpy")
+    from synteny.packed import PackedSequence
+    view = PackedSequence.from_string("TTACGTNacgt").view(2, 11)
+    assert sequence_digest(view) == sequence_digest("ACGTNacgt")
+
+
+def test_evicts_least_recently_used(path, clock):
+    with ResultCache(path, max_bytes=10 ** 9) as cache:
+        for key in "abcd":
+            cache.put(key, "x" * 100)
+        entry = cache.size() // 4
+        cache.get("a")  # now the most recently used
+        cache.max_bytes = entry * 2
+        assert cache.evict() == 2
+        assert [key for key in "abcd" if cache.contains(key)] == ["a", "d"]
+        assert cache.size() <= cache.max_bytes
+        assert cache.evict() == 0
+
+
+def test_close_evicts_to_cap(path, clock):
+    cache = ResultCache(path, max_bytes=10 ** 9)
+    for key in "abcde":
+        cache.put(key, "x" * 100)
+    cache.max_bytes = cache.size() // 5 * 3
+    cache.close()
+    with ResultCache(path) as cache:
+        assert [key for key in "abcde" if cache.contains(key)] == ["c", "d", "e"]
+
+
+@pytest.mark.parametrize("both_strands", [False, True])
+def test_cached_run_matches_uncached(path, rng, both_strands):
+    seqs = [random_dna(rng, 60) for _ in range(5)]
+    seqs[3] = seqs[1]  # identical sequences share entries
+    genome = "".join(seqs)
+    intervals = [(f"c{k}", 60 * k, 60 * (k + 1)) for k in range(5)]
+    plain = list(compare_intervals(genome, intervals, both_strands=both_strands))
+
+    with ResultCache(path) as cache:
+        first = list(compare_intervals(genome, intervals, cache=cache, both_strands=both_strands))
+        assert first == plain
+        # (c0, c3) and (c3, c4) repeat the sequences of (c0, c1) and (c1, c4)
+        assert (cache.hits, cache.misses) == (2, 8)
+    with ResultCache(path) as cache:
+        assert list(compare_intervals(genome, intervals, cache=cache,
+                                      both_strands=both_strands)) == plain
+        assert (cache.hits, cache.misses) == (10, 0)
+    with ResultCache(path) as cache:
+        list(compare_intervals(genome, intervals, cache=cache, both_strands=not both_strands))
+        assert (cache.hits, cache.misses) == (2, 8)
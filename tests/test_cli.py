@@ -0,0 +1,130 @@
+import csv
+import gzip
+import json
+
+import pytest
+
+from conftest import random_dna
+from synteny import engine
+from synteny.cli import main
+from synteny.export import pair_columns
+
+COLUMNS = pair_columns()
+
+
+@pytest.fixture
+def inputs(tmp_path, rng):
+    """Genome and chromosome files; chrB repeats chrA, chrD lies past the end"""
+    seq = random_dna(rng, 120)
+    genome = seq[:40] + seq[:40] + seq[80:]
+    genome_path = tmp_path / "genome.fa"
+    genome_path.write_text(">g\n" + "\n".join(genome[i:i + 50] for i in range(0, 120, 50)) + "\n")
+    chromosomes_path = tmp_path / "chromosomes.csv"
+    chromosomes_path.write_text("Chromosome_ID,Start,End\n"
+                                "chrA,0,40\nchrB,40,80\nchrC,80,120\nchrD,500,600\n")
+    chromo_list = [("chrA", genome[:40]), ("chrB", genome[40:80]),
+                   ("chrC", genome[80:]), ("chrD", "")]
+    return str(genome_path), str(chromosomes_path), genome, chromo_list
+
+
+def test_tsv_output(inputs, tmp_path, capsys):
+    genome_path, chromosomes_path, _, chromo_list = inputs
+    out = tmp_path / "out.tsv"
+    assert main([genome_path, chromosomes_path, "-o", str(out)]) == 0
+    lines = out.read_text().splitlines()
+    assert lines[0].split("\t") == COLUMNS
+    expected = list(engine.compare_all(chromo_list))
+    assert len(lines) == 1 + len(expected) == 7
+    for line, record in zip(lines[1:], expected):
+        cells = line.split("\t")
+        assert cells[:5] == [str(record[column]) for column in COLUMNS[:5]]
+        assert cells[5] == f"{record['similarity']:.2f}"
+    err = capsys.readouterr().err
+    assert "warning: Chromosome chrD start position 500 is out of genome range." in err
+    assert "best: chrA vs chrB (100.00%)" in err
+
+
+def test_jsonl_to_stdout(inputs, capsys):
+    genome_path, chromosomes_path, genome, chromo_list = inputs
+    assert main([genome_path, chromosomes_path, "-f", "jsonl"]) == 0
+    rows = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    pairs, summary = rows[:-1], rows[-1]
+    assert [row.pop("type") for row in pairs] == ["pair"] * 6
+    assert pairs == list(engine.compare_all(chromo_list))
+    assert summary == {"type": "summary", "genome_length": len(genome),
+                       "genome_gc_content": engine.gc_content(genome), "chromosomes": 4,
+                       "comparisons": 6,
+                       "best": {"id1": "chrA", "id2": "chrB", "similarity": 100.0}}
+
+
+@pytest.mark.parametrize("name, argv, fmt", [
+    ("out.csv", [], "csv"),
+    ("out.html", [], "html"),
+    ("out.jsonl.gz", [], "jsonl"),
+    ("out.txt", ["-f", "csv", "--gzip"], "csv"),
+    ("report", [], "tsv"),
+])
+def test_output_format_follows_name(inputs, tmp_path, name, argv, fmt):
+    genome_path, chromosomes_path, _, _ = inputs
+    out = tmp_path / name
+    assert main([genome_path, chromosomes_path, "-o", str(out)] + argv) == 0
+    data = out.read_bytes()
+    if name.endswith(".gz") or "--gzip" in argv:
+        data = gzip.decompress(data)
+    text = data.decode("utf-8")
+    if fmt == "csv":
+        rows = list(csv.reader(text.splitlines()))
+        assert rows[0] == COLUMNS and len(rows) == 7
+    elif fmt == "html":
+        assert text.startswith("<!DOCTYPE html>") and text.count("<tr>") == 7
+    elif fmt == "jsonl":
+        kinds = [json.loads(line)["type"] for line in text.splitlines()]
+        assert kinds == ["pair"] * 6 + ["summary"]
+    else:
+        assert text.splitlines()[0].split("\t") == COLUMNS
+
+
+def test_missing_input_exits_with_status_1(inputs, tmp_path, capsys):
+    _, chromosomes_path, _, _ = inputs
+    assert main([str(tmp_path / "missing.fa"), chromosomes_path]) == 1
+    assert capsys.readouterr().err.startswith("synteny: ")
+
+
+@pytest.mark.parametrize("argv", [[], ["g.fa"], ["g.fa", "c.csv", "-f", "xml"],
+                                  ["g.fa", "c.csv", "--method", "fast"],
+                                  ["g.fa", "c.csv", "--gzip"]])
+def test_usage_errors_exit_with_status_2(argv, capsys):
+    with pytest.raises(SystemExit) as exc:
+        main(argv)
+    assert exc.value.code == 2
+    assert "usage: synteny" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("argv, message", [
+    (["--best-only", "--cache"], "--best-only cannot be combined with --cache"),
+    (["--best-only", "-j", "2"], "--best-only cannot be combined with -j"),
+    (["--best-only", "--prefilter-top", "3"],
+     "--best-only cannot be combined with --prefilter-top/--prefilter-min"),
+    (["--blocks", "--prefilter-min", "0.5"],
+     "--blocks cannot be combined with --prefilter-top/--prefilter-min"),
+    (["--blocks", "--cache", "results.sqlite"], "--blocks cannot be combined with --cache"),
+    (["--blocks", "-j", "0"], "--blocks cannot be combined with -j"),
+    (["--blocks", "--gapped", "local"], "--blocks cannot be combined with --gapped"),
+    (["--blocks", "--best-only"], "--blocks and --best-only cannot be combined"),
+    (["--against", "b.fa", "b.csv", "-j", "2"], "--against cannot be combined with -j"),
+    (["--against", "b.fa", "b.csv", "-f", "html", "-o", "x.html"], "--against writes tsv or jsonl"),
+    (["--serve", ":0", "--best-only"], "--serve cannot be combined with --best-only"),
+    (["--serve", "nowhere"], "Expected HOST:PORT"),
+])
+def test_conflicting_options_exit_with_status_2(argv, message, capsys):
+    with pytest.raises(SystemExit) as exc:
+        main(["g.fa", "c.csv"] + argv)
+    assert exc.value.code == 2
+    assert message in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("argv", [["--best-only", "--gapped", "global"],
+                                  ["--blocks", "--both-strands"]])
+def test_compatible_options_run(inputs, tmp_path, argv):
+    genome_path, chromosomes_path, _, _ = inputs
+    assert main([genome_path, chromosomes_path, "-o", str(tmp_path / "out.tsv")] + argv) == 0
@@ -0,0 +1,126 @@
+import os
+
+import pytest
+
+from conftest import random_dna
+from synteny.engine import calculate_statistics, gc_content
+from synteny.fasta import IndexedFasta
+
+np = pytest.importorskip("numpy")
+
+from synteny.composition import (COLUMNS, CompositionIndex, composition_path,  # noqa: E402
+                                 load_composition)
+
+
+def genome_text(rng, length):
+    return random_dna(rng, length, "ACGTACGTacgtNNRY")
+
+
+def expected_counts(text):
+    upper = text.upper()
+    counts = {base: upper.count(base) for base in "ACGTN"}
+    counts["G_upper"] = text.count("G")
+    counts["C_upper"] = text.count("C")
+    return counts
+
+
+@pytest.mark.parametrize("block", [1, 7, 64, 4096])
+def test_counts_match_str_count(rng, block):
+    text = genome_text(rng, 3000)
+    index = CompositionIndex.from_genome(text, block=block, chunk=256)
+    assert index.counts(0, len(text)) == expected_counts(text)
+    for _ in range(200):
+        start, end = sorted(rng.randint(0, len(text)) for _ in range(2))
+        window = text[start:end]
+        assert index.counts(start, end) == expected_counts(window)
+        assert index.count("G", start, end) == window.count("G")
+        assert index.count("C", start, end) == window.count("C")
+        assert index.gc_content(start, end) == gc_content(window)
+
+
+def test_empty_and_clipped_windows(rng):
+    text = genome_text(rng, 100)
+    index = CompositionIndex.from_genome(text, block=16)
+    assert index.counts(50, 50) == dict.fromkeys(COLUMNS, 0)
+    assert index.gc_content(60, 40) is None
+    assert index.counts(-30, 1000) == expected_counts(text[-30:])
+
+
+def test_summary_gc_is_engine_gc_content():
+    text = "GGccAT" + "N" * 4
+    index = CompositionIndex.from_genome(text, block=4)
+    summary = index.summary(0, 10)
+    assert summary["counts"] == {"A": 1, "C": 2, "G": 2, "T": 1, "N": 4}
+    # Upper-case G and C over the full length, N and lower case included
+    assert summary["gc"] == gc_content(text) == 2 / 10
+    assert calculate_statistics(text, text)["gc_content1"] == "20.0%"
+    assert summary["n_fraction"] == 0.4
+    assert index.summary(3, 3)["gc"] is None
+    assert [gc for _, gc in index.gc_profile(0, 10, 4)] == [
+        gc_content(text[pos:pos + 4]) for pos in (0, 4, 8)]
+
+
+def test_packed_views_count_through_index(rng):
+    from synteny.packed import PackedSequence
+    text = genome_text(rng, 2000)
+    store = PackedSequence.from_string(text)
+    store.composition = CompositionIndex.from_genome(text, block=32)
+    view = store.view(123, 1777)
+    assert view.count("G") == text[123:1777].count("G")
+    assert view.count("C") == text[123:1777].count("C")
+    assert gc_content(view) == gc_content(text[123:1777])
+
+
+def write_fasta(path, text):
+    with open(path, "w") as f:
+        f.write(">chr1\n")
+        for start in range(0, len(text), 60):
+            f.write(text[start:start + 60] + "\n")
+    return str(path)
+
+
+def test_save_and_load_round_trip(tmp_path, rng):
+    text = genome_text(rng, 5000)
+    path = str(tmp_path / "index.cmp.npz")
+    CompositionIndex.from_genome(text, block=128).save(path)
+    index = CompositionIndex.load(path, text)
+    assert (index.length, index.block) == (5000, 128)
+    assert index.counts(17, 4321) == expected_counts(text[17:4321])
+
+
+def test_load_composition_reuses_fresh_file(tmp_path, rng):
+    path = write_fasta(tmp_path / "g.fa", genome_text(rng, 1000))
+    with IndexedFasta(path) as genome:
+        load_composition(genome, block=64)
+        saved = os.path.getmtime(composition_path(path))
+        load_composition(genome, block=64)
+    assert os.path.getmtime(composition_path(path)) == saved
+
+
+def test_load_composition_rejects_older_file(tmp_path, rng):
+    path = write_fasta(tmp_path / "g.fa", genome_text(rng, 1000))
+    with IndexedFasta(path) as genome:
+        load_composition(genome, block=64)
+    text = genome_text(rng, 1000)  # same length, new content
+    write_fasta(path, text)
+    stale = os.path.getmtime(path) - 10
+    os.utime(composition_path(path), (stale, stale))
+    with IndexedFasta(path) as genome:
+        assert load_composition(genome, block=64).counts(0, 1000) == expected_counts(text)
+
+
+def test_load_composition_rejects_mismatched_file(tmp_path, rng):
+    path = write_fasta(tmp_path / "g.fa", genome_text(rng, 1000))
+    # Newer than the FASTA but built for another genome length
+    CompositionIndex.from_genome(genome_text(rng, 700), block=64).save(composition_path(path))
+    text = genome_text(rng, 1000)
+    write_fasta(path, text)
+    fresh = os.path.getmtime(path) + 10
+    os.utime(composition_path(path), (fresh, fresh))
+    with IndexedFasta(path) as genome:
+        index = load_composition(genome, block=64)
+        assert index.length == 1000
+        assert index.counts(0, 1000) == expected_counts(text)
+        # A different block size is rebuilt too
+        assert load_composition(genome, block=32).block == 32
+    assert CompositionIndex.load(composition_path(path)).block == 32
@@ -0,0 +1,125 @@
+import io
+
+import pytest
+
+from conftest import random_dna
+from synteny import crossgenome, engine
+from synteny.crossgenome import (Assembly, collect_matrices, compare_assemblies, compare_two,
+                                 open_assembly, unique_names, write_matrix)
+
+
+def write_assembly(tmp_path, name, rng, records, intervals):
+    """FASTA of random records (name, length) and a CSV of (id, start, end) over their concatenation"""
+    fasta = tmp_path / f"{name}.fa"
+    with open(fasta, "w") as f:
+        for record, length in records:
+            seq = random_dna(rng, length)
+            f.write(f">{record}\n")
+            for start in range(0, length, 50):
+                f.write(seq[start:start + 50] + "\n")
+    csv = tmp_path / f"{name}.csv"
+    csv.write_text("Chromosome_ID,Start,End\n"
+                   + "".join(f"{chromo_id},{start},{end}\n" for chromo_id, start, end in intervals))
+    return open_assembly(str(fasta), str(csv))
+
+
+@pytest.fixture
+def assemblies(tmp_path, rng):
+    # Several intervals cross the record boundaries (at 300 and 420, and at 250)
+    first = write_assembly(tmp_path, "first", rng, [("r1", 300), ("r2", 120), ("r3", 200)], [
+        ("a1", 0, 120), ("a2", 250, 350), ("a3", 280, 430), ("a4", 400, 620), ("a5", 90, 100),
+        ("a6", 500, 500)])
+    second = write_assembly(tmp_path, "second", rng, [("s1", 250), ("s2", 250)], [
+        ("b1", 200, 300), ("b2", 0, 250), ("b3", 240, 260), ("b4", 10, 490)])
+    return [first, second]
+
+
+def per_pair_records(assembly1, assembly2, both_strands):
+    """What compare_two should produce, one score_pair per cell"""
+    records = {}
+    for i, (id1, start1, end1) in enumerate(assembly1.intervals):
+        for j, (id2, start2, end2) in enumerate(assembly2.intervals):
+            result = engine.score_pair(assembly1.genome[start1:end1],
+                                       assembly2.genome[start2:end2], both_strands=both_strands)
+            records[i, j] = dict(assembly1=assembly1.name, assembly2=assembly2.name, row=i, col=j,
+                                 **engine.pair_record(id1, id2, result))
+    return records
+
+
+@pytest.mark.parametrize("both_strands", [False, True])
+@pytest.mark.parametrize("tile", [1, 2, 16])
+def test_tiles_match_per_pair_scores(assemblies, both_strands, tile):
+    first, second = assemblies
+    expected = per_pair_records(first, second, both_strands)
+    records = list(compare_two(first, second, both_strands=both_strands, tile=tile))
+    assert len(records) == len(expected)
+    for record in records:
+        assert record == pytest.approx(expected[record["row"], record["col"]])
+
+
+def test_byte_budget_splits_tiles(assemblies, monkeypatch):
+    first, second = assemblies
+    monkeypatch.setattr(crossgenome, "TILE_BYTES", 60_000)
+    expected = per_pair_records(first, second, False)
+    for record in compare_two(first, second, tile=16):
+        assert record == pytest.approx(expected[record["row"], record["col"]])
+
+
+def test_reference_method_matches_tiles(assemblies):
+    first, second = assemblies
+    tiled = {(r["row"], r["col"]): r for r in compare_two(first, second)}
+    for record in compare_two(first, second, method="reference"):
+        assert record == pytest.approx(tiled[record["row"], record["col"]])
+
+
+def test_compare_assemblies_covers_every_pair(assemblies):
+    first, second = assemblies
+    third = Assembly("first", first.genome, first.intervals[:2])
+    named = unique_names([first, second, third])
+    assert [a.name for a in named] == ["first", "second", "first.2"]
+    pairs = {(r["assembly1"], r["assembly2"]) for r in compare_assemblies(named)}
+    assert pairs == {("first", "second"), ("first", "first.2"), ("second", "first.2")}
+
+
+def read_matrix(text):
+    lines = text.splitlines()
+    title, header, rows = lines[0], lines[1].split("\t"), lines[2:]
+    similarity = [[None if cell == "" else float(cell) for cell in row.split("\t")[1:]]
+                  for row in rows]
+    return title, header[1:], [row.split("\t")[0] for row in rows], similarity
+
+
+def test_matrix_tsv_round_trip(assemblies):
+    first, second = assemblies
+    records = list(compare_two(first, second, both_strands=True))
+    # Leave one cell unfilled
+    matrix, = collect_matrices([first, second], records[1:])
+    missing = records[0]["row"], records[0]["col"]
+    assert matrix.filled == len(records) - 1
+    out = io.StringIO()
+    write_matrix(out, matrix)
+    title, cols, rows, similarity = read_matrix(out.getvalue())
+    assert title == "# first (rows) vs second (columns)"
+    assert cols == [chromo_id for chromo_id, _, _ in second.intervals]
+    assert rows == [chromo_id for chromo_id, _, _ in first.intervals]
+    for i, row in enumerate(similarity):
+        for j, value in enumerate(row):
+            if (i, j) == missing:
+                assert value is None
+            else:
+                assert value == round(matrix.similarity[i][j], 2)
+                assert matrix.strands[i][j] in ("+", "-")
+
+
+def test_matrix_best_breaks_ties_by_cell():
+    assembly1 = Assembly("x", "", [("a", 0, 0), ("b", 0, 0)])
+    assembly2 = Assembly("y", "", [("c", 0, 0), ("d", 0, 0)])
+    matrix, = collect_matrices([assembly1, assembly2], [
+        {"assembly1": "x", "assembly2": "y", "row": 1, "col": 0, "similarity": 50.0},
+        {"assembly1": "x", "assembly2": "y", "row": 0, "col": 1, "similarity": 50.0},
+        {"assembly1": "x", "assembly2": "y", "row": 1, "col": 1, "similarity": 20.0},
+    ])
+    assert (matrix.best["row"], matrix.best["col"]) == (0, 1)
+    assert matrix.row_best(1) == 0
+    assert matrix.row_best(0) == 1
+    assert matrix.to_dict()["similarity"] == [[None, 50.0], [50.0, 20.0]]
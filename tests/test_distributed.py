@@ -0,0 +1,158 @@
+import json
+import multiprocessing
+import socket
+import threading
+
+import pytest
+
+from conftest import random_dna
+from synteny.distributed import (Coordinator, parse_address, recv_message, run_worker,
+                                 send_message)
+from synteny.engine import read_chromosome_intervals
+from synteny.fasta import open_genome
+from synteny.parallel import compare_intervals
+
+# Upper bound on any one run, so a broken coordinator fails instead of hanging
+RUN_SECONDS = 120
+
+
+@pytest.fixture
+def job(tmp_path, rng):
+    """(genome path, genome, intervals) of 30 intervals, some sharing sequence"""
+    shared = random_dna(rng, 150)
+    seqs = [shared if k % 3 == 0 else random_dna(rng, rng.randint(60, 200)) for k in range(30)]
+    path = tmp_path / "g.fa"
+    path.write_text(">g\n" + "".join(seqs) + "\n")
+    csv = tmp_path / "c.csv"
+    rows, start = [], 0
+    for k, seq in enumerate(seqs):
+        rows.append(f"c{k},{start},{start + len(seq)}\n")
+        start += len(seq)
+    csv.write_text("Chromosome_ID,Start,End\n" + "".join(rows))
+    genome = open_genome(str(path))
+    yield str(path), genome, read_chromosome_intervals(str(csv), len(genome))
+    genome.close()
+
+
+def serialized(records):
+    return [json.dumps(record) for record in records]
+
+
+def start_workers(address, count):
+    workers = [multiprocessing.Process(target=run_worker, args=(address,), daemon=True)
+               for _ in range(count)]
+    for worker in workers:
+        worker.start()
+    return workers
+
+
+def collect(coordinator):
+    cancel = threading.Event()
+    timer = threading.Timer(RUN_SECONDS, cancel.set)
+    timer.start()
+    try:
+        return list(coordinator.records(cancel))
+    finally:
+        timer.cancel()
+
+
+def take_unit(address):
+    """A raw client that says hello and leases one unit; returns (socket, unit)"""
+    sock = socket.create_connection(address)
+    send_message(sock, {"op": "hello"})
+    assert recv_message(sock)["op"] == "job"
+    send_message(sock, {"op": "next"})
+    reply = recv_message(sock)
+    assert reply["op"] == "unit"
+    return sock, reply
+
+
+def test_parse_address():
+    assert parse_address("localhost:7070") == ("localhost", 7070)
+    assert parse_address(":0") == ("0.0.0.0", 0)
+    assert parse_address("[::1]:80") == ("[::1]", 80)
+    with pytest.raises(ValueError):
+        parse_address("localhost")
+
+
+def test_workers_match_serial_run_with_retries(job):
+    path, genome, intervals = job
+    expected = serialized(compare_intervals(genome, intervals))
+    assert len(expected) == 435
+    coordinator = Coordinator(path, len(genome), intervals, unit_size=16, lease_seconds=1.0)
+
+    # One worker disconnects in the middle of its unit, another hangs past its lease
+    dropped, dropped_unit = take_unit(coordinator.address)
+    hung, hung_unit = take_unit(coordinator.address)
+    dropped.close()
+    workers = start_workers(coordinator.address, 3)
+    try:
+        records = collect(coordinator)
+    finally:
+        hung.close()
+        for worker in workers:
+            worker.join(30)
+    assert serialized(records) == expected
+    assert coordinator.retries == 2
+    assert coordinator.workers == 5
+    assert {dropped_unit["unit"], hung_unit["unit"]} == {0, 1}
+    assert all(worker.exitcode == 0 for worker in workers)
+
+
+def test_gapped_both_strands_match_serial_run(job):
+    pytest.importorskip("numpy")
+    from synteny.gapped import GappedModel
+    path, genome, intervals = job
+    intervals = intervals[:8]
+    model = GappedModel("global", band=8)
+    expected = serialized(compare_intervals(genome, intervals, both_strands=True, gapped=model))
+    coordinator = Coordinator(path, len(genome), intervals, both_strands=True, gapped=model,
+                              unit_size=5)
+    workers = start_workers(coordinator.address, 2)
+    records = collect(coordinator)
+    for worker in workers:
+        worker.join(30)
+    assert serialized(records) == expected
+    assert coordinator.retries == 0
+
+
+def test_wrong_result_is_retried(job):
+    path, genome, intervals = job
+    intervals = intervals[:6]
+    coordinator = Coordinator(path, len(genome), intervals, unit_size=15)
+    sock, unit = take_unit(coordinator.address)
+    # A result with the wrong number of records counts as a failure of the unit
+    send_message(sock, {"op": "result", "unit": unit["unit"], "records": []})
+    retry = recv_message(sock)
+    assert (retry["op"], retry["unit"]) == ("unit", unit["unit"])
+    sock.close()  # before forking, or the worker would keep the connection open
+    workers = start_workers(coordinator.address, 1)
+    records = collect(coordinator)
+    workers[0].join(30)
+    assert serialized(records) == serialized(compare_intervals(genome, intervals))
+    assert coordinator.retries == 2  # the bad result, then the disconnect
+
+
+def test_unit_failing_every_attempt_fails_run(job):
+    path, genome, intervals = job
+    coordinator = Coordinator(path, len(genome), intervals[:4], unit_size=10, max_attempts=2)
+    sock, unit = take_unit(coordinator.address)
+    for _ in range(2):
+        send_message(sock, {"op": "error", "unit": unit["unit"], "message": "boom"})
+        unit = recv_message(sock)
+    assert unit["op"] == "done"
+    sock.close()
+    with pytest.raises(RuntimeError, match="failed 2 times; last: boom"):
+        collect(coordinator)
+
+
+def test_worker_rejects_different_genome(job, tmp_path):
+    path, genome, intervals = job
+    other = tmp_path / "other.fa"
+    other.write_text(">g\nACGT\n")
+    coordinator = Coordinator(path, len(genome), intervals[:3])
+    try:
+        with pytest.raises(ValueError, match="bases"):
+            run_worker(coordinator.address, str(other))
+    finally:
+        coordinator.close()
@@ -0,0 +1,123 @@
+import pytest
+
+from conftest import random_dna
+
+np = pytest.importorskip("numpy")
+
+from synteny import dotplot  # noqa: E402
+from synteny.dotplot import (FORWARD_COLOR, MIN_SHADE, MIN_SPAN, REVERSE_COLOR,  # noqa: E402
+                             DotPlot, dot_density, shade, zoom_region)
+from synteny.packed import PackedSequence  # noqa: E402
+
+_COMPLEMENT = str.maketrans("ACGT", "TGCA")
+
+# Cells with at least this many hits are dense; a chance 12-mer match adds one
+DENSE = 4
+
+
+def reverse_complement(seq):
+    return seq.translate(_COMPLEMENT)[::-1]
+
+
+@pytest.fixture
+def pair(rng):
+    """4 kbp pair; seq2 holds seq1[500:1500] at 1000 and seq1[2011:2811] inverted at 2500"""
+    seq1 = random_dna(rng, 4000)
+    seq2 = list(random_dna(rng, 4000))
+    seq2[1000:2000] = seq1[500:1500]
+    seq2[2500:3300] = reverse_complement(seq1[2011:2811])
+    return seq1, "".join(seq2)
+
+
+def dense(counts):
+    return {(int(row), int(col)) for row, col in zip(*np.nonzero(counts >= DENSE))}
+
+
+def test_planted_diagonals(pair):
+    seq1, seq2 = pair
+    plot = dot_density(seq1, seq2, 40, 40)
+    assert plot.region == (0, 4000, 0, 4000) and plot.k == 12
+    assert plot.forward.shape == plot.reverse.shape == (40, 40)
+    # 100 bp cells: seq1 position p sits in column p // 100, seq2 position in row
+    assert dense(plot.forward) == {(col + 5, col) for col in range(5, 15)}
+    # seq2 k-mer at p is the reverse complement of the seq1 k-mer at 5299 - p
+    assert dense(plot.reverse) == {(row, 52 - row) for row in range(25, 33)}
+
+
+def test_one_strand(pair):
+    plot = dot_density(*pair, 40, 40, both_strands=False)
+    assert plot.reverse is None
+    assert np.array_equal(plot.forward, dot_density(*pair, 40, 40).forward)
+
+
+def test_region_and_packed_input(pair):
+    seq1, seq2 = pair
+    region = (500, 1500, 1000, 2000)
+    plot = dot_density(seq1, seq2, 10, 10, region)
+    assert dense(plot.forward) == {(cell, cell) for cell in range(10)}
+    assert not plot.reverse.any()
+    packed1 = PackedSequence.from_string(seq1).view(0, len(seq1))
+    packed2 = PackedSequence.from_string(seq2).view(0, len(seq2))
+    from_packed = dot_density(packed1, packed2, 10, 10, region)
+    assert np.array_equal(from_packed.forward, plot.forward)
+    assert np.array_equal(from_packed.reverse, plot.reverse)
+
+
+def test_strands_share_one_cleared_bitmap(pair, monkeypatch):
+    bin_ = dotplot._bin
+    bitmaps = []
+
+    def checked(*args):
+        counts = bin_(*args)
+        bitmaps.append(args[-1])
+        assert not args[-1].any()
+        return counts
+
+    monkeypatch.setattr(dotplot, "_bin", checked)
+    dot_density(*pair, 40, 40)
+    assert len(bitmaps) == 2 and bitmaps[0] is bitmaps[1]
+
+
+def test_grid_never_finer_than_a_base():
+    plot = dot_density("ACGTACGTACGTACGTAC", "ACGTACGTACGTACGTAC", 400, 300, k=4)
+    assert plot.forward.shape == (18, 18)
+
+
+def test_frequent_kmers_are_skipped(rng):
+    tail = random_dna(rng, 600)
+    seq = "A" * 400 + tail
+    skipped = dot_density(seq, seq, 10, 10, both_strands=False)
+    kept = dot_density(seq, seq, 10, 10, both_strands=False, max_occurrences=10 ** 6)
+    # k-mers of the last A cells run into the unique tail
+    assert skipped.forward[:3, :3].sum() == 0
+    assert (kept.forward[:3, :3] > 0).all()
+    assert np.array_equal(skipped.forward[4:, 4:], kept.forward[4:, 4:])
+
+
+@pytest.mark.parametrize("x, y, factor, expected", [
+    (0.5, 0.5, 2, (250, 750, 500, 1500)),
+    (0.0, 1.0, 2, (0, 500, 1000, 2000)),  # kept inside the pair
+    (0.5, 0.5, 10 ** 6, (475, 475 + MIN_SPAN, 975, 975 + MIN_SPAN)),
+    (0.5, 0.5, 0.25, (0, 1000, 0, 2000)),
+])
+def test_zoom_region(x, y, factor, expected):
+    assert zoom_region((0, 1000, 0, 2000), (1000, 2000), x, y, factor) == expected
+
+
+def test_zoom_region_moves_with_region():
+    assert zoom_region((100, 300, 0, 2000), (1000, 2000), 0.25, 0.5, 2) == (100, 200, 500, 1500)
+
+
+def test_shade():
+    forward = np.array([[0, 1], [3, 9]])
+    image = shade(DotPlot(forward, None, (0, 2, 0, 2), 12))
+    assert image.shape == (2, 2, 3) and image.dtype == np.uint8
+    assert tuple(image[0, 0]) == (255, 255, 255)
+    assert tuple(image[1, 1]) == FORWARD_COLOR
+    faint = 255 - (MIN_SHADE + (1 - MIN_SHADE) * np.log1p(1) / np.log1p(9)) * (
+        255 - np.array(FORWARD_COLOR))
+    assert tuple(image[0, 1]) == tuple(faint.astype(np.uint8))
+    reverse = np.array([[0, 0], [0, 0]])
+    assert np.array_equal(shade(DotPlot(forward, reverse, (0, 2, 0, 2), 12)), image)
+    only_reverse = shade(DotPlot(reverse, forward.T, (0, 2, 0, 2), 12))
+    assert tuple(only_reverse[1, 1]) == REVERSE_COLOR
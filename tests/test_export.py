@@ -0,0 +1,148 @@
+import csv
+import gzip
+import io
+import json
+from html.parser import HTMLParser
+
+import pytest
+
+from synteny.export import (CROSS_COLUMNS, FORMATS, best_summary, format_for_path, open_output,
+                            pair_columns, record_writer)
+
+RECORDS = [
+    {"index": 1, "id1": "chr1", "id2": 'odd, "quoted" id', "len1": 10, "len2": 8,
+     "similarity": 62.5, "length_ratio": 0.8, "gc_content1": 0.5, "gc_content2": None,
+     "matches": 5, "offset": -2, "strand": "-"},
+    {"index": 2, "id1": "<b>&x</b>", "id2": "chr3", "len1": 10, "len2": 3,
+     "similarity": 100 / 3, "length_ratio": 0.3, "gc_content1": 0.5, "gc_content2": 1.0,
+     "matches": 1, "offset": None, "strand": "+"},
+]
+COLUMNS = pair_columns(both_strands=True)
+SUMMARY = {"comparisons": 2, "best": best_summary(RECORDS[0]), "note": "<done>"}
+
+
+def write(path, fmt, compress=None):
+    with open_output(str(path), compress) as f:
+        writer = record_writer(fmt, f, COLUMNS)
+        for record in RECORDS:
+            writer.write(record)
+        return writer.finish(SUMMARY)
+
+
+def read_text(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:2] == b"\x1f\x8b":
+        data = gzip.decompress(data)
+    return data.decode("utf-8")
+
+
+def expected_cells(record):
+    cells = []
+    for column in COLUMNS:
+        value = record[column]
+        cells.append("" if value is None else f"{value:.2f}" if column == "similarity"
+                     else str(value))
+    return cells
+
+
+@pytest.mark.parametrize("suffix", ["", ".gz"])
+@pytest.mark.parametrize("fmt, delimiter", [("tsv", "\t"), ("csv", ",")])
+def test_delimited_round_trip(tmp_path, fmt, delimiter, suffix):
+    path = tmp_path / f"out.{fmt}{suffix}"
+    assert write(path, fmt) is False
+    rows = list(csv.reader(io.StringIO(read_text(path)), delimiter=delimiter))
+    assert rows[0] == COLUMNS
+    if fmt == "csv":
+        assert rows[1:] == [expected_cells(record) for record in RECORDS]
+    else:
+        # TSV is plain tab-joined text; no id here holds a tab
+        assert read_text(path).splitlines()[1:] == [
+            "\t".join(expected_cells(record)) for record in RECORDS]
+
+
+@pytest.mark.parametrize("suffix", ["", ".gz"])
+def test_jsonl_round_trip(tmp_path, suffix):
+    path = tmp_path / f"out.jsonl{suffix}"
+    assert write(path, "jsonl") is True
+    lines = [json.loads(line) for line in read_text(path).splitlines()]
+    assert lines[-1] == dict(type="summary", **SUMMARY)
+    for line, record in zip(lines, RECORDS):
+        assert line == dict(type="pair", **record)
+
+
+class _Cells(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.rows, self.title, self._cell, self._in_title = [], "", None, False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "tr":
+            self.rows.append([])
+        elif tag in ("td", "th"):
+            self._cell = ""
+        self._in_title = tag == "title"
+
+    def handle_endtag(self, tag):
+        if tag in ("td", "th"):
+            self.rows[-1].append(self._cell)
+            self._cell = None
+        self._in_title = False
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell += data
+        elif self._in_title:
+            self.title += data
+
+
+@pytest.mark.parametrize("suffix", ["", ".gz"])
+def test_html_round_trip_escapes_ids(tmp_path, suffix):
+    path = tmp_path / f"out.html{suffix}"
+    assert write(path, "html") is True
+    text = read_text(path)
+    assert "<b>&x</b>" not in text
+    assert "&lt;b&gt;&amp;x&lt;/b&gt;" in text
+    assert "&lt;done&gt;" in text
+    parser = _Cells()
+    parser.feed(text)
+    assert parser.title == "Genome Comparison Report"
+    assert parser.rows == [COLUMNS] + [expected_cells(record) for record in RECORDS]
+    assert text.rstrip().endswith("</html>")
+
+
+def test_gzip_detection(tmp_path):
+    write(tmp_path / "a.tsv.gz", "tsv")
+    write(tmp_path / "b.tsv.GZ", "tsv")
+    write(tmp_path / "c.tsv", "tsv", compress=True)
+    write(tmp_path / "d.tsv.gz", "tsv", compress=False)
+    for name, compressed in (("a.tsv.gz", True), ("b.tsv.GZ", True), ("c.tsv", True),
+                             ("d.tsv.gz", False)):
+        with open(tmp_path / name, "rb") as f:
+            assert (f.read(2) == b"\x1f\x8b") is compressed
+        assert read_text(tmp_path / name).startswith("index\t")
+
+
+@pytest.mark.parametrize("path, fmt", [
+    ("x.tsv", "tsv"), ("x.CSV", "csv"), ("x.jsonl.gz", "jsonl"), ("x.json", "jsonl"),
+    ("x.htm", "html"), ("x.html.gz", "html"), ("x.txt", "tsv"), ("x.gz", "tsv"), ("-", "tsv"),
+])
+def test_format_for_path(path, fmt):
+    assert format_for_path(path) == fmt
+
+
+def test_columns_and_unknown_format():
+    assert pair_columns()[-1] == "offset"
+    assert pair_columns(both_strands=True, gapped=True)[-2:] == ["strand", "score"]
+    assert pair_columns(cross=True)[:4] == CROSS_COLUMNS[:4]
+    assert set(FORMATS) == {"tsv", "csv", "jsonl", "html"}
+    with pytest.raises(ValueError):
+        record_writer("xml", io.StringIO(), COLUMNS)
+
+
+def test_best_summary():
+    assert best_summary(RECORDS[0]) == {"id1": "chr1", "id2": 'odd, "quoted" id',
+                                        "similarity": 62.5, "strand": "-"}
+    cross = dict(RECORDS[1], assembly1="h1", assembly2="h2")
+    assert list(best_summary(cross)) == ["assembly1", "assembly2", "id1", "id2", "similarity",
+                                         "strand"]
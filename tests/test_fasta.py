@@ -0,0 +1,106 @@
+import os
+
+import pytest
+
+from conftest import random_dna
+from synteny import fasta
+from synteny.engine import read_genome_file
+from synteny.fasta import IndexedFasta, fai_path, load_fai, open_genome, read_fai, record_spans
+
+
+def write_fasta(path, records, width=10, newline="\n"):
+    """Write (name, sequence) records wrapped at width bases per line"""
+    with open(path, "wb") as f:
+        for name, seq in records:
+            f.write(f">{name} description{newline}".encode())
+            for start in range(0, len(seq), width):
+                f.write(f"{seq[start:start + width]}{newline}".encode())
+    return str(path)
+
+
+@pytest.fixture
+def records(rng):
+    # Ragged last lines (23, 7) and one record filling its lines exactly (30)
+    return [("chr1", random_dna(rng, 23)), ("chr2", random_dna(rng, 7)),
+            ("chr3", random_dna(rng, 30))]
+
+
+def assert_slices_match(genome, expected):
+    assert len(genome) == len(expected)
+    for start in range(len(expected) + 1):
+        for end in range(start, len(expected) + 2):
+            assert genome[start:end] == expected[start:end]
+    assert genome[-5:] == expected[-5:]
+    assert genome[10:3] == ""
+
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+def test_slices_match_read_genome_file(tmp_path, records, newline):
+    path = write_fasta(tmp_path / "g.fa", records, newline=newline)
+    with IndexedFasta(path) as genome:
+        assert_slices_match(genome, read_genome_file(path))
+
+
+def test_fetch_clips_to_record(tmp_path, records):
+    path = write_fasta(tmp_path / "g.fa", records)
+    with IndexedFasta(path) as genome:
+        for name, seq in records:
+            assert genome.fetch(name, 0, len(seq)) == seq
+            assert genome.fetch(name, 8, 1000) == seq[8:]
+            assert genome.fetch(name, 5, 5) == ""
+
+
+def test_record_spans(tmp_path, records):
+    path = write_fasta(tmp_path / "g.fa", records)
+    with IndexedFasta(path) as genome:
+        assert genome.names == ["chr1", "chr2", "chr3"]
+        assert record_spans(genome) == {"chr1": (0, 23), "chr2": (23, 7), "chr3": (30, 30)}
+    assert record_spans("ACGT") == {}
+
+
+def test_builds_fai(tmp_path, records):
+    path = write_fasta(tmp_path / "g.fa", records, newline="\r\n")
+    IndexedFasta(path).close()
+    index = read_fai(fai_path(path))
+    assert [(r.name, r.length, r.linebases, r.linewidth) for r in index] == [
+        ("chr1", 23, 10, 12), ("chr2", 7, 7, 9), ("chr3", 30, 10, 12)]
+    assert index[0].offset == len(b">chr1 description\r\n")
+
+
+def test_reuses_fai(tmp_path, records, monkeypatch):
+    path = write_fasta(tmp_path / "g.fa", records)
+    first = load_fai(path)
+
+    def fail(path):
+        raise AssertionError("index rebuilt")
+
+    monkeypatch.setattr(fasta, "build_fai", fail)
+    assert load_fai(path) == first
+
+
+def test_rebuilds_fai_older_than_fasta(tmp_path, records, rng):
+    path = write_fasta(tmp_path / "g.fa", records)
+    load_fai(path)
+    records = records + [("chr4", random_dna(rng, 12))]
+    write_fasta(path, records)
+    stale = os.path.getmtime(path) - 10
+    os.utime(fai_path(path), (stale, stale))
+    with IndexedFasta(path) as genome:
+        assert genome.names == ["chr1", "chr2", "chr3", "chr4"]
+        assert genome[:] == "".join(seq for _, seq in records)
+    assert os.path.getmtime(fai_path(path)) >= os.path.getmtime(path)
+
+
+def test_open_genome_falls_back_for_unindexable_layout(tmp_path):
+    path = tmp_path / "g.fa"
+    path.write_text(">chr1\nACG\nACGTACGT\n")
+    warnings = []
+    genome = open_genome(str(path), warn=warnings.append)
+    assert genome == "ACGACGTACGT"
+    assert len(warnings) == 1
+
+
+def test_open_genome_returns_index(tmp_path, records):
+    genome = open_genome(write_fasta(tmp_path / "g.fa", records))
+    assert isinstance(genome, IndexedFasta)
+    genome.close()
@@ -0,0 +1,152 @@
+import pytest
+
+from conftest import random_dna
+
+np = pytest.importorskip("numpy")
+
+from synteny.alignment import best_offset  # noqa: E402
+from synteny.gapped import GappedModel, Scoring  # noqa: E402
+
+NEG = None  # outside the band or unreachable
+
+
+def band_of(model, seq1, seq2):
+    """(center, lo, hi) of the diagonals j - i GappedModel.align fills"""
+    len1, len2 = len(seq1), len(seq2)
+    if model.mode == "global":
+        width = model.band if model.band is not None else max(len1, len2)
+        return 0, -(width + max(0, len2 - len1)), width + max(0, len1 - len2)
+    if model.band is None:
+        return 0, -len2, len1
+    return best_offset(seq1, seq2)[1] or 0, -model.band, model.band
+
+
+def gotoh(seq1, seq2, local, scoring, center, lo, hi):
+    """Plain Gotoh over (score, identities) cells; returns (score, matches, end1, end2)"""
+    match, mismatch, gap_open, gap_extend = scoring
+    len1, len2 = len(seq1), len(seq2)
+
+    def in_band(i, j):
+        return lo <= j - i - center <= hi
+
+    def best_of(*values):
+        values = [v for v in values if v is not NEG]
+        return max(values) if values else NEG
+
+    def add(cell, score, identities=0):
+        return NEG if cell is NEG else (cell[0] + score, cell[1] + identities)
+
+    H = [[NEG] * (len1 + 1) for _ in range(len2 + 1)]
+    E = [[NEG] * (len1 + 1) for _ in range(len2 + 1)]  # gap in seq1 (consumes seq2)
+    F = [[NEG] * (len1 + 1) for _ in range(len2 + 1)]  # gap in seq2 (consumes seq1)
+    for j in range(len1 + 1):
+        if in_band(0, j):
+            H[0][j] = (0, 0) if local or j == 0 else (-(gap_open + j * gap_extend), 0)
+    best, best_cell = (0, 0), None
+    for i in range(1, len2 + 1):
+        for j in range(len1 + 1):
+            if not in_band(i, j):
+                continue
+            if j == 0:
+                H[i][0] = E[i][0] = (0, 0) if local else (-(gap_open + i * gap_extend), 0)
+                continue
+            same = seq1[j - 1] == seq2[i - 1]
+            diag = add(H[i - 1][j - 1], match if same else mismatch, int(same))
+            E[i][j] = best_of(add(H[i - 1][j], -(gap_open + gap_extend)),
+                              add(E[i - 1][j], -gap_extend))
+            F[i][j] = best_of(add(H[i][j - 1], -(gap_open + gap_extend)),
+                              add(F[i][j - 1], -gap_extend))
+            H[i][j] = best_of(diag, E[i][j], F[i][j], (0, 0) if local else NEG)
+            if local and H[i][j] > best:
+                best, best_cell = H[i][j], (j, i)
+    if local:
+        if best_cell is None:
+            return 0, 0, None, None
+        return best[0], best[1], best_cell[0], best_cell[1]
+    return H[len2][len1][0], H[len2][len1][1], len1, len2
+
+
+def rescore(rows, scoring):
+    """(score, identities) of a rendered (top, track, bottom) alignment"""
+    top, track, bottom = rows
+    score, gap = 0, None
+    for c1, c2 in zip(top, bottom):
+        if "-" in (c1, c2):
+            side = 1 if c1 == "-" else 2
+            score -= scoring.gap_extend + (scoring.gap_open if gap != side else 0)
+            gap = side
+        else:
+            score += scoring.match if c1 == c2 else scoring.mismatch
+            gap = None
+    return score, track.count("R")
+
+
+def mutate(rng, seq):
+    """seq with a few substitutions and indels"""
+    seq = list(seq)
+    for _ in range(rng.randint(0, 4)):
+        pos = rng.randrange(len(seq) + 1)
+        kind = rng.random()
+        if kind < 0.4 and pos < len(seq):
+            seq[pos] = rng.choice("ACGT")
+        elif kind < 0.7:
+            seq.insert(pos, rng.choice("ACGT"))
+        elif pos < len(seq) and len(seq) > 1:
+            del seq[pos]
+    return "".join(seq)
+
+
+@pytest.mark.parametrize("mode", ["local", "global"])
+@pytest.mark.parametrize("band", [None, 0, 1, 2, 5])
+def test_matches_brute_force_gotoh(rng, mode, band):
+    for _ in range(60):
+        seq1 = random_dna(rng, rng.randint(1, 18), rng.choice(["ACGT", "AC"]))
+        seq2 = mutate(rng, seq1) if rng.random() < 0.6 else random_dna(rng, rng.randint(1, 18))
+        scoring = rng.choice([Scoring(2, -3, 5, 2), Scoring(1, -1, 0, 1), Scoring(3, -2, 2, 1)])
+        model = GappedModel(mode, band, scoring)
+        result = model.align(seq1, seq2)
+        expected = gotoh(seq1, seq2, mode == "local", scoring, *band_of(model, seq1, seq2))
+        assert (result["score"], result["matches"], result["end1"], result["end2"]) == expected
+
+        traced = model.align(seq1, seq2, traceback=True)
+        assert traced["score"] == result["score"] and traced["matches"] == result["matches"]
+        top, _, bottom = traced["rows"]
+        if mode == "global":
+            assert top.replace("-", "") == seq1 and bottom.replace("-", "") == seq2
+        if result["matches"] or mode == "global":
+            assert rescore(traced["rows"], scoring) == (result["score"], result["matches"])
+            assert seq1[:result["end1"]].endswith(top.replace("-", ""))
+            assert seq2[:result["end2"]].endswith(bottom.replace("-", ""))
+
+
+@pytest.mark.parametrize("mode, seq1, seq2", [
+    # A four-base gap: seq2 moves from diagonal 0 to 4
+    ("local", "ACGTACGTAC" + "GGGG" + "TTGCATGCAA", "ACGTACGTAC" + "TTGCATGCAA"),
+    # Equal lengths, so the global band is not widened: out to diagonal 4 and back
+    ("global", "GGGG" + "ACGTACGTACTTGCATGCAA", "ACGTACGTACTTGCATGCAA" + "GGGG"),
+])
+def test_band_edge_limits_gap_length(mode, seq1, seq2):
+    assert GappedModel(mode, band=None).align(seq1, seq2)["matches"] >= 20
+    for band in (3, 4):
+        model = GappedModel(mode, band)
+        result = model.align(seq1, seq2)
+        expected = gotoh(seq1, seq2, mode == "local", model.scoring, *band_of(model, seq1, seq2))
+        assert (result["score"], result["matches"], result["end1"], result["end2"]) == expected
+    assert GappedModel(mode, band=4).align(seq1, seq2)["matches"] >= 20
+    assert GappedModel(mode, band=3).align(seq1, seq2)["matches"] < 20
+
+
+def test_empty_and_unrelated_inputs():
+    model = GappedModel("local", band=None)
+    assert model.align("", "ACGT")["end1"] is None
+    assert model.score("AAAA", "CCCC") == (0, None, "+", 0)
+    assert GappedModel("global").align("AAAA", "CCCC")["matches"] == 0
+
+
+def test_score_picks_reverse_strand_on_more_matches():
+    from synteny.alignment import reverse_complement
+    seq1 = "ACGGTCAGTTACGATCGGAT"
+    model = GappedModel("local", band=8)
+    matches, offset, strand, _ = model.score(seq1, reverse_complement(seq1), both_strands=True)
+    assert (matches, offset, strand) == (20, 0, "-")
+    assert model.score(seq1, seq1, both_strands=True)[2] == "+"
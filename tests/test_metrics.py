@@ -0,0 +1,132 @@
+import json
+import pstats
+import time
+
+from conftest import random_dna
+from synteny import metrics as metrics_module
+from synteny.cli import main
+from synteny.metrics import ProfileCapture, RunMetrics, format_summary, stage
+from synteny.parallel import compare_intervals
+
+
+def test_stage_accumulates_time_and_calls():
+    metrics = RunMetrics()
+    for _ in range(3):
+        with metrics.stage("sleep"):
+            time.sleep(0.01)
+    metrics.add("sleep", 1.0, 0.5, calls=2)
+    wall, cpu, calls = metrics.stages["sleep"]
+    assert calls == 5
+    assert wall >= 1.03
+    assert 0.5 <= cpu < wall
+
+
+def test_stage_helper_without_metrics():
+    with stage(None, "anything"):
+        pass
+    metrics = RunMetrics()
+    with stage(metrics, "parse"):
+        pass
+    assert metrics.stages["parse"][2] == 1
+
+
+def test_timed_counts_steps_and_aligned_pairs():
+    metrics = RunMetrics()
+    records = [{"len1": 3, "len2": 4}, {"len1": 10, "len2": 1}]
+    assert list(metrics.timed("workers", records, aligned=True)) == records
+    assert metrics.stages["workers"][2] == 3  # two records and the final, empty step
+    assert (metrics.pairs_aligned, metrics.bases_aligned) == (2, 18)
+
+
+def test_timed_closes_source_early():
+    closed = []
+
+    def source():
+        try:
+            yield {"len1": 1, "len2": 1}
+            yield {"len1": 1, "len2": 1}
+        finally:
+            closed.append(True)
+
+    records = RunMetrics().timed("workers", source())
+    next(records)
+    records.close()
+    assert closed == [True]
+
+
+def test_run_records_pair_stages(rng):
+    genome = random_dna(rng, 600)
+    intervals = [(f"c{k}", 100 * k, 100 * k + 50 + 10 * k) for k in range(6)]
+    metrics = RunMetrics()
+    records = list(compare_intervals(genome, intervals, metrics=metrics))
+    assert len(records) == 15
+    for name in ("align", "statistics"):
+        assert metrics.stages[name][2] == 15
+    assert "visual" not in metrics.stages  # records are score-only
+    assert metrics.pairs_aligned == 15
+    assert metrics.bases_aligned == sum(r["len1"] + r["len2"] for r in records)
+
+
+def test_summary_keys():
+    metrics = RunMetrics()
+    with metrics.stage("align"):
+        pass
+    metrics.pairs = 10
+    summary = metrics.summary()
+    assert set(summary) == {"wall_seconds", "cpu_seconds", "worker_cpu_seconds", "workers",
+                            "pairs", "pairs_aligned", "bases_aligned", "pairs_per_second",
+                            "peak_rss_bytes", "stages"}
+    assert set(summary["stages"]["align"]) == {"wall_seconds", "cpu_seconds", "calls"}
+    assert summary["pairs_per_second"] == 10 / summary["wall_seconds"]
+    json.dumps(summary)
+
+
+def test_format_summary():
+    summary = {
+        "stages": {"align": {"wall_seconds": 1.5}, "write": {"wall_seconds": 0.25},
+                   "read_genome": {"wall_seconds": 3.0}},
+        "pairs_per_second": 1234.56,
+        "bases_aligned": 2_500_000,
+        "peak_rss_bytes": 300 * 1024 * 1024,
+    }
+    assert format_summary(summary) == ("read_genome 3.00s • align 1.50s • write 0.25s • "
+                                       "1,234.6 pairs/s • 2.5 Mbp aligned • peak RSS 300 MiB")
+    summary.update(bases_aligned=0, peak_rss_bytes=None)
+    assert format_summary(summary, limit=1) == "read_genome 3.00s • 1,234.6 pairs/s"
+
+
+def test_profile_dump_writes_reported_files(tmp_path):
+    profile = ProfileCapture()
+    profile.start()
+    sorted(range(1000), key=str)
+    profile.stop()
+    base = str(tmp_path / "run")
+    paths = profile.dump(base)
+    assert paths == [base + ".prof", base + ".profile.txt", base + ".memory.txt"]
+    assert pstats.Stats(paths[0]).total_calls > 0
+    assert "cumulative" in open(paths[1]).read()
+    assert open(paths[2]).read()
+
+
+def test_profile_without_tracemalloc_snapshot(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics_module.tracemalloc, "is_tracing", lambda: False)
+    monkeypatch.setattr(metrics_module.tracemalloc, "start", lambda: None)
+    profile = ProfileCapture()
+    profile.start()
+    profile.stop()
+    paths = profile.dump(str(tmp_path / "run"))
+    assert [path[len(str(tmp_path)):] for path in paths] == ["/run.prof", "/run.profile.txt"]
+
+
+def test_cli_writes_metrics_json(tmp_path, rng):
+    genome = tmp_path / "genome.fa"
+    genome.write_text(">g\n" + random_dna(rng, 300) + "\n")
+    chromosomes = tmp_path / "chromosomes.csv"
+    chromosomes.write_text("Chromosome_ID,Start,End\nc0,0,100\nc1,100,200\nc2,200,300\n")
+    path = tmp_path / "metrics.json"
+    assert main([str(genome), str(chromosomes), "-o", str(tmp_path / "out.tsv"),
+                 "--metrics", str(path)]) == 0
+    summary = json.loads(path.read_text())
+    assert summary["pairs"] == summary["pairs_aligned"] == 3
+    assert {"read_genome", "read_intervals", "align", "write"} <= set(summary["stages"])
+    assert summary["stages"]["write"]["calls"] == 3
@@ -0,0 +1,86 @@
+import pytest
+
+from conftest import random_dna
+
+np = pytest.importorskip("numpy")
+
+from synteny.packed import PackedSequence  # noqa: E402
+
+
+def mixed_sequence(rng, length):
+    """Random text with lowercase stretches, N runs and other IUPAC codes"""
+    pieces = []
+    while sum(map(len, pieces)) < length:
+        kind = rng.random()
+        size = rng.randint(1, 12)
+        if kind < 0.6:
+            pieces.append(random_dna(rng, size))
+        elif kind < 0.8:
+            pieces.append(random_dna(rng, size, "acgt"))
+        elif kind < 0.9:
+            pieces.append("N" * size)
+        else:
+            pieces.append(random_dna(rng, size, "nRYKMSW"))
+    return "".join(pieces)[:length]
+
+
+@pytest.mark.parametrize("length", [0, 1, 2, 3, 5, 17, 333, 1001])
+def test_round_trip(rng, length):
+    seq = mixed_sequence(rng, length)
+    store = PackedSequence.from_string(seq)
+    assert len(store) == length
+    assert store[:] == seq
+    assert str(store.view(0, length)) == seq
+
+
+def test_slices_match_string(rng):
+    seq = mixed_sequence(rng, 101)
+    store = PackedSequence.from_string(seq)
+    for _ in range(500):
+        start, end = rng.randint(-120, 120), rng.randint(-120, 120)
+        assert store[start:end] == seq[start:end]
+        view = store.view(start, end)
+        expected = seq[start:end]
+        assert len(view) == len(expected)
+        assert str(view) == expected
+        inner_start, inner_end = rng.randint(-30, 30), rng.randint(-30, 30)
+        assert view[inner_start:inner_end] == expected[inner_start:inner_end]
+
+
+def test_empty_slices(rng):
+    store = PackedSequence.from_string(mixed_sequence(rng, 40))
+    assert store[7:7] == ""
+    assert store[30:10] == ""
+    assert str(store.view(30, 10)) == ""
+    assert len(store.view(50, 60)) == 0
+
+
+def test_chunked_packing_matches_whole(rng):
+    seq = mixed_sequence(rng, 997)
+    whole = PackedSequence.from_string(seq)
+    chunked = PackedSequence.from_genome(seq, chunk=8)
+    assert chunked[:] == seq
+    assert np.array_equal(chunked.packed, whole.packed)
+
+
+def test_view_codes_and_count(rng):
+    seq = mixed_sequence(rng, 250)
+    view = PackedSequence.from_string(seq).view(13, 211)
+    assert view.codes().tobytes().decode("ascii") == seq[13:211]
+    for sub in ("A", "c", "N", "G"):
+        assert view.count(sub) == seq[13:211].count(sub)
+
+
+def test_non_ascii_round_trip():
+    seq = "ACGTλNNacgtΩA"
+    store = PackedSequence.from_string(seq)
+    assert store[:] == seq
+    assert store[3:9] == seq[3:9]
+
+
+def test_rejects_strided_slices():
+    store = PackedSequence.from_string("ACGT")
+    with pytest.raises(TypeError):
+        store[::2]
+    with pytest.raises(TypeError):
+        store.view(0, 4)[::2]
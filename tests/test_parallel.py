@@ -0,0 +1,103 @@
+import threading
+from multiprocessing import shared_memory
+
+import pytest
+
+from conftest import random_dna
+from synteny import parallel
+from synteny.parallel import (chunks, compare_all_parallel, compare_intervals, init_worker,
+                              rank_pair, run_chunk, unrank_pair)
+
+
+def make_genome(rng, count=30, length=200):
+    """Genome string of count random intervals, the odd ones sharing sequence"""
+    base = random_dna(rng, length)
+    parts, intervals = [], []
+    for k in range(count):
+        seq = base if k % 2 else random_dna(rng, length)
+        intervals.append((f"c{k}", k * length, (k + 1) * length))
+        parts.append(seq)
+    return "".join(parts), intervals
+
+
+def test_pair_rank_round_trip():
+    count = 9
+    pairs = [(i, j) for i in range(count) for j in range(i + 1, count)]
+    for index, (i, j) in enumerate(pairs):
+        assert unrank_pair(index, count) == (i, j)
+        assert rank_pair(i, j, count) == index
+
+
+def test_run_chunk_in_process(rng):
+    genome, intervals = make_genome(rng, count=7)
+    serial = list(compare_intervals(genome, intervals, workers=1))
+    assert list(chunks(21, 8)) == [(0, 8), (8, 8), (16, 5)]
+    init_worker(genome, intervals, "auto")
+    records = [record for task in chunks(21, 8) for record in run_chunk(task)]
+    assert records == serial
+    assert run_chunk([(5, 0, 5), (9, 1, 4)]) == [serial[4], serial[8]]
+
+
+@pytest.mark.parametrize("both_strands", [False, True])
+def test_parallel_matches_serial(rng, both_strands):
+    genome, intervals = make_genome(rng)
+    serial = list(compare_intervals(genome, intervals, workers=1, both_strands=both_strands))
+    parallel_records = list(compare_intervals(genome, intervals, workers=3,
+                                              both_strands=both_strands))
+    assert len(serial) == 30 * 29 // 2
+    assert [r["index"] for r in parallel_records] == list(range(1, len(serial) + 1))
+    assert parallel_records == serial
+
+
+def test_parallel_matches_serial_with_odd_chunks(rng):
+    genome, intervals = make_genome(rng, count=12)
+    serial = list(compare_intervals(genome, intervals, workers=1))
+    assert list(compare_all_parallel(genome, intervals, workers=3, chunk_size=7)) == serial
+
+
+@pytest.fixture
+def shared_segments(monkeypatch):
+    """Names of the shared-memory segments compare_all_parallel creates"""
+    names = []
+    original = parallel.SharedGenome
+
+    def recording(genome_seq):
+        shared = original(genome_seq)
+        names.append(shared.name)
+        return shared
+
+    monkeypatch.setattr(parallel, "SharedGenome", recording)
+    return names
+
+
+def assert_unlinked(name):
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
+
+
+def test_cancel_stops_pool_and_unlinks_segment(rng, shared_segments):
+    genome, intervals = make_genome(rng, count=40)
+    cancel = threading.Event()
+    records = []
+    for record in compare_intervals(genome, intervals, workers=3, cancel=cancel):
+        records.append(record)
+        cancel.set()
+    total = 40 * 39 // 2
+    assert 0 < len(records) < total
+    assert [r["index"] for r in records] == list(range(1, len(records) + 1))
+    assert len(shared_segments) == 1
+    assert_unlinked(shared_segments[0])
+
+
+def test_closing_generator_unlinks_segment(rng, shared_segments):
+    genome, intervals = make_genome(rng)
+    records = compare_intervals(genome, intervals, workers=2)
+    next(records)
+    records.close()
+    assert_unlinked(shared_segments[0])
+
+
+def test_finished_run_unlinks_segment(rng, shared_segments):
+    genome, intervals = make_genome(rng, count=6)
+    assert len(list(compare_intervals(genome, intervals, workers=2))) == 15
+    assert_unlinked(shared_segments[0])
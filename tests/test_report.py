@@ -0,0 +1,187 @@
+from types import SimpleNamespace
+
+from conftest import random_dna
+from synteny import engine, report
+from synteny.alignment import calculate_alignment
+from synteny.crossgenome import SimilarityMatrix
+from synteny.report import (VISUAL_MAX_BP, VISUAL_WIDTH, alignment_segments, best_match_segments,
+                            block_segments, comparison_segments, dotplot_tag, header_segments,
+                            link_tag, matrix_segments, plain_text, sequence_segments,
+                            track_segments)
+
+RECORD = {"index": 3, "id1": "chr1", "id2": "chr2", "len1": 8, "len2": 8, "matches": 6,
+          "offset": 0, "similarity": 75.0, "length_ratio": "100.0%", "gc_content1": "25.0%",
+          "gc_content2": "25.0%"}
+VISUAL = ["ACGTNacg", "RRWRWRRR", "ACCTAacg", "Similarity: 75.00%"]
+
+# The report text the GUI wrote for RECORD before rendering moved to segments
+OLD_COMPARISON = """\
+Comparison 3: chr1 vs chr2
+• Similarity: 75.00%
+• Length ratio: 100.0%
+• GC Content: chr1=25.0%, chr2=25.0%
+
+
+Alignment Visualization:
+Reference: ACGTNacg
+           ||·|·|||
+Comparison: ACCTAacg
+""" + "-" * 60 + "\n\n"
+
+OLD_BEST_MATCH = "\n" + "=" * 60 + """
+★ BEST MATCH RESULT ★
+• Chromosome Pair: chr1 and chr2
+• Similarity Score: 75.00%
+
+
+Alignment Visualization:
+Reference: ACGTNacg
+           ||·|·|||
+Comparison: ACCTAacg
+"""
+
+
+def long_visual(length):
+    seq = "ACGT" * (length // 4) + "A" * (length % 4)
+    return [seq, "R" * length, seq, ""]
+
+
+def long_record(length):
+    return dict(RECORD, len1=length, len2=length)
+
+
+def test_sequence_segments_are_runs():
+    assert sequence_segments("AaCCgTtUxN-") == [
+        ("Aa", "A"), ("CC", "C"), ("g", "G"), ("TtU", "T"), ("xN-", "N")]
+    assert plain_text(sequence_segments("ACGTNacgtn")) == "ACGTNacgtn"
+    assert sequence_segments("") == []
+
+
+def test_track_segments():
+    assert track_segments("RRWX RR") == [("||", "match"), ("·", "mismatch"), ("  ", "gap"),
+                                         ("||", "match")]
+
+
+def test_comparison_matches_old_report_text():
+    segments = comparison_segments(RECORD, VISUAL, links=False)
+    assert plain_text(segments) == OLD_COMPARISON
+    assert segments[0] == ("Comparison 3: chr1 vs chr2\n", "highlight")
+    assert ("||", "match") in segments and ("·", "mismatch") in segments
+
+
+def test_alignment_links():
+    link = ("link", link_tag(RECORD))
+    shown = comparison_segments(RECORD, VISUAL)
+    assert ("▾ Hide alignment\n", link) in shown
+    assert ("▸ Dot plot\n", ("link", dotplot_tag(RECORD))) in shown
+    assert plain_text(segment for segment in shown
+                      if not isinstance(segment[1], tuple)) == OLD_COMPARISON
+    collapsed = comparison_segments(RECORD)
+    assert ("▸ Show alignment\n", link) in collapsed
+    assert "Alignment Visualization:" not in plain_text(collapsed)
+    assert "alignment" not in plain_text(comparison_segments(RECORD, links=False))
+    # Pairs without any matching offset have nothing to show
+    assert not any(tag == link for _, tag in comparison_segments(dict(RECORD, offset=None)))
+
+
+def test_best_match_matches_old_report_text():
+    segments = best_match_segments(RECORD, VISUAL)
+    assert plain_text(segments) == OLD_BEST_MATCH
+    assert ("★ BEST MATCH RESULT ★\n", "best") in segments
+
+
+def test_record_visual_matches_calculate_alignment(rng):
+    for _ in range(50):
+        seq1 = random_dna(rng, rng.randint(0, 30), "ACG")
+        seq2 = random_dna(rng, rng.randint(0, 30), "ACG")
+        record = engine.compare_pair("a", seq1, "b", seq2)
+        assert "alignment" not in record
+        similarity, visual = calculate_alignment(seq1, seq2)
+        assert record["similarity"] == similarity
+        assert engine.record_visual(record, seq1, seq2) == visual
+
+
+def test_visual_max_bp_cutoff():
+    short, long = VISUAL_MAX_BP - 1, VISUAL_MAX_BP
+    drawn = plain_text(comparison_segments(long_record(short), long_visual(short)))
+    assert "Alignment Visualization:" in drawn
+    assert "Show alignment" in plain_text(comparison_segments(long_record(short)))
+    skipped = plain_text(comparison_segments(long_record(long), long_visual(long)))
+    assert "Alignment Visualization:" not in skipped and "Show alignment" not in skipped
+    assert f"[Alignment visualization available for sequences < {VISUAL_MAX_BP}bp]\n" in skipped
+    assert "[Full alignment not shown for long sequences]" in plain_text(
+        best_match_segments(long_record(long), long_visual(long)))
+    # max_bp is a per-call override
+    assert "Alignment Visualization:" in plain_text(
+        comparison_segments(long_record(long), long_visual(long), max_bp=VISUAL_MAX_BP + 1))
+    assert report.can_visualize(dict(RECORD, len2=VISUAL_MAX_BP)) is False
+
+
+def test_long_alignments_stack_in_blocks():
+    length = 2 * VISUAL_WIDTH + 17
+    seq = "ACGT" * (length // 4) + "A"
+    lines = plain_text(alignment_segments(seq, seq, "R" * length)).splitlines()
+    references = [line for line in lines if line.startswith("Reference: ")]
+    assert [len(line) - len("Reference: ") for line in references] == [
+        VISUAL_WIDTH, VISUAL_WIDTH, 17]
+    assert "".join(line[len("Reference: "):] for line in references) == seq
+    tracks = [line for line in lines if line.startswith("           |")]
+    assert [len(line.strip()) for line in tracks] == [VISUAL_WIDTH, VISUAL_WIDTH, 17]
+
+
+def test_header_lists_warnings_and_summary():
+    info = {"genome_length": 12345, "gc_content": 0.4567, "chromosomes": 4,
+            "warnings": ["Chromosome c9 sequence is empty."]}
+    text = plain_text(header_segments(info, "/data/genome.fa", "/data/chromosomes.csv"))
+    assert text.startswith("GENOME COMPARISON REPORT\n" + "=" * 60 + "\n\n"
+                           "⚠ Warning: Chromosome c9 sequence is empty.\n")
+    assert "• File: genome.fa\n• Length: 12,345 bp\n• GC Content: 45.7%\n\n" in text
+    assert "• File: chromosomes.csv\n• Chromosomes to compare: 4\n\n" in text
+    assert "GC Content: N/A" in plain_text(header_segments(dict(info, gc_content=None), "g", "c"))
+
+
+def test_block_segments_rank_by_score():
+    def block(index, score, strand="+"):
+        return {"index": index, "id1": f"c{index}", "id2": "chrX", "start1": 1000 * index,
+                "end1": 1000 * index + 1500, "start2": 0, "end2": 1500, "strand": strand,
+                "anchors": 12, "score": score}
+
+    blocks = [block(1, 50.0), block(2, 900.0, "-"), block(2, 50.0), block(4, 1234.4)]
+    text = plain_text(block_segments(blocks, limit=3))
+    assert "4 blocks in 3 chromosome pairs (1 inverted)\n\n" in text
+    lines = [line for line in text.splitlines() if line.startswith("• ")]
+    assert lines == [
+        "• c4:4,000-5,500 ⇄ chrX:0-1,500 (forward (+)), 12 anchors, score 1,234",
+        "• c2:2,000-3,500 ⇄ chrX:0-1,500 (reverse complement (−)), 12 anchors, score 900",
+        "• c1:1,000-2,500 ⇄ chrX:0-1,500 (forward (+)), 12 anchors, score 50",
+    ]
+    assert "… and 1 more" in text
+    assert "more" not in plain_text(block_segments(blocks))
+
+
+def small_matrix():
+    rows = SimpleNamespace(name="hg", intervals=[("chr1", 0, 9),
+                                                ("chromosome_with_long_name_x", 0, 9)])
+    cols = SimpleNamespace(name="mm", intervals=[("m1", 0, 9), ("m2", 0, 9), ("m3", 0, 9)])
+    matrix = SimilarityMatrix(rows, cols)
+    for i, j, similarity in [(0, 0, 12.5), (0, 2, 99.0), (1, 1, 45.25)]:
+        matrix.add({"row": i, "col": j, "similarity": similarity,
+                    "id1": rows.intervals[i][0], "id2": cols.intervals[j][0]})
+    return matrix
+
+
+def test_matrix_segments_numeric():
+    assert plain_text(matrix_segments(small_matrix())) == (
+        "\nhg (rows) × mm (columns): 2 × 3\n"
+        "• Best: chr1 vs m3 (99.00%)\n"
+        "                          m1      m2      m3\n"
+        "chr1                    12.50       -   99.00\n"
+        "chromosome_with_lon…        -   45.25       -\n")
+
+
+def test_matrix_segments_shaded_and_truncated():
+    text = plain_text(matrix_segments(small_matrix(), max_rows=1, max_columns=2))
+    lines = text.splitlines()
+    assert lines[3].startswith("Shading: · <20% ░ <40%")
+    assert lines[4] == "chr1                 · █"
+    assert lines[5] == "… and 1 more rows (all are saved with an exported report)"
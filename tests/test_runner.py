@@ -0,0 +1,123 @@
+import threading
+
+import pytest
+
+from conftest import random_dna
+from synteny import engine
+from synteny.runner import BackgroundRun, format_duration
+
+
+@pytest.fixture
+def inputs(tmp_path, rng):
+    """Genome and chromosome files for 8 intervals of 50 bases (28 pairs)"""
+    genome = random_dna(rng, 400)
+    genome_path = tmp_path / "genome.fa"
+    genome_path.write_text(">g\n" + genome + "\n")
+    chromosomes_path = tmp_path / "chromosomes.csv"
+    chromosomes_path.write_text("Chromosome_ID,Start,End\n" + "".join(
+        f"c{k},{k * 50},{(k + 1) * 50}\n" for k in range(8)) + "c8,900,950\n")
+    return str(genome_path), str(chromosomes_path), genome
+
+
+def messages(run, timeout=10):
+    """Every message of run, blocking until its final one"""
+    result = []
+    while not result or result[-1][0] not in ("finished", "cancelled", "error"):
+        result.append(run.queue.get(timeout=timeout))
+    return result
+
+
+def test_messages_arrive_in_order(inputs):
+    genome_path, chromosomes_path, genome = inputs
+    run = BackgroundRun(genome_path, chromosomes_path)
+    run.start()
+    result = messages(run)
+    run.join()
+
+    kind, info = result[0]
+    assert kind == "start"
+    assert info["genome_length"] == 400
+    assert info["gc_content"] == engine.gc_content(genome)
+    assert info["chromosomes"] == 9
+    assert info["total"] == 36
+    assert info["warnings"] == ["Chromosome c8 start position 900 is out of genome range."]
+    assert [kind for kind, _ in result[1:-1]] == ["pair"] * 36
+    assert [record["index"] for _, record in result[1:-1]] == list(range(1, 37))
+    assert result[-1] == ("finished", None)
+    assert run.done == run.total == 36
+    assert not run.is_alive()
+    assert run.drain() == []
+
+
+def test_visual_rebuilds_from_run_genome(inputs):
+    genome_path, chromosomes_path, genome = inputs
+    run = BackgroundRun(genome_path, chromosomes_path)
+    run.start()
+    records = [record for kind, record in messages(run) if kind == "pair"]
+    run.join()
+    for record in records[:10]:
+        i, j = int(record["id1"][1:]), int(record["id2"][1:])
+        assert run.visual(record) == engine.record_visual(
+            record, genome[i * 50:(i + 1) * 50], genome[j * 50:(j + 1) * 50])
+
+
+def test_cancel_delivers_partial_results(inputs, monkeypatch):
+    genome_path, chromosomes_path, _ = inputs
+    # Hold the worker in its second pair until the test has cancelled
+    gate = threading.Event()
+    compare_pair = engine.compare_pair
+    calls = []
+
+    def gated(*args, **kwargs):
+        calls.append(args)
+        if len(calls) > 1:
+            gate.wait(10)
+        return compare_pair(*args, **kwargs)
+
+    monkeypatch.setattr(engine, "compare_pair", gated)
+    run = BackgroundRun(genome_path, chromosomes_path)
+    run.start()
+    assert run.queue.get(timeout=10)[0] == "start"
+    kind, first = run.queue.get(timeout=10)
+    assert (kind, first["index"]) == ("pair", 1)
+    run.cancel()
+    gate.set()
+    result = messages(run)
+    run.join()
+
+    assert run.cancelled
+    assert result[-1] == ("cancelled", None)
+    pairs = [first] + [record for kind, record in result[:-1]]
+    assert [kind for kind, _ in result[:-1]] == ["pair"] * (len(pairs) - 1)
+    assert 1 <= len(pairs) < run.total
+    assert [record["index"] for record in pairs] == list(range(1, len(pairs) + 1))
+    assert run.done == len(pairs)
+
+
+def test_unreadable_input_ends_with_error(inputs, tmp_path):
+    _, chromosomes_path, _ = inputs
+    run = BackgroundRun(str(tmp_path / "missing.fa"), chromosomes_path)
+    run.start()
+    result = messages(run)
+    run.join()
+    assert len(result) == 1
+    kind, error = result[0]
+    assert kind == "error"
+    assert isinstance(error, OSError)
+
+
+def test_drain_respects_limit(inputs):
+    genome_path, chromosomes_path, _ = inputs
+    run = BackgroundRun(genome_path, chromosomes_path)
+    run.start()
+    run.join(10)
+    assert len(run.drain(5)) == 5
+    assert [kind for kind, _ in run.drain()][-1] == "finished"
+    assert run.eta_seconds() == 0
+
+
+@pytest.mark.parametrize("seconds, text", [(None, "--:--"), (0, "00:00"), (59.6, "01:00"),
+                                           (3599, "59:59"), (3600, "1:00:00"),
+                                           (45296, "12:34:56")])
+def test_format_duration(seconds, text):
+    assert format_duration(seconds) == text
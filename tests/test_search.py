@@ -0,0 +1,70 @@
+import pytest
+
+from conftest import random_dna
+from synteny import engine
+from synteny.engine import BestPair
+from synteny.parallel import compare_intervals
+from synteny.search import best_pair_intervals, find_best_pair
+
+
+def exhaustive_best(records):
+    best = BestPair()
+    for record in records:
+        best.update(record)
+    return best.record
+
+
+def random_chromosomes(rng):
+    """A few short sequences; related ones and a small alphabet make ties likely"""
+    count = rng.randint(2, 7)
+    alphabet = rng.choice(["ACGT", "AC", "ACGTN"])
+    seqs = [random_dna(rng, rng.randint(1, 40), alphabet) for _ in range(count)]
+    for k in range(1, count):
+        if rng.random() < 0.3:
+            seqs[k] = seqs[rng.randrange(k)][:rng.randint(1, 40)] or seqs[k]
+    return [(f"c{k}", seq) for k, seq in enumerate(seqs)]
+
+
+@pytest.mark.parametrize("both_strands", [False, True])
+def test_matches_exhaustive_argmax(rng, both_strands):
+    for _ in range(150):
+        chromo_list = random_chromosomes(rng)
+        expected = exhaustive_best(engine.compare_all(chromo_list, both_strands=both_strands))
+        record, stats = find_best_pair(chromo_list, both_strands=both_strands)
+        assert record == expected
+        assert stats["aligned"] + stats["pruned"] == stats["pairs"]
+
+
+def test_matches_exhaustive_argmax_gapped(rng):
+    pytest.importorskip("numpy")
+    from synteny.gapped import GappedModel
+    for mode in ("local", "global"):
+        model = GappedModel(mode, band=8)
+        for _ in range(40):
+            chromo_list = random_chromosomes(rng)
+            expected = exhaustive_best(engine.compare_all(chromo_list, gapped=model))
+            record, _ = find_best_pair(chromo_list, gapped=model)
+            assert record == expected
+
+
+def test_ties_keep_earliest_pair():
+    chromo_list = [("a", "ACGT"), ("b", "ACGT"), ("c", "ACGT")]
+    record, stats = find_best_pair(chromo_list)
+    assert (record["index"], record["id1"], record["id2"]) == (1, "a", "b")
+    assert record["similarity"] == 100.0
+    assert stats["pruned"] == 2
+
+
+def test_no_matching_pair():
+    record, stats = find_best_pair([("a", "AAAA"), ("b", "CCCC")])
+    assert record is None
+    assert stats["pairs"] == 1
+
+
+def test_best_pair_intervals_matches_compare_intervals(rng):
+    genome = "".join(random_dna(rng, 50, "ACG") for _ in range(6))
+    intervals = [(f"c{k}", 50 * k, 50 * k + 30 + k) for k in range(6)]
+    for both_strands in (False, True):
+        expected = exhaustive_best(compare_intervals(genome, intervals, both_strands=both_strands))
+        record, _ = best_pair_intervals(genome, intervals, both_strands=both_strands)
+        assert record == expected
@@ -0,0 +1,106 @@
+import pytest
+
+from conftest import random_dna
+
+np = pytest.importorskip("numpy")
+
+from synteny.parallel import compare_intervals  # noqa: E402
+from synteny.sketch import (MAX_K, Prefilter, containment, kmer_hashes,  # noqa: E402
+                            recall_report, sketch)
+
+LENGTH = 300
+# (i, j) chromosome pairs planted as near copies, with their mutation counts
+PLANTED = {(1, 7): 3, (4, 9): 6, (2, 11): 12}
+
+
+def mutate(rng, seq, count):
+    bases = list(seq)
+    for position in rng.sample(range(len(bases)), count):
+        bases[position] = rng.choice("ACGT".replace(bases[position], ""))
+    return "".join(bases)
+
+
+@pytest.fixture
+def planted(rng):
+    """Genome of 14 chromosomes and its intervals; PLANTED pairs are near copies"""
+    seqs = [random_dna(rng, LENGTH) for _ in range(14)]
+    for (i, j), mutations in PLANTED.items():
+        seqs[j] = mutate(rng, seqs[i], mutations)
+    intervals = [(f"c{k}", k * LENGTH, (k + 1) * LENGTH) for k in range(len(seqs))]
+    return "".join(seqs), intervals, seqs
+
+
+def pair_index(i, j, count):
+    return sum(count - 1 - row for row in range(i)) + j - i
+
+
+def test_kmer_hashes_skip_non_acgt_and_ignore_case():
+    assert len(kmer_hashes("ACGTACGT", 4)) == 5
+    assert len(kmer_hashes("ACGNACGT", 4)) == 1
+    assert len(kmer_hashes("ACG", 4)) == 0
+    assert np.array_equal(kmer_hashes("acgtAC", 3), kmer_hashes("ACGTAC", 3))
+
+
+@pytest.mark.parametrize("k", [0, MAX_K + 1])
+def test_bad_k_raises(k):
+    with pytest.raises(ValueError):
+        kmer_hashes("ACGT", k)
+    with pytest.raises(ValueError):
+        Prefilter(k, top=1).select(["ACGTACGT", "ACGTACGT"])
+
+
+def test_prefilter_needs_top_or_threshold():
+    with pytest.raises(ValueError):
+        Prefilter(16, 256)
+
+
+def test_containment(rng):
+    seq = random_dna(rng, 500)
+    other = random_dna(rng, 500)
+    assert containment(sketch(seq, 12), sketch(seq, 12)) == 1.0
+    assert containment(sketch(seq, 12), sketch(other, 12)) < 0.05
+    # A prefix is contained in the whole sequence, not the other way round
+    assert containment(sketch(seq, 12), sketch(seq[:100], 12)) > 0.9
+    assert containment(sketch(seq[:100], 12), sketch(seq, 12)) < 0.3
+    assert containment(sketch("", 12), sketch(seq, 12)) == 0.0
+
+
+@pytest.mark.parametrize("options", [{"top": 3}, {"threshold": 0.3},
+                                     {"top": 5, "threshold": 0.1}])
+def test_prefilter_keeps_best_pairs(planted, options):
+    genome, intervals, seqs = planted
+    full = list(compare_intervals(genome, intervals))
+    prefilter = Prefilter(12, 128, **options)
+    selected = list(compare_intervals(genome, intervals, prefilter=prefilter))
+
+    planted_indices = {pair_index(i, j, len(seqs)) for i, j in PLANTED}
+    indices = [record["index"] for record in selected]
+    assert planted_indices <= set(indices)
+    assert indices == sorted(indices)
+    assert len(selected) == prefilter.selected < len(full) // 10
+    assert selected == [full[index - 1] for index in indices]
+    report = recall_report(full, indices, ks=(1, len(PLANTED)))
+    assert report["best_retained"]
+    assert report["recall"] == {1: 1.0, len(PLANTED): 1.0}
+    if "top" in options:
+        assert prefilter.selected <= options["top"]
+    if "threshold" in options:
+        assert all(prefilter.estimates[index] >= options["threshold"] for index in indices)
+
+
+def test_recall_report_hand_computed():
+    similarities = [40.0, 90.0, 10.0, 90.0, 70.0]
+    records = [{"index": index, "similarity": similarity}
+               for index, similarity in enumerate(similarities, 1)]
+    # Report ranking: pairs 2 and 4 (tie, earlier first), 5, 1, 3
+    report = recall_report(records, [4, 5, 3], ks=(1, 2, 3, 10))
+    assert report == {
+        "pairs": 5,
+        "candidates": 3,
+        "fraction_aligned": 0.6,
+        "best_retained": False,
+        "recall": {1: 0.0, 2: 0.5, 3: 2 / 3, 10: 0.6},
+    }
+    assert recall_report([], [], ks=(1,)) == {"pairs": 0, "candidates": 0,
+                                              "fraction_aligned": 0.0,
+                                              "best_retained": False, "recall": {}}
@@ -0,0 +1,72 @@
+import pytest
+
+from conftest import random_dna
+from synteny import alignment
+from synteny.alignment import (best_strand_offset, calculate_alignment, render_alignment,
+                               reverse_complement)
+from synteny.engine import score_pair
+
+METHODS = ["reference"]
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy is optional
+    np = None
+else:
+    METHODS.append("fft")
+
+
+def test_reverse_complement():
+    assert reverse_complement("AACGTN") == "NACGTT"
+    assert reverse_complement("acgRY") == "RYcgt"
+    assert reverse_complement("") == ""
+
+
+@pytest.mark.parametrize("method", METHODS)
+def test_reverse_complement_scores_on_minus_strand(rng, method, engine_path):
+    seq1 = random_dna(rng, 300)
+    seq2 = reverse_complement(seq1)
+    result = score_pair(seq1, seq2, method, both_strands=True)
+    assert result["strand"] == "-"
+    assert (result["matches"], result["offset"], result["similarity"]) == (300, 0, 100.0)
+    assert score_pair(seq1, seq2, method)["similarity"] < 100.0
+    assert "strand" not in score_pair(seq1, seq2, method)
+
+
+@pytest.mark.parametrize("method", METHODS)
+def test_embedded_reverse_complement(rng, method, engine_path):
+    seq1 = random_dna(rng, 200)
+    seq2 = reverse_complement(seq1[50:120])
+    assert best_strand_offset(seq1, seq2, method) == (70, 50, "-")
+    similarity, visual = calculate_alignment(seq1, seq2, method, both_strands=True)
+    assert similarity == 100.0
+    assert visual == render_alignment(seq1, seq2, 50, "-")
+    assert visual[2] == " " * 50 + seq1[50:120]
+
+
+@pytest.mark.parametrize("method", METHODS)
+@pytest.mark.parametrize("seq1, seq2", [
+    ("TTACGTTT", "ACGT"),  # ACGT is its own reverse complement
+    ("AAAATTTT", "AAAA"),  # forward AAAA and reverse TTTT both match fully
+])
+def test_forward_wins_ties(seq1, seq2, method, engine_path):
+    forward = best_strand_offset(seq1, seq2, method)
+    assert forward[2] == "+"
+    assert forward[0] == len(seq2)
+    assert score_pair(seq1, seq2, method, both_strands=True)["strand"] == "+"
+
+
+@pytest.mark.parametrize("method", METHODS)
+def test_no_match_is_forward(method):
+    assert best_strand_offset("AAAA", "GGG", method) == (0, None, "+")
+    assert best_strand_offset("", "ACGT", method) == (0, None, "+")
+
+
+def test_both_strands_fft_matches_reference(rng, engine_path):
+    pytest.importorskip("numpy")
+    for _ in range(100):
+        seq1 = random_dna(rng, rng.randint(1, 50), rng.choice(["ACGT", "AT", "ACGTN"]))
+        seq2 = random_dna(rng, rng.randint(1, 50), rng.choice(["ACGT", "AT", "ACGTN"]))
+        assert best_strand_offset(seq1, seq2, "fft") == best_strand_offset(seq1, seq2, "reference")
+        forward, reverse = alignment.align_offsets_both(seq1, seq2)
+        assert np.array_equal(forward, alignment.align_offsets(seq1, seq2))
+        assert np.array_equal(reverse, alignment.align_offsets(seq1, reverse_complement(seq2)))
@@ -0,0 +1,83 @@
+import pytest
+
+from synteny.engine import read_genome_file
+from synteny.fasta import IndexedFasta
+
+pytest.importorskip("numpy")
+
+from synteny.synthetic import LINE_WIDTH, generate, parse_size, write_genome  # noqa: E402
+
+OPTIONS = {"records": 3, "repeat_fraction": 0.3, "families": 2, "family_length": 100,
+           "n_fraction": 0.05, "lower_fraction": 0.1, "min_length": 50, "max_length": 200}
+
+
+@pytest.mark.parametrize("text, bases", [("250", 250), (250, 250), ("10k", 10_000),
+                                         (" 2K ", 2_000), ("5M", 5_000_000),
+                                         ("1.5G", 1_500_000_000), ("0.5k", 500)])
+def test_parse_size(text, bases):
+    assert parse_size(text) == bases
+
+
+@pytest.mark.parametrize("text", ["", "k", "ten", "1.5", "5T"])
+def test_parse_size_rejects_junk(text):
+    with pytest.raises(ValueError):
+        parse_size(text)
+
+
+def generate_bytes(tmp_path, name, seed, length=5_000):
+    fasta, csv = tmp_path / f"{name}.fasta", tmp_path / f"{name}.csv"
+    summary = generate(str(fasta), str(csv), length, 12, seed, **OPTIONS)
+    return fasta.read_bytes(), csv.read_bytes(), summary
+
+
+def test_same_seed_gives_identical_files(tmp_path):
+    first = generate_bytes(tmp_path, "a", seed=7)
+    assert generate_bytes(tmp_path, "b", seed=7) == first
+    other = generate_bytes(tmp_path, "c", seed=8)
+    assert other[0] != first[0] and other[1] != first[1]
+
+
+def test_genome_layout(tmp_path):
+    path = tmp_path / "g.fasta"
+    copies = write_genome(str(path), 5_000, seed=3, records=3, repeat_fraction=0.3,
+                          families=2, family_length=100, n_fraction=0.05, lower_fraction=0.1,
+                          chunk=256)
+    lines = path.read_text().splitlines()
+    assert [line for line in lines if line.startswith(">")] == [">chr1", ">chr2", ">chr3"]
+    assert all(len(line) <= LINE_WIDTH for line in lines)
+    records, sizes = "".join(lines).split(">chr")[1:], []
+    for record in records:
+        sizes.append(len(record) - 1)  # less the record number
+    assert sizes == [1667, 1667, 1666]
+
+    genome = read_genome_file(str(path))
+    assert len(genome) == 5_000
+    assert set(genome) <= set("ACGTNacgtn")
+    assert "N" in genome and any(base.islower() for base in genome)
+    assert copies
+    assert all(0 <= start < end <= 5_000 and family in (0, 1) for family, start, end in copies)
+    assert all(a[2] <= b[1] for a, b in zip(copies, copies[1:]))
+
+
+def test_intervals_include_planted_copies(tmp_path):
+    fasta, csv = tmp_path / "g.fasta", tmp_path / "g.csv"
+    summary = generate(str(fasta), str(csv), 20_000, 10, seed=5, **OPTIONS)
+    rows = [line.split(",") for line in csv.read_text().splitlines()]
+    assert rows[0] == ["Chromosome_ID", "Start", "End"]
+    assert len(rows) - 1 == summary["intervals"] == 10
+    repeats = [row for row in rows[1:] if row[0].startswith("rep")]
+    assert len(repeats) == 5
+    for _, start, end in rows[1:]:
+        assert 0 <= int(start) < int(end) <= 20_000
+
+
+@pytest.mark.parametrize("length, records", [(3, 5), (0, 2), (120, 3)])
+def test_every_record_gets_a_header(tmp_path, length, records):
+    path = tmp_path / "g.fasta"
+    write_genome(str(path), length, records=records, repeat_fraction=0)
+    text = path.read_text()
+    assert [line for line in text.splitlines() if line.startswith(">")] == [
+        f">chr{k + 1}" for k in range(records)]
+    expected = [length // records + (k < length % records) for k in range(records)]
+    with IndexedFasta(str(path)) as genome:
+        assert [length for _, length in genome.record_spans().values()] == expected